@@ -0,0 +1,241 @@
+"""
+Benchmark suite for the MIDI communication paths, run against the virtual CT-X emulator (no keyboard required).
+
+Usage:
+    python benchmark.py [--iterations N] [--latency SECONDS] [--output FILE] [--only NAME ...]
+
+Every benchmark is repeated N times. Results (wall time percentiles, messages/sec or bytes/sec) are written to
+a JSON file, so that regressions can be tracked between releases.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from constants import constants
+from constants.constants import VIRTUAL_SYNTH_PORT_NAME, SYNC_TIMEOUT, EMPTY_TONE
+from constants.enums import EngineEvent
+
+DEFAULT_ITERATIONS = 20
+DEFAULT_LATENCY = 0.001  # seconds, emulator reply latency
+DEFAULT_OUTPUT = "benchmark_results.json"
+BENCHMARK_SLOT = 99  # user tone slot used for bulk transfers (tone 900)
+
+
+def percentile(sorted_values: list, p: float) -> float:
+    """Percentile with linear interpolation between the closest ranks."""
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * p / 100
+    f = int(k)
+    c = min(f + 1, len(sorted_values) - 1)
+    return sorted_values[f] + (sorted_values[c] - sorted_values[f]) * (k - f)
+
+
+def summarize(wall_times: list, units: list, unit_name: str) -> dict:
+    ordered = sorted(wall_times)
+    total_time = sum(wall_times)
+    return {
+        "iterations": len(wall_times),
+        "wall_time": {
+            "min": ordered[0],
+            "mean": total_time / len(ordered),
+            "p50": percentile(ordered, 50),
+            "p90": percentile(ordered, 90),
+            "p99": percentile(ordered, 99),
+            "max": ordered[-1],
+        },
+        unit_name + "_per_sec": sum(units) / total_time if total_time > 0 else 0.0,
+        unit_name + "_per_iteration": sum(units) / len(units),
+    }
+
+
+class Benchmark:
+    def __init__(self, iterations: int, latency: float):
+        self.iterations = iterations
+        self.latency = latency
+
+        # The engine reads "config.cfg" from the working directory: use a private one that selects the emulator
+        self.work_dir = tempfile.mkdtemp(prefix="tone_mutant_benchmark_")
+        os.chdir(self.work_dir)
+        with open(constants.CONFIG_FILENAME, "w") as cfg_file:
+            cfg_file.write(f"[Midi]\nInPort = {VIRTUAL_SYNTH_PORT_NAME}\nOutPort = {VIRTUAL_SYNTH_PORT_NAME}\n"
+                           f"[Emulator]\nLatency = {latency}\n")
+
+        from services.tone_engine import ToneEngine  # after the configuration is in place
+
+        self.error_count = 0
+        self.sync_finished = threading.Event()
+        self.sync_reports = []
+        self.engine = ToneEngine()  # no GUI: events are only counted
+        self.engine.subscribe(EngineEvent.LOG, self.on_log)
+        self.engine.subscribe(EngineEvent.SYNC_FINISHED, self.on_sync_finished)
+        self.midi_service = self.engine.midi_service
+        self.tyrant_midi_service = self.engine.tyrant_midi_service
+        self.synth = self.midi_service.virtual_synth
+
+    def run(self, names: list) -> dict:
+        benchmarks = {
+            "synchronize_tone_with_synth": self.bench_synchronize_tone,
+            "read_current_tone": self.bench_read_current_tone,
+            "bulk_download": self.bench_bulk_download,
+            "bulk_upload": self.bench_bulk_upload,
+            "user_memory_tone_names": self.bench_user_memory_tone_names,
+            "midi_7bit_to_8bit": self.bench_midi_7bit_to_8bit,
+            "midi_8bit_to_7bit": self.bench_midi_8bit_to_7bit,
+            "midi_codec_variants": self.bench_midi_codec_variants,
+            "parse_response": self.bench_parse_response,
+        }
+        results = {}
+        for name, fn in benchmarks.items():
+            if names and name not in names:
+                continue
+            print(f"{name}...", file=sys.stderr)
+            errors_before = self.error_count
+            results[name] = fn()
+            results[name]["errors"] = self.error_count - errors_before
+        return results
+
+    def on_sync_finished(self, report):
+        self.sync_reports.append(report)
+        self.sync_finished.set()
+
+    def on_log(self, message):
+        if isinstance(message, str) and message.startswith("[ERROR]"):
+            self.error_count += 1
+
+    def _messages(self) -> int:
+        return self.synth.received_count + self.synth.sent_count
+
+    def _time_midi(self, fn) -> dict:
+        wall_times, messages = [], []
+        for _ in range(self.iterations):
+            messages_before = self._messages()
+            t1 = time.perf_counter()
+            fn()
+            wall_times.append(time.perf_counter() - t1)
+            messages.append(self._messages() - messages_before)
+        return summarize(wall_times, messages, "messages")
+
+    def _time_codec(self, fn, data, repeat: int = 100) -> dict:
+        wall_times = []
+        for _ in range(self.iterations):
+            t1 = time.perf_counter()
+            for _ in range(repeat):
+                fn(data)
+            wall_times.append(time.perf_counter() - t1)
+        return summarize(wall_times, [len(data) * repeat] * self.iterations, "bytes")
+
+    def bench_synchronize_tone(self) -> dict:
+        def sync():
+            self.sync_finished.clear()
+            self.engine.synchronize_tone_with_synth()
+            self.sync_finished.wait(SYNC_TIMEOUT + 1.0)
+
+        self.sync_reports.clear()
+        result = self._time_midi(sync)
+        result["incomplete"] = sum(1 for report in self.sync_reports if not report.complete)
+        result["replies_per_iteration"] = sum(report.received for report in self.sync_reports) / self.iterations
+        return result
+
+    def bench_read_current_tone(self) -> dict:
+        return self._time_midi(lambda: self.tyrant_midi_service.read_current_tone("Benchmark"))
+
+    def bench_bulk_download(self) -> dict:
+        return self._time_midi(lambda: self.tyrant_midi_service.bulk_download(BENCHMARK_SLOT, memory=1, category=3))
+
+    def bench_bulk_upload(self) -> dict:
+        return self._time_midi(
+            lambda: self.tyrant_midi_service.bulk_upload(BENCHMARK_SLOT, EMPTY_TONE, memory=1, category=3))
+
+    def bench_user_memory_tone_names(self) -> dict:
+        def scan():
+            self.engine.request_user_memory_tone_names()
+            self.midi_service.request_engine.wait_until_idle(SYNC_TIMEOUT)
+
+        return self._time_midi(scan)
+
+    def bench_midi_7bit_to_8bit(self) -> dict:
+        data = self.tyrant_midi_service.midi_8bit_to_7bit(EMPTY_TONE)
+        return self._time_codec(self.tyrant_midi_service.midi_7bit_to_8bit, data)
+
+    def bench_midi_8bit_to_7bit(self) -> dict:
+        return self._time_codec(self.tyrant_midi_service.midi_8bit_to_7bit, EMPTY_TONE)
+
+    def bench_midi_codec_variants(self) -> dict:
+        """
+        Every implementation of the 7-bit codec, compared with the pure Python codec over all lengths of a few
+        groups and a random bulk sized payload, then timed on a payload of 100 tones (a full backup).
+        The pure Python codec is pinned to the original per-byte algorithm by tests/test_midi_codec.py.
+        """
+        from utils import midi_codec
+
+        encoders = {"python": midi_codec.encode_7bit_python}
+        decoders = {"python": midi_codec.decode_7bit_python}
+        if midi_codec.numpy is not None:
+            encoders["numpy"] = midi_codec.encode_7bit_numpy
+            decoders["numpy"] = midi_codec.decode_7bit_numpy
+
+        samples = [bytes(range(256))[:length] for length in range(32)] + [os.urandom(len(EMPTY_TONE))]
+        mismatches = 0
+        for data in samples:
+            expected = midi_codec.encode_7bit_python(data)
+            mismatches += sum(encoders[name](data) != expected for name in encoders if name != "python")
+            mismatches += sum(decode(expected) != data for decode in decoders.values())
+
+        payload = os.urandom(len(EMPTY_TONE) * 100)
+        encoded = midi_codec.encode_7bit_python(payload)
+        results = {"mismatches": mismatches}
+        for name in encoders:
+            results["encode_" + name] = self._time_codec(encoders[name], payload, repeat=1)
+            results["decode_" + name] = self._time_codec(decoders[name], encoded, repeat=1)
+        return results
+
+    def bench_parse_response(self) -> dict:
+        from services.tyrant_midi_service import BulkSession
+
+        # The packet stream of a complete user tone download
+        stream = b''
+        for i in range(0, len(EMPTY_TONE), 0x80):
+            chunk = EMPTY_TONE[i:i + 0x80]
+            stream += self.tyrant_midi_service.make_packet(command=5, category=3, memory=1,
+                                                           parameter_set=BENCHMARK_SLOT, length=len(chunk),
+                                                           data=chunk)
+        return self._time_codec(lambda data: BulkSession(self.midi_service).parse_response(data), stream, repeat=20)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tone Mutant MIDI benchmarks (virtual CT-X emulator)")
+    parser.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS)
+    parser.add_argument("--latency", type=float, default=DEFAULT_LATENCY, help="emulator reply latency, seconds")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="JSON result file")
+    parser.add_argument("--only", nargs="*", default=[], help="benchmark names to run")
+    args = parser.parse_args()
+
+    output_path = os.path.abspath(args.output)
+    benchmark = Benchmark(args.iterations, args.latency)
+    results = benchmark.run(args.only)
+
+    report = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "iterations": args.iterations,
+        "emulator_latency": args.latency,
+        "results": results,
+        "latency": benchmark.midi_service.latency_monitor.snapshot(),
+        "sysex_parser": benchmark.midi_service.sysex_parser.stats(),
+    }
+    with open(output_path, "w") as output_file:
+        json.dump(report, output_file, indent=2)
+    print(f"Results saved to {output_path}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
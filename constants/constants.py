@@ -14,6 +14,24 @@ DEFAULT_SYNTH_MODEL: Final[str] = CTX_3000_5000
 DEFAULT_MIDI_IN_PORT: Final[str] = "CASIO USB-MIDI 0"
 DEFAULT_MIDI_OUT_PORT: Final[str] = "CASIO USB-MIDI 1"
 DEFAULT_MIDI_CHANNEL: Final[int] = 0
+DEFAULT_REQUEST_WINDOW: Final[int] = 4  # parameter requests in flight at once
+DEFAULT_REQUEST_TIMEOUT: Final[float] = 1.0  # seconds to wait for a parameter reply
+SYNC_TIMEOUT: Final[float] = 5.0  # seconds to wait for a complete tone synchronization
+NAME_SCAN_TIMEOUT: Final[float] = 10.0  # seconds to wait for all user tone names
+DEFAULT_REALTIME_RATE: Final[float] = 100.0  # MIDI writer rate limits, messages per second (0: unlimited)
+DEFAULT_SYNC_RATE: Final[float] = 500.0
+DEFAULT_BULK_RATE: Final[float] = 0.0
+DEFAULT_INBOUND_QUEUE_SIZE: Final[int] = 4096  # received MIDI messages buffered before the oldest are dropped
+INBOUND_BATCH_SIZE: Final[int] = 64  # received MIDI messages processed per batch
+LATENCY_WINDOW_SIZE: Final[int] = 1000  # latest round trips kept for the latency statistics
+LATENCY_VIEW_INTERVAL: Final[int] = 500  # milliseconds between latency view refreshes
+VIRTUAL_SYNTH_PORT_NAME: Final[str] = "Virtual CT-X (emulator)"  # MIDI port name that selects the emulator
+BULK_ACK_TIMEOUT: Final[float] = 4.0  # seconds to wait for a bulk transfer ACK
+BULK_SETTLE_TIME: Final[float] = 0.3  # seconds the keyboard may need after ESS/EBS (initial and maximum value)
+BULK_SETTLE_TIME_MIN: Final[float] = 0.02  # lower bound of the learned settle time
+BULK_SBS_RETRIES: Final[int] = 2  # unanswered SBS packets resent with a doubled settle time
+USER_TONE_CACHE_DIR: Final[str] = "user_tone_cache"  # last known images of the user tone slots
+BACKUP_CHUNK_SIZE: Final[int] = 10  # user tones per bulk session during a backup or restore
 
 LOG_MAX_LEN: Final[int] = 1000
 
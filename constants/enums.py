@@ -19,6 +19,13 @@ class ParameterType(Enum):
     SPECIAL_DELAY_KNOB = 5
 
 
+# MIDI writer lanes, in priority order
+class MidiLane(IntEnum):
+    REALTIME = 0  # interactive edits
+    SYNC = 1  # parameter requests
+    BULK = 2  # bulk transfers
+
+
 class SysexId(IntEnum):
     CASIO = 0x44
     NON_REAL_TIME = 0x7E
@@ -40,3 +47,24 @@ class Size(IntEnum):
     MAIN_PARAMETER_SHORT = 1
     DSP_MODULE = 2
     DSP_PARAMS = 14
+
+
+# Events of the tone engine (services/tone_engine.py), with the arguments passed to the listeners
+class EngineEvent(Enum):
+    LOG = 1  # message
+    ERROR = 2  # text
+    STATUS = 3  # text, msecs
+    TONE_NAME_CHANGED = 4  # (name or parent tone of the tone model)
+    PARENT_TONE_SELECTED = 5  # instrument or None
+    LAYER_TONE_CHANGED = 6  # block0, instrument id (UPPER 2, LOWER 1, LOWER 2)
+    INSTRUMENT_CHANGED_ON_SYNTH = 7  # bank, program (program change received from the keyboard)
+    PARAMETER_CHANGED = 8  # main or advanced parameter
+    VOLUME_CHANGED = 9  # block0, value
+    PAN_CHANGED = 10  # block0, value
+    DSP_MODULE_CHANGED = 11  # block0, DSP module id
+    DSP_PARAMS_CHANGED = 12  # block0
+    SYNC_REQUESTED = 13  # (the tone should be synchronized again)
+    SYNC_STARTED = 14  # (replies are coming in: views may wait for SYNC_FINISHED)
+    SYNC_FINISHED = 15  # SyncReport (services/sync_transaction.py)
+    USER_TONE_NAME = 16  # tone number, tone name
+    USER_TONES_CHANGED = 17  # (user memory has been written)
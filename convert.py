@@ -0,0 +1,133 @@
+"""
+Offline batch converter between JSON tones and .ton files (no keyboard, no GUI).
+
+Usage:
+    python convert.py to-ton SOURCE_DIR TARGET_DIR [--base FILE.ton] [--workers N] [--report FILE]
+    python convert.py to-json SOURCE_DIR TARGET_DIR [--workers N] [--report FILE]
+
+Source directories are searched recursively; the converted files keep their relative paths. A JSON tone holds only
+the parameters of the editor: the rest of the tone image is taken from the base .ton file (an empty tone by
+default). Files are converted by a pool of processes. Every result is appended to the report (JSON Lines, one
+line per file) as soon as it is known, and the summary is printed at the end.
+"""
+
+import argparse
+import configparser
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from constants import constants
+from constants.constants import DEFAULT_SYNTH_MODEL, EMPTY_TONE
+from services.tone_codec import decode_tone, encode_tone, tone_from_json, tone_to_json, wrap_tone_file, unwrap_tone_file
+from utils.file_operations import FileOperations
+
+TO_TON = "to-ton"
+TO_JSON = "to-json"
+EXTENSIONS = {TO_TON: (".json", ".ton"), TO_JSON: (".ton", ".json")}
+REPORT_FILENAME = "conversion_report.jsonl"
+CHUNK_SIZE = 16  # files sent to a worker process at once
+
+_base_tone_data = EMPTY_TONE  # set in every worker process
+_synthesizer_model = None
+
+
+def _init_worker(base_tone_data: bytes, synthesizer_model: str):
+    global _base_tone_data, _synthesizer_model
+    _base_tone_data = base_tone_data
+    _synthesizer_model = synthesizer_model
+
+
+def convert_file(task: tuple) -> dict:
+    """Convert one file: (direction, source path, target path). Errors are returned, not raised."""
+    direction, source, target = task
+    result = {"source": source, "target": target}
+    try:
+        if direction == TO_TON:
+            tone = tone_from_json(FileOperations.load_json(source))
+            data = wrap_tone_file(bytes(encode_tone(tone, _base_tone_data)))
+            os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+            FileOperations.save_binary_file(target, data)
+        else:
+            tone_data = unwrap_tone_file(FileOperations.load_binary_file(source))
+            tone = decode_tone(tone_data, _synthesizer_model)
+            os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+            FileOperations.save_json(target, tone_to_json(tone))
+        result["status"] = "ok"
+    except Exception as e:
+        result["status"] = "error"
+        result["error"] = f"{type(e).__name__}: {e}"
+    return result
+
+
+def find_tasks(direction: str, source_dir: str, target_dir: str) -> list:
+    source_extension, target_extension = EXTENSIONS[direction]
+    tasks = []
+    for dir_path, _, file_names in os.walk(source_dir):
+        for file_name in sorted(file_names):
+            stem, extension = os.path.splitext(file_name)
+            if extension.lower() == source_extension:
+                relative_dir = os.path.relpath(dir_path, source_dir)
+                target = os.path.normpath(os.path.join(target_dir, relative_dir, stem + target_extension))
+                tasks.append((direction, os.path.join(dir_path, file_name), target))
+    return tasks
+
+
+def convert(tasks: list, report_path: str, workers: int = None, base_tone_data: bytes = EMPTY_TONE,
+            synthesizer_model: str = None) -> dict:
+    """Convert the files with a process pool, streaming the results into the report. Returns the summary."""
+    t1 = time.perf_counter()
+    converted = failed = 0
+    with open(report_path, "w") as report_file, \
+            ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                initargs=(base_tone_data, synthesizer_model)) as executor:
+        for result in executor.map(convert_file, tasks, chunksize=CHUNK_SIZE):
+            if result["status"] == "ok":
+                converted += 1
+            else:
+                failed += 1
+                print(f"[ERROR] {result['source']}: {result['error']}", file=sys.stderr)
+            report_file.write(json.dumps(result) + "\n")
+
+        elapsed = time.perf_counter() - t1
+        summary = {"files": len(tasks), "converted": converted, "failed": failed, "elapsed": round(elapsed, 3),
+                   "files_per_sec": round(len(tasks) / elapsed, 1) if elapsed > 0 else 0.0}
+        report_file.write(json.dumps({"summary": summary}) + "\n")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tone Mutant offline converter between JSON tones and .ton files")
+    parser.add_argument("direction", choices=[TO_TON, TO_JSON])
+    parser.add_argument("source_dir")
+    parser.add_argument("target_dir")
+    parser.add_argument("--base", help=".ton file with the parameters a JSON tone does not hold (to-ton only)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--report", default=None, help=f"report file (default: TARGET_DIR/{REPORT_FILENAME})")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.source_dir):
+        parser.error(f"Not a directory: {args.source_dir}")
+    base_tone_data = EMPTY_TONE
+    if args.base:
+        base_tone_data = bytes(unwrap_tone_file(FileOperations.load_binary_file(args.base)))
+
+    cfg = configparser.ConfigParser()
+    cfg.read(constants.CONFIG_FILENAME)
+    synthesizer_model = cfg.get("Synthesizer", "Model", fallback=DEFAULT_SYNTH_MODEL)
+
+    os.makedirs(args.target_dir, exist_ok=True)
+    report_path = os.path.abspath(args.report or os.path.join(args.target_dir, REPORT_FILENAME))
+    tasks = find_tasks(args.direction, args.source_dir, args.target_dir)
+    print(f"Converting {len(tasks)} file(s)...", file=sys.stderr)
+
+    summary = convert(tasks, report_path, args.workers, base_tone_data, synthesizer_model)
+    print(f"{summary['converted']} converted, {summary['failed']} failed in {summary['elapsed']:.1f} s "
+          f"({summary['files_per_sec']} files/sec). Report saved to {report_path}", file=sys.stderr)
+    sys.exit(1 if summary["failed"] else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,411 +1,256 @@
-import configparser
-import copy
 import random
 import string
+import threading
 import time
-from typing import Union
 
-from PySide2.QtCore import Signal, Slot, QObject
+from PySide2.QtCore import Signal, Slot, QObject, QTimer
 
 from constants import constants
-from constants.constants import DEFAULT_TONE_NAME, DEFAULT_SYNTH_MODEL, EMPTY_TONE, EMPTY_DSP_MODULE_ID, \
-    EMPTY_DSP_PARAMS_LIST, INTERNAL_MEMORY_USER_TONE_COUNT, USER_TONE_TABLE_ROW_OFFSET, BLUE_TEXT, BLACK_TEXT
-from constants.enums import ParameterType, SysexType
-from models.parameter import MainParameter, AdvancedParameter
+from constants.constants import BLUE_TEXT, BLACK_TEXT
+from constants.enums import ParameterType, EngineEvent
 from models.tone import Tone
 from services.midi_service import MidiService
+from services.tone_engine import ToneEngine
 from services.tyrant_midi_service import TyrantMidiService
 from ui.change_instrument_window import ChangeInstrumentWindow
 from ui.gui_helper import GuiHelper
-from utils import utils
 from utils.file_operations import FileOperations
-from utils.utils import decode_param_value, int_to_hex, lsb_msb_to_int, get_all_instruments
 from utils.worker import Worker
 
 
-# Class for managing tone state and handling all communication between GUI and Midi Service
-# NB! Use int values as its method parameters, all required byte/hex conversions make in the Midi Service!
+# Qt side of the tone engine: subscribes to the engine events and updates the GUI in the GUI thread.
+# Engine events arrive on MIDI and worker threads: they are passed on as signals, so widgets are only touched
+# by the slots below. During a tone synchronization the views are not updated reply by reply: everything is
+# redrawn once, when the synchronization has finished.
 class Core(QObject):
     synchronize_tone_signal = Signal()
     status_msg_signal = Signal(str, int)
+    error_msg_signal = Signal(str)
+    tone_name_changed_signal = Signal()
+    parent_tone_selected_signal = Signal(object)
+    layer_tone_changed_signal = Signal(int, int)
+    volume_changed_signal = Signal(int, int)
+    pan_changed_signal = Signal(int, int)
+    dsp_module_changed_signal = Signal(int, object)
+    dsp_params_changed_signal = Signal(int)
+    sync_started_signal = Signal()
+    sync_finished_signal = Signal(object)
+    user_tone_name_signal = Signal(int, str)
+    user_tones_changed_signal = Signal()
 
     def __init__(self, main_window, status_bar):
         super().__init__()
         self.main_window = main_window
         self.status_bar = status_bar
-        self.tone: Tone = Tone()
-        self.midi_service = MidiService(self)
-        self.tyrant_midi_service = TyrantMidiService()
-        self.timeout = 0
+        self.engine = ToneEngine()
         self.name_color = BLACK_TEXT
+        self.is_status_bar_update_on_pause = False
+        self._deferred_updates = {}  # (slot, block0) -> value: mixer values received during a synchronization
+        self._deferred_updates_lock = threading.Lock()  # written by the MIDI thread, taken by the GUI thread
+
         self.synchronize_tone_signal.connect(self.synchronize_tone_with_synth)
         self.status_msg_signal.connect(self.show_status_msg)
-
-        cfg = configparser.ConfigParser()
-        cfg.read(constants.CONFIG_FILENAME)
-        self.tone.synthesizer_model = cfg.get("Synthesizer", "Model", fallback=DEFAULT_SYNTH_MODEL)
-
-        self.is_status_bar_update_on_pause = False
+        self.error_msg_signal.connect(self.on_error)
+        self.tone_name_changed_signal.connect(self.on_tone_name_changed)
+        self.parent_tone_selected_signal.connect(self.on_parent_tone_selected)
+        self.layer_tone_changed_signal.connect(self.on_layer_tone_changed)
+        self.volume_changed_signal.connect(self.on_volume_changed)
+        self.pan_changed_signal.connect(self.on_pan_changed)
+        self.dsp_module_changed_signal.connect(self.on_dsp_module_changed)
+        self.dsp_params_changed_signal.connect(self.on_dsp_params_changed)
+        self.sync_started_signal.connect(self.on_sync_started)
+        self.sync_finished_signal.connect(self.on_sync_finished)
+        self.user_tone_name_signal.connect(self.on_user_tone_name)
+        self.user_tones_changed_signal.connect(self.on_user_tones_changed)
+
+        self.engine.subscribe(EngineEvent.LOG, self.log)  # the log widget is thread-safe
+        self.engine.subscribe(EngineEvent.ERROR, self.error_msg_signal.emit)
+        self.engine.subscribe(EngineEvent.STATUS, self.status_msg_signal.emit)
+        self.engine.subscribe(EngineEvent.TONE_NAME_CHANGED,
+                              self._unless_synchronizing(self.tone_name_changed_signal))
+        self.engine.subscribe(EngineEvent.PARENT_TONE_SELECTED,
+                              self._unless_synchronizing(self.parent_tone_selected_signal))
+        self.engine.subscribe(EngineEvent.LAYER_TONE_CHANGED,
+                              self._deferred_while_synchronizing(self.layer_tone_changed_signal,
+                                                                 self.on_layer_tone_changed))
+        self.engine.subscribe(EngineEvent.INSTRUMENT_CHANGED_ON_SYNTH, self.on_instrument_changed_on_synth)
+        self.engine.subscribe(EngineEvent.VOLUME_CHANGED,
+                              self._deferred_while_synchronizing(self.volume_changed_signal, self.on_volume_changed))
+        self.engine.subscribe(EngineEvent.PAN_CHANGED,
+                              self._deferred_while_synchronizing(self.pan_changed_signal, self.on_pan_changed))
+        self.engine.subscribe(EngineEvent.DSP_MODULE_CHANGED,
+                              self._unless_synchronizing(self.dsp_module_changed_signal))
+        self.engine.subscribe(EngineEvent.DSP_PARAMS_CHANGED,
+                              self._unless_synchronizing(self.dsp_params_changed_signal))
+        self.engine.subscribe(EngineEvent.SYNC_REQUESTED, self.synchronize_tone_signal.emit)
+        self.engine.subscribe(EngineEvent.SYNC_STARTED, self.sync_started_signal.emit)
+        self.engine.subscribe(EngineEvent.SYNC_FINISHED, self.sync_finished_signal.emit)
+        self.engine.subscribe(EngineEvent.USER_TONE_NAME, self.user_tone_name_signal.emit)
+        self.engine.subscribe(EngineEvent.USER_TONES_CHANGED, self.user_tones_changed_signal.emit)
+
+    @property
+    def tone(self) -> Tone:
+        return self.engine.tone
+
+    @property
+    def midi_service(self) -> MidiService:
+        return self.engine.midi_service
+
+    @property
+    def tyrant_midi_service(self) -> TyrantMidiService:
+        return self.engine.tyrant_midi_service
+
+    # Listener of a view event: the view is redrawn anyway when the running synchronization has finished
+    def _unless_synchronizing(self, signal):
+        def listener(*args):
+            if not self.engine.is_synchronizing:
+                signal.emit(*args)
+
+        return listener
+
+    # Listener of a mixer value, which is not part of the tone model: during a synchronization (and until its redraw)
+    # only the last value of every knob is kept, and applied by the redraw
+    def _deferred_while_synchronizing(self, signal, slot):
+        def listener(block0, value):
+            with self._deferred_updates_lock:
+                if self.engine.is_synchronizing or self._deferred_updates:
+                    self._deferred_updates[(slot, block0)] = value
+                    return
+            signal.emit(block0, value)
+
+        return listener
 
     # Synchronize all Tone data: name, main params, DSP modules and their params
     @Slot()
     def synchronize_tone_with_synth(self):
-        self.log("[INFO] Synchronizing tone...")
+        self.engine.synchronize_tone_with_synth()  # the loading animation runs until SYNC_FINISHED
+
+    @Slot()
+    def on_sync_started(self):
         self.main_window.loading_animation.start()
-        # self.tone = Tone()  # if enabled, then tone is initialized twice during the application startup
-
-        try:
-            self.close_midi_ports()
-            self.open_midi_ports()
-        except Exception as e:
-            self.show_error_msg(str(e))
-
-        if self.midi_service.midi_out.is_port_open() and self.midi_service.midi_in.is_port_open():
-            self.request_tone_name()
-            self.request_main_parameters()
-            self.request_dsp_module(0)
-            self.request_dsp_module(1)
-            self.request_dsp_module(2)
-            self.request_dsp_module(3)
-            self.request_advanced_parameters()
-            self.request_volume_values()
-            self.request_pan_values()
-
-            # upper2, lower1 and lower2 tone names
-            self.request_custom_parameter(SysexType.TONE_NUMBER.value, 1, 2, 3, 0, 0)
-            self.request_custom_parameter(SysexType.TONE_NUMBER.value, 2, 2, 3, 0, 0)
-            self.request_custom_parameter(SysexType.TONE_NUMBER.value, 3, 2, 3, 0, 0)
-
-        self.main_window.central_widget.on_tab_changed(0)  # updates help tab and JSON (if JSON-tab opened)
-
-        worker = Worker(self.redraw_main_and_advanced_params_pages)
-        worker.signals.error.connect(lambda error: self.show_error_msg(str(error[1])))
-        worker.start()
-        self.main_window.loading_animation.stop()
 
-    def redraw_main_and_advanced_params_pages(self):
+    # One redraw of everything the synchronization has received
+    @Slot(object)
+    def on_sync_finished(self, _):
+        with self._deferred_updates_lock:
+            deferred_updates, self._deferred_updates = self._deferred_updates, {}
+
+        self.on_tone_name_changed()
+        self.on_parent_tone_selected(self.tone.parent_tone)
+        for block0 in constants.BLOCK_MAPPING:
+            self.refresh_dsp_page(block0)
+        for (slot, block0), value in deferred_updates.items():
+            slot(block0, value)
+
         self.main_window.central_widget.redraw_main_params_panel_signal.emit()
         self.main_window.central_widget.redraw_advanced_params_panel_signal.emit()
+        self.main_window.central_widget.on_tab_changed(0)  # current DSP page, help tab and JSON (if JSON-tab opened)
+        self.main_window.loading_animation.stop()
 
-    # Request tone name from synth
-    def request_tone_name(self):
-        try:
-            self.midi_service.request_tone_name()
-        except Exception as e:
-            self.show_error_msg(str(e))
-
-    # Process tone name from synth response
-    def process_tone_name_response(self, response):
-        tone_name = ''.join(chr(i) for i in response if chr(i).isprintable()).strip()
-        self.log(f"[INFO] Synth tone name: {tone_name}")
-        if tone_name:
-            # Works only with user tones?
-            self.tone.name = tone_name
-        elif self.tone.name is None:
-            self.tone.name = constants.DEFAULT_TONE_NAME
-            self.request_tone_number_from_performance_params()
-
+    @Slot()
+    def on_tone_name_changed(self):
         self.main_window.top_widget.tone_name_input.setStyleSheet(self.name_color)
         self.main_window.top_widget.update_tone_name_input_and_parent_info()
 
-    # A new method for retrieving tone number and name
-    def request_tone_number_from_performance_params(self):
-        try:
-            self.midi_service.request_parameter_value_full(0, SysexType.TONE_NUMBER.value, 2, 3, 0, 0)
-        except Exception as e:
-            self.show_error_msg(str(e))
-
-    def process_tone_number_from_performance_params_response(self, tone_number, block0):
-        for instrument in get_all_instruments():
-            if instrument.id == tone_number:
-                self.log(f"[INFO] Tone name (by number from performance params): {instrument.name}")
-
-                if block0 == 0:
-                    self.tone.name = instrument.name
-                    self.tone.parent_tone = instrument
+    @Slot(object)
+    def on_parent_tone_selected(self, instrument):
+        if instrument is not None:
+            self.main_window.central_widget.instrument_list.set_current_row_silently(instrument.id - 1)
+        else:
+            self.main_window.central_widget.instrument_list.clearSelection()
 
-                    self.main_window.central_widget.instrument_list.set_current_row_from_thread(
-                        self.tone.parent_tone.id - 1)
+    @Slot(int, int)
+    def on_layer_tone_changed(self, block0, instrument_id):
+        self.main_window.top_widget.select_item_by_id(block0, instrument_id)
 
-                    self.main_window.top_widget.update_tone_name_input_and_parent_info()
-                else:
-                    self.main_window.top_widget.select_item_by_id(block0, instrument.id)
+    @Slot(int, int)
+    def on_volume_changed(self, block0, value):
+        self.main_window.top_widget.redraw_volume_knob(block0, value)
 
-                break
-
-    # Request main parameter value from synth
-    def request_main_parameters(self):
-        for parameter in self.tone.main_parameter_list:
-            self.log("[INFO] Requesting parameter: " + parameter.name)
-            try:
-                self.midi_service.request_parameter_value(parameter.block0, parameter.param_number)
-            except Exception as e:
-                self.show_error_msg(str(e))
-
-    # Request advanced parameter value from synth
-    def request_advanced_parameters(self):
-        for parameter in self.tone.advanced_parameter_list:
-            self.log("[INFO] Requesting parameter: " + parameter.name)
-            try:
-                self.midi_service.request_parameter_value(parameter.block0, parameter.param_number)
-            except Exception as e:
-                self.show_error_msg(str(e))
+    @Slot(int, int)
+    def on_pan_changed(self, block0, value):
+        self.main_window.top_widget.redraw_pan_knob(block0, value)
 
-    # Process main/advanced parameter value response
-    def process_parameter_response(self, param_number, block0, param_set, response):
-        for parameter in self.tone.main_parameter_list:
-            if parameter.param_number == param_number and parameter.block0 == block0:
-                self.log(f"[INFO] {parameter.name}: {str(response)}")
-                if parameter.type == ParameterType.SPECIAL_ATK_REL_KNOB:
-                    value = int(int_to_hex(response[1]) + int_to_hex(response[0]), 16)
-                elif len(response) == 1:
-                    value = response[0]
-                else:
-                    value = lsb_msb_to_int(response[0], response[1])
-                parameter.value = decode_param_value(value, parameter)
-                break
-        for parameter in self.tone.advanced_parameter_list:
-            if parameter.param_number == param_number and parameter.block0 == block0:
-                self.log(f"[INFO] {parameter.name}: {str(response)}")
-                if len(response) == 1:
-                    value = response[0]
-                    if parameter.name == "Sound A Timbre Type" or parameter.name == "Sound B Timbre Type":
-                        value = int(value / 2)
-                else:
-                    value = lsb_msb_to_int(response[0], response[1])
-                parameter.value = decode_param_value(value, parameter)
-                break
-        if self.main_window.top_widget.upper1_volume.param_number == param_number:  # and cat==2
-            # not only upper1_volume, but all 4 layers
-            self.main_window.top_widget.redraw_volume_knob_signal.emit(block0, response[0])
-        elif self.main_window.top_widget.upper1_pan.param_number == param_number:  # and cat==2
-            parameter = self.main_window.top_widget.upper1_pan
-            value = decode_param_value(response[0], parameter)
-            self.main_window.top_widget.redraw_pan_knob_signal.emit(block0, value)
+    def on_instrument_changed_on_synth(self, *_):
+        self.name_color = BLACK_TEXT
 
-    # Send message to update synth's main parameter
-    def send_parameter_change_sysex(self, parameter: Union[MainParameter, AdvancedParameter]):
-        self.log(
-            "[INFO] Param " + str(parameter.name) + ": " + str(parameter.param_number) + ", " + str(parameter.value))
-        value = utils.encode_value_by_type(parameter)
-        if parameter.name == "Sound A Timbre Type" or parameter.name == "Sound B Timbre Type":
-            value = int(value * 2)
-
-        try:
-            if parameter.type == ParameterType.SPECIAL_ATK_REL_KNOB:
-                self.midi_service.send_atk_rel_parameter_change_sysex(parameter.block0,
-                                                                      parameter.param_number, value)
-            elif parameter.name in constants.SHORT_PARAMS:
-                self.midi_service.send_parameter_change_short_sysex(parameter.block0,
-                                                                    parameter.param_number, value)
-            else:
-                self.midi_service.send_parameter_change_sysex(parameter.block0, parameter.param_number, value)
-        except Exception as e:
-            self.show_error_msg(str(e))
-
-    def send_performance_param_change_sysex(self, parameter: AdvancedParameter):
-        self.log(
-            "[INFO] Param " + str(parameter.name) + ": " + str(parameter.param_number) + ", " + str(parameter.value))
-        value = utils.encode_value_by_type(parameter)
-        self.midi_service.send_parameter_value_full(parameter.block0, parameter.param_number, 2, 3, 0, value, 0)
-
-    # Request DSP module from synth
-    def request_dsp_module(self, block0):
-        try:
-            self.midi_service.request_dsp_module(block0)
-        except Exception as e:
-            self.show_error_msg(str(e))
-
-    # Process DSP module from synth response
-    def process_dsp_module_response(self, block0: int, dsp_module_id: int):
-        self.update_tone_dsp_module_and_refresh_gui(block0, dsp_module_id)
-        self.request_dsp_module_parameters(block0, dsp_module_id)
+    @Slot(int, object)
+    def on_dsp_module_changed(self, block0, _):
+        dsp_page = self.refresh_dsp_page(block0)
+        if dsp_page == self.main_window.central_widget.current_dsp_page:
+            self.main_window.central_widget.update_help_text_panel_signal.emit()
 
-    # On list widget changed: update tone dsp and send module change sysex
-    def update_dsp_module_from_list(self, block0, dsp_module_id):
-        self.update_tone_dsp_module_and_refresh_gui(block0, dsp_module_id)
-
-        try:
-            if dsp_module_id is None:
-                self.midi_service.send_dsp_module_change_sysex(block0, EMPTY_DSP_MODULE_ID)
-                self.midi_service.send_dsp_params_change_sysex(block0, EMPTY_DSP_PARAMS_LIST)
-                self.midi_service.send_dsp_bypass_sysex(block0, True)
-                if self.main_window.central_widget.current_dsp_page:
-                    self.main_window.central_widget.current_dsp_page.redraw_dsp_params_panel_signal.emit()
-            else:
-                self.midi_service.send_dsp_bypass_sysex(block0, False)
-                self.midi_service.send_dsp_module_change_sysex(block0, dsp_module_id)
-                self.request_dsp_module_parameters(block0, dsp_module_id)
-        except Exception as e:
-            self.show_error_msg(str(e))
-
-    # Update tone dsp module and refresh GUI
-    def update_tone_dsp_module_and_refresh_gui(self, block0, dsp_module_id):
+    # Show the DSP module of the tone on its page
+    def refresh_dsp_page(self, block0):
         dsp_module_attr, dsp_page_attr = constants.BLOCK_MAPPING[block0]
-        setattr(self.tone, dsp_module_attr, copy.deepcopy(Tone.get_dsp_module_by_id(dsp_module_id)))
         dsp_page = getattr(self.main_window.central_widget, dsp_page_attr)
         dsp_page.dsp_module = getattr(self.tone, dsp_module_attr)
         if dsp_page.dsp_module:
-            self.log(f"[INFO] DSP module: {dsp_page.dsp_module.name}")
-            dsp_page.dsp_module.bypass.value = 0
             self.main_window.central_widget.tab_widget.setTabIcon(block0 + 1, GuiHelper.get_green_icon())
-            # self.main_window.central_widget.tab_widget.setTabText(block0 + 1, dsp_page.dsp_module.name)
         else:
             self.main_window.central_widget.tab_widget.setTabIcon(block0 + 1, GuiHelper.get_white_icon())
-            # self.main_window.central_widget.tab_widget.setTabText(block0 + 1, "DSP X")
 
         dsp_page.list_widget.blockSignals(True)
-        dsp_page.list_widget.setCurrentItem(dsp_page.get_list_item_by_dsp_id(dsp_module_id))
+        dsp_page.list_widget.setCurrentItem(
+            dsp_page.get_list_item_by_dsp_id(dsp_page.dsp_module.id if dsp_page.dsp_module else None))
         dsp_page.list_widget.blockSignals(False)
+        return dsp_page
 
-        if dsp_page == self.main_window.central_widget.current_dsp_page:
-            self.main_window.central_widget.update_help_text_panel_signal.emit()
+    @Slot(int)
+    def on_dsp_params_changed(self, _):
+        if self.main_window.central_widget.current_dsp_page:
+            self.main_window.central_widget.current_dsp_page.redraw_dsp_params_panel_signal.emit()
 
-    # Request DSP module parameters from synth
-    def request_dsp_module_parameters(self, block0, dsp_module_id):
-        if dsp_module_id is not None:
-            try:
-                self.midi_service.request_dsp_params(block0)
-            except Exception as e:
-                self.show_error_msg(str(e))
+    @Slot(int, str)
+    def on_user_tone_name(self, tone_number, tone_name):
+        if self.main_window.user_tone_manager_window:
+            self.main_window.user_tone_manager_window.add_item(tone_number, tone_name)
 
-    # Process DSP module parameters from synth response
-    def process_dsp_module_parameters_response(self, block0, synth_dsp_params):
-        dsp_module_attr, dsp_page_attr = constants.BLOCK_MAPPING[block0]
-        dsp_module = getattr(self.tone, dsp_module_attr)
-        if dsp_module is not None:
-            for idx, dsp_param in enumerate(dsp_module.dsp_parameter_list):
-                if dsp_param.type == ParameterType.SPECIAL_DELAY_KNOB:
-                    dsp_param.value = int(str(synth_dsp_params[12]) + str(synth_dsp_params[13]))
-                else:
-                    dsp_param.value = decode_param_value(synth_dsp_params[idx], dsp_param)
+    @Slot()
+    def on_user_tones_changed(self):
+        if self.main_window.user_tone_manager_window:
+            self.main_window.user_tone_manager_window.load_memory_tone_names()  # reload list and stop animation
 
-        if self.main_window.central_widget.current_dsp_page:
-            self.main_window.central_widget.current_dsp_page.redraw_dsp_params_panel_signal.emit()
+    # Send message to update synth's main parameter
+    def send_parameter_change_sysex(self, parameter):
+        self.engine.send_parameter_change_sysex(parameter)
 
-    def request_volume_values(self):
-        try:
-            self.midi_service.request_parameter_value_full(self.main_window.top_widget.upper1_volume.block0,
-                                                           self.main_window.top_widget.upper1_volume.param_number,
-                                                           2, 3, 0, 0)
-            self.midi_service.request_parameter_value_full(self.main_window.top_widget.upper2_volume.block0,
-                                                           self.main_window.top_widget.upper2_volume.param_number,
-                                                           2, 3, 0, 0)
-            self.midi_service.request_parameter_value_full(self.main_window.top_widget.lower1_volume.block0,
-                                                           self.main_window.top_widget.lower1_volume.param_number,
-                                                           2, 3, 0, 0)
-            self.midi_service.request_parameter_value_full(self.main_window.top_widget.lower2_volume.block0,
-                                                           self.main_window.top_widget.lower2_volume.param_number,
-                                                           2, 3, 0, 0)
-
-        except Exception as e:
-            self.show_error_msg(str(e))
-
-    def request_pan_values(self):
-        try:
-            self.midi_service.request_parameter_value_full(self.main_window.top_widget.upper1_pan.block0,
-                                                           self.main_window.top_widget.upper1_pan.param_number,
-                                                           2, 3, 0, 0)
-            self.midi_service.request_parameter_value_full(self.main_window.top_widget.upper2_pan.block0,
-                                                           self.main_window.top_widget.upper2_pan.param_number,
-                                                           2, 3, 0, 0)
-            self.midi_service.request_parameter_value_full(self.main_window.top_widget.lower1_pan.block0,
-                                                           self.main_window.top_widget.lower1_pan.param_number,
-                                                           2, 3, 0, 0)
-            self.midi_service.request_parameter_value_full(self.main_window.top_widget.lower2_pan.block0,
-                                                           self.main_window.top_widget.lower2_pan.param_number,
-                                                           2, 3, 0, 0)
-
-        except Exception as e:
-            self.show_error_msg(str(e))
+    def send_performance_param_change_sysex(self, parameter):
+        self.engine.send_performance_param_change_sysex(parameter)
 
     # Send message to update synth's DSP parameters
     def set_synth_dsp_params(self, _):
-        try:
-            dsp_page = self.main_window.central_widget.current_dsp_page
-            if dsp_page:
-                self.midi_service.send_dsp_params_change_sysex(dsp_page.block0, dsp_page.get_dsp_params_as_list())
-        except Exception as e:
-            self.show_error_msg(str(e))
+        dsp_page = self.main_window.central_widget.current_dsp_page
+        if dsp_page:
+            self.engine.send_dsp_params(dsp_page.block0)
 
     def send_dsp_bypass(self, block0, bypass):
-        try:
-            self.midi_service.send_dsp_bypass_sysex(block0, bypass)
-        except Exception as e:
-            self.show_error_msg(str(e))
+        self.engine.send_dsp_bypass(block0, bypass)
+
+    # On list widget changed: update tone dsp and send module change sysex
+    def update_dsp_module_from_list(self, block0, dsp_module_id):
+        self.engine.change_dsp_module(block0, dsp_module_id)
 
     # Send program change message
     def change_instrument_by_id_from_list(self, instrument_id):
-        instrument = Tone.get_instrument_by_id(instrument_id)
-        if instrument:
-            self.tone.name = instrument.name
-            self.tone.parent_tone = instrument
-            self.log(f"[INFO] Selected tone: {instrument_id} - {self.tone.parent_tone.name}")
-            try:
-                self.midi_service.send_change_tone_msg(instrument_id, 0)
-                self.name_color = BLUE_TEXT
-                self.synchronize_tone_signal.emit()
-            except Exception as e:
-                self.show_error_msg(str(e))
+        self.name_color = BLUE_TEXT
+        self.engine.change_instrument_by_id(instrument_id)
 
     # Select calibration tone
     def select_calibration_tone(self, instrument):
-        try:
-            self.midi_service.send_change_tone_msg_2(instrument.id)
-            self.name_color = BLUE_TEXT
-            self.tone.name = instrument.name
-            self.tone.parent_tone = None
-            self.synchronize_tone_signal.emit()
-        except Exception as e:
-            self.show_error_msg(str(e))
-
-    # Intercept instrument change messages from synth
-    def process_instrument_select_response(self, bank, program):
-        self.name_color = BLACK_TEXT
-        self.log("[INFO] Instrument: " + str(bank) + ", " + str(program))
-        self.find_instrument_and_update_tone(bank, program)
-        self.main_window.top_widget.update_tone_name_input_and_parent_info()
+        self.name_color = BLUE_TEXT
+        self.engine.select_calibration_tone(instrument)
 
-    def find_instrument_and_update_tone(self, bank, program):
-        is_found = False
-        for instrument in get_all_instruments():
-            if instrument.bank == bank and instrument.program == program:
-                is_found = True
-                self.tone.name = instrument.name
-                self.tone.parent_tone = instrument
-                self.main_window.central_widget.instrument_list.set_current_row_from_thread(
-                    self.tone.parent_tone.id - 1)
-                break
-        if not is_found:
-            self.tone.name = DEFAULT_TONE_NAME
-            self.tone.parent_tone = None
-            self.main_window.central_widget.instrument_list.clearSelection()
+    def process_tone_number_from_performance_params_response(self, tone_number, block0):
+        self.engine.process_tone_number_from_performance_params_response(tone_number, block0)
 
-    def countdown_and_autosynchronize(self, timeout):
-        try:
-            if self.timeout > 0:
-                # countdown timer exists: reset time and exit
-                self.timeout = timeout
-            else:
-                # start countdown
-                self.timeout = timeout
-                while self.timeout > 0:
-                    text = f"Auto-synchronize countdown: {self.timeout}"
-                    self.status_msg_signal.emit(text, 1000)
-                    self.timeout -= 1
-                    time.sleep(1)
-
-                self.synchronize_tone_signal.emit()
-        except Exception as e:
-            self.show_error_msg(str(e))
-
-    # Open midi ports
-    def open_midi_ports(self):
-        self.midi_service.open_midi_ports()
+    # Reopen midi ports (with the current MIDI settings)
+    def reopen_midi_ports(self):
+        self.engine.reopen_midi_ports()
 
     # Close midi ports
     def close_midi_ports(self):
-        self.midi_service.close_midi_ports()
+        self.engine.close_midi_ports()
 
     # Load Tone from JSON
     def load_tone_from_json(self, json_tone: dict):
@@ -436,7 +281,7 @@ class Core(QObject):
 
             if json_parent_bank is not None and json_parent_program is not None:
                 self.tone.parent_tone = None
-                self.find_instrument_and_update_tone(json_parent_bank, json_parent_program)
+                self.engine.find_instrument_and_update_tone(json_parent_bank, json_parent_program)
 
                 if self.tone.parent_tone is not None and self.tone.parent_tone.id is not None:
                     # Parent tone is found: automatically select instrument
@@ -512,54 +357,45 @@ class Core(QObject):
              dsp_module.name == json_dsp_module["name"]), None)
         if dsp_module:
             dsp_module_id = dsp_module.id
-            self.update_tone_dsp_module_and_refresh_gui(block0, dsp_module_id)
+            self.engine.update_tone_dsp_module(block0, dsp_module_id)
             try:
                 if dsp_module_id is None:
                     self.midi_service.send_dsp_bypass_sysex(block0, True)
-                    if self.main_window.central_widget.current_dsp_page:
-                        self.main_window.central_widget.current_dsp_page.redraw_dsp_params_panel_signal.emit()
+                    self.on_dsp_params_changed(block0)
                 else:
                     self.midi_service.send_dsp_bypass_sysex(block0, False)
                     self.midi_service.send_dsp_module_change_sysex(block0, dsp_module_id)
             except Exception as e:
                 self.show_error_msg(str(e))
 
-            dsp_module_attr, dsp_page_attr = constants.BLOCK_MAPPING[block0]
-            dsp_page = getattr(self.main_window.central_widget, dsp_page_attr)
-            dsp_page.dsp_module = getattr(self.tone, dsp_module_attr)
+            tone_dsp_module = getattr(self.tone, constants.BLOCK_MAPPING[block0][0])
 
-            if dsp_page.dsp_module and "bypass" in json_dsp_module:
-                dsp_page.dsp_module.bypass.value = json_dsp_module["bypass"]
+            if tone_dsp_module and "bypass" in json_dsp_module:
+                tone_dsp_module.bypass.value = json_dsp_module["bypass"]
 
-            if "parameters" in json_dsp_module:
+            if tone_dsp_module and "parameters" in json_dsp_module:
                 for json_dsp_parameter in json_dsp_module["parameters"]:
                     if "name" in json_dsp_parameter and "value" in json_dsp_parameter:
                         tone_dsp_parameter = next(
-                            (param for param in dsp_page.dsp_module.dsp_parameter_list if
+                            (param for param in tone_dsp_module.dsp_parameter_list if
                              param.name == json_dsp_parameter["name"]), None)
                         if tone_dsp_parameter:
                             tone_dsp_parameter.value = json_dsp_parameter["value"] - 1 if \
                                 tone_dsp_parameter.type == ParameterType.COMBO else json_dsp_parameter["value"]
 
                 time.sleep(0.3)
-                try:
-                    self.midi_service.send_dsp_params_change_sysex(block0,
-                                                                   dsp_page.get_dsp_params_as_list())
-                except Exception as e:
-                    self.show_error_msg(str(e))
-
-                if self.main_window.central_widget.current_dsp_page:
-                    self.main_window.central_widget.current_dsp_page.redraw_dsp_params_panel_signal.emit()
+                self.engine.send_dsp_params(block0)
+                self.on_dsp_params_changed(block0)
 
     def send_custom_midi_msg(self, midi_msg: str):
-        self.midi_service.send_custom_midi_msg(midi_msg)
+        self.engine.send_custom_midi_msg(midi_msg)
 
     def request_custom_parameter(self, number: int, block0: int, category: int, memory: int, parameter_set: int,
                                  size: int):
-        self.midi_service.request_parameter_value_full(block0, number, category, memory, parameter_set, size)
+        return self.engine.request_custom_parameter(number, block0, category, memory, parameter_set, size)
 
     def send_instrument_change_sysex(self, block0, tone_number):
-        self.midi_service.send_change_tone_msg(tone_number, block0)
+        self.engine.send_instrument_change_sysex(block0, tone_number)
 
     @Slot()
     def show_status_msg(self, text: str, msecs: int):
@@ -568,7 +404,10 @@ class Core(QObject):
             self.status_bar.showMessage(text, msecs)
 
     def show_error_msg(self, text: str):
-        self.log("[ERROR] " + text)
+        self.engine.show_error_msg(text)
+
+    @Slot(str)
+    def on_error(self, text: str):
         self.status_bar.setStyleSheet("background-color: white; color: red")
         self.status_bar.showMessage(text, 5000)
 
@@ -577,41 +416,31 @@ class Core(QObject):
     def pause_status_bar_updates(self, is_status_bar_update_on_pause: bool):
         self.is_status_bar_update_on_pause = is_status_bar_update_on_pause
 
-    def log(self, msg: str):
+    def log(self, msg):
         self.main_window.log_texbox.log(msg)
 
+    def start_worker(self, fn, *args, on_finished=None, on_result=None):
+        worker = Worker(fn, *args)
+        worker.signals.error.connect(lambda error: self.show_error_msg(str(error[1])))
+        if on_finished:
+            worker.signals.finished.connect(on_finished)
+        if on_result:
+            worker.signals.result.connect(on_result)
+        worker.start()
+
     def start_ton_file_save_worker(self, file_name):
         self.main_window.loading_animation.start()
         self.status_msg_signal.emit("Saving... Please wait!", 10000)
         self.log(f"[INFO] Saving tone file: {file_name}")
 
-        worker = Worker(self.get_current_tone_as_ton_file, self.tone.name)
-        worker.signals.error.connect(lambda error: self.show_error_msg(str(error[1])))
-        worker.signals.result.connect(lambda ton_file_data: self.save_file(file_name, ton_file_data))
-        worker.start()
-
-    def get_current_tone_as_ton_file(self, tone_name: str):
-        new_tone_name = tone_name[:8]  # trim to first 8 symbols
-        current_tone = self.tyrant_midi_service.read_current_tone(new_tone_name)
-        ton_file_data = self.tyrant_midi_service.wrap_tone_file(current_tone)
-
-        # Restore default MIDI-in callback after using tyrant_midi_service
-        self.close_midi_ports()
-        self.open_midi_ports()
-
-        return ton_file_data
+        self.start_worker(self.engine.get_current_tone_as_ton_file, self.tone.name,
+                          on_result=lambda ton_file_data: self.save_file(file_name, ton_file_data))
 
     def save_file(self, file_name, ton_file_data):
         FileOperations.save_binary_file(file_name, ton_file_data)
         self.status_msg_signal.emit("File successfully saved!", 3000)
         self.main_window.loading_animation.stop()
 
-    def save_file2(self, file_name, ton_file_data):
-        FileOperations.save_binary_file(file_name, ton_file_data)
-        self.status_msg_signal.emit("File successfully saved!", 3000)
-        self.main_window.user_tone_manager_window.populate_file_table()
-        self.main_window.user_tone_manager_window.loading_animation.stop()
-
     def start_tone_upload_worker(self, tone_number):
         if tone_number < 801 or tone_number > 900:
             raise Exception("The 'Tone Number' must be in the range of 801 to 900.")
@@ -620,25 +449,8 @@ class Core(QObject):
         self.status_msg_signal.emit("Saving... Please wait!", 10000)
         self.log(f"[INFO] Saving tone number: {tone_number}")
 
-        worker = Worker(self.upload_tone, tone_number, self.tone.name)
-        worker.signals.error.connect(lambda error: self.show_error_msg(str(error[1])))
-        worker.start()
-
-    # upload_tone: used in old separate rename-dialog
-    def upload_tone(self, tone_number, tone_name):
-        if not tone_name:
-            tone_name = DEFAULT_TONE_NAME
-
-        current_tone = self.tyrant_midi_service.read_current_tone(tone_name[:8])
-
-        self.tyrant_midi_service.bulk_upload(tone_number - USER_TONE_TABLE_ROW_OFFSET, current_tone, memory=1,
-                                             category=3)
-        self.close_midi_ports()
-        self.open_midi_ports()
-
-        # self.synchronize_tone_signal.emit()
-        self.status_msg_signal.emit("Tone successfully saved!", 3000)
-        self.main_window.loading_animation.stop()
+        self.start_worker(self.engine.upload_tone, tone_number, self.tone.name,
+                          on_finished=self.main_window.loading_animation.stop)
 
     # @Deprecated(used in old separate rename-dialog)
     def start_tone_rename_worker(self, tone_number, new_name):
@@ -649,50 +461,12 @@ class Core(QObject):
         self.status_msg_signal.emit("Renaming... Please wait!", 10000)
         self.log(f"[INFO] Renaming tone number: {tone_number}")
 
-        worker = Worker(self.rename_tone_from_main_menu, tone_number, new_name)
-        worker.signals.error.connect(lambda error: self.show_error_msg(str(error[1])))
-        worker.start()
-
-    # @Deprecated(used in old separate rename-dialog)
-    def rename_tone_from_main_menu(self, tone_number, new_name):
-        tone_data = self.tyrant_midi_service.bulk_download(tone_number - USER_TONE_TABLE_ROW_OFFSET, memory=1,
-                                                           category=3)
-
-        if new_name:
-            tone_data = bytearray(tone_data)  # Convert the tone data to a mutable bytearray
-            new_tone_name_bytes = new_name.encode('utf-8')
-            tone_data[0x1A6:0x1B6] = new_tone_name_bytes.ljust(16, b' ')
-            tone_data[0x1A6 + 8] = 0x00
-
-        self.tyrant_midi_service.bulk_upload(tone_number - USER_TONE_TABLE_ROW_OFFSET, tone_data, memory=1, category=3)
-        self.close_midi_ports()
-        self.open_midi_ports()
-
-        self.synchronize_tone_signal.emit()
-        self.status_msg_signal.emit("Tone successfully renamed!", 3000)
-        self.main_window.loading_animation.stop()
+        self.start_worker(self.engine.rename_tone_from_main_menu, tone_number, new_name,
+                          on_finished=self.main_window.loading_animation.stop)
 
     def rename_tone(self, tone_number, new_tone_name):
         """Tone manager: Rename tone"""
-        if tone_number < 801 or tone_number > 900:
-            raise Exception("The 'Tone Number' must be in the range of 801 to 900.")
-
-        self.log(f"[INFO] Renaming tone: {tone_number} - {new_tone_name}")
-        tone_data = self.tyrant_midi_service.bulk_download(tone_number - USER_TONE_TABLE_ROW_OFFSET, memory=1,
-                                                           category=3)
-
-        if new_tone_name:
-            tone_data = bytearray(tone_data)  # Convert the tone data to a mutable bytearray
-            new_tone_name_bytes = new_tone_name.encode('utf-8')[:8]  # trim to first 8 symbols and get bytes
-            tone_data[0x1A6:0x1B6] = new_tone_name_bytes.ljust(16, b' ')
-            tone_data[0x1A6 + 8] = 0x00
-
-        self.tyrant_midi_service.bulk_upload(tone_number - USER_TONE_TABLE_ROW_OFFSET, tone_data, memory=1, category=3)
-        self.close_midi_ports()
-        self.open_midi_ports()
-
-        self.main_window.user_tone_manager_window.load_memory_tone_names()  # reload list and stop loading animation
-        self.status_msg_signal.emit("Tone successfully renamed!", 3000)
+        self.engine.rename_tone(tone_number, new_tone_name)
 
     # @Deprecated (used in old separate delete-dialog)
     def start_tone_delete_worker(self, tone_number):
@@ -703,83 +477,26 @@ class Core(QObject):
         self.status_msg_signal.emit("Deleting... Please wait!", 10000)
         self.log(f"[INFO] Deleting tone number: {tone_number}")
 
-        worker = Worker(self.delete_tone, tone_number)
-        worker.signals.error.connect(lambda error: self.show_error_msg(str(error[1])))
-        worker.start()
-
-    # @Deprecated (used in old separate delete-dialog)
-    def delete_tone(self, tone_number):
-        self.tyrant_midi_service.bulk_upload(tone_number - USER_TONE_TABLE_ROW_OFFSET, EMPTY_TONE, memory=1, category=3)
-        self.close_midi_ports()
-        self.open_midi_ports()
+        self.start_worker(self.engine.delete_tone, tone_number, on_finished=self.main_window.loading_animation.stop)
 
-        self.synchronize_tone_signal.emit()
-        self.status_msg_signal.emit("Tone successfully deleted!", 3000)
-        self.main_window.loading_animation.stop()
-
-    def delete_next_tone(self, tone_number, tone_name):
-        """Tone manager: Delete tone"""
-        if tone_number < 801 or tone_number > 900:
-            raise Exception("The 'Tone Number' must be in the range of 801 to 900.")
-
-        self.log(f"[INFO] Deleting tone: {tone_number} - {tone_name}")
-        self.tyrant_midi_service.bulk_upload(tone_number - USER_TONE_TABLE_ROW_OFFSET, EMPTY_TONE, memory=1, category=3)
-        self.main_window.user_tone_manager_window.delete_next_tone()
+    def delete_tones(self, tones):
+        """Tone manager: Delete tones (list of tone number and name tuples) in one bulk session"""
+        self.engine.delete_tones(tones)
 
     def after_all_selected_tones_deleted(self):
-        self.close_midi_ports()
-        self.open_midi_ports()
-
         self.main_window.user_tone_manager_window.load_memory_tone_names()  # reload list and stop loading animation
         self.status_msg_signal.emit("Tone(s) successfully deleted!", 3000)
 
     def request_user_memory_tone_names(self):
-        for i in range(0, INTERNAL_MEMORY_USER_TONE_COUNT):
-            self.request_user_memory_tone_name(i)
+        self.engine.request_user_memory_tone_names()
 
-    def request_user_memory_tone_name(self, tone_number):
-        self.midi_service.request_parameter_value_full(0, 0, 3, 1, tone_number, 12)
-
-    def process_user_memory_tone_name_response(self, tone_number_response, tone_name_response):
-        tone_number = lsb_msb_to_int(tone_number_response[0], tone_number_response[1])
-        tone_name = ''.join(chr(i) for i in tone_name_response if chr(i).isprintable()).strip()
-        if self.main_window.user_tone_manager_window:
-            self.main_window.user_tone_manager_window.add_item(tone_number, tone_name)
-
-    def load_tone_data(self, tone_number):
-        if tone_number < 801 or tone_number > 900:
-            raise Exception("The 'Tone Number' must be in the range of 801 to 900.")
-
-        tone_data = self.tyrant_midi_service.bulk_download(tone_number - USER_TONE_TABLE_ROW_OFFSET, memory=1,
-                                                           category=3)
-        self.close_midi_ports()
-        self.open_midi_ports()
-
-        return tone_data
-
-    def save_tone_data(self, tone_number, tone_data):
-        if tone_number < 801 or tone_number > 900:
-            raise Exception("The 'Tone Number' must be in the range of 801 to 900.")
-
-        self.tyrant_midi_service.bulk_upload(tone_number - USER_TONE_TABLE_ROW_OFFSET, tone_data, memory=1, category=3)
-        self.close_midi_ports()
-        self.open_midi_ports()
+    def reorder_user_tones(self, layout: dict):
+        """Tone manager: Rearrange user tones (tone number -> tone number whose tone it should hold)"""
+        self.engine.reorder_user_tones(layout)
 
     def upload_current_tone(self, tone_number):
         """Tone manager: Save current tone"""
-        tone_name = self.tone.name
-        if not tone_name:
-            tone_name = DEFAULT_TONE_NAME
-
-        current_tone = self.tyrant_midi_service.read_current_tone(tone_name[:8])
-
-        self.tyrant_midi_service.bulk_upload(tone_number - USER_TONE_TABLE_ROW_OFFSET, current_tone, memory=1,
-                                             category=3)
-        self.close_midi_ports()
-        self.open_midi_ports()
-
-        self.main_window.user_tone_manager_window.load_memory_tone_names()  # reload list and stop loading animation
-        self.status_msg_signal.emit("Tone successfully saved!", 3000)
+        self.engine.upload_current_tone(tone_number)
 
     def on_randomize_tone_button_pressed(self):
         msg = "Setting random main parameters and selecting 1–2 random DSP modules"
@@ -830,23 +547,21 @@ class Core(QObject):
         self.pause_status_bar_updates(True)
 
         # Random DSP params
-        worker = Worker(self.randomize_dsp_params, random_dsp_1, random_dsp_2)
-        worker.signals.error.connect(lambda error: self.show_error_msg(str(error[1])))
-        worker.start()
-
-    def randomize_dsp_params(self, random_dsp_1, random_dsp_2):
-        if random_dsp_1 > 0:
-            time.sleep(0.3)
-            self.main_window.central_widget.dsp_page_1.on_random_button_pressed(
-                self.main_window.central_widget.dsp_page_1.block0)
+        dsp_pages = [(self.main_window.central_widget.dsp_page_1, random_dsp_1),
+                     (self.main_window.central_widget.dsp_page_2, random_dsp_2)]
+        self.randomize_dsp_params([dsp_page for dsp_page, random_dsp in dsp_pages if random_dsp > 0])
+
+    # Randomize the parameters of the DSP pages one after another, 0.3 s apart (in the GUI thread)
+    def randomize_dsp_params(self, dsp_pages: list):
+        if dsp_pages:
+            QTimer.singleShot(300, lambda: self._randomize_dsp_page(dsp_pages))
+        else:
+            self.pause_status_bar_updates(False)
+            self.main_window.loading_animation.stop()
 
-        if random_dsp_2 > 0:
-            time.sleep(0.3)
-            self.main_window.central_widget.dsp_page_2.on_random_button_pressed(
-                self.main_window.central_widget.dsp_page_2.block0)
-
-        self.pause_status_bar_updates(False)
-        self.main_window.loading_animation.stop()
+    def _randomize_dsp_page(self, dsp_pages: list):
+        dsp_pages[0].on_random_button_pressed(dsp_pages[0].block0)
+        self.randomize_dsp_params(dsp_pages[1:])
 
     def generate_random_name(self):
         self.tone.name = self.generate_random_word()
@@ -866,35 +581,34 @@ class Core(QObject):
 
         return first_char + second_char + third_char + middle_chars + last_char
 
-    def tone_manager_save_ton_file(self, file_name, tone_number):
+    def tone_manager_save_ton_files(self, files):
+        """Tone manager: Save tones to .ton files (list of file name and tone number tuples)"""
         self.status_msg_signal.emit("Saving... Please wait!", 10000)
-        self.log(f"[INFO] Saving tone file: {file_name}")
+        for file_name, _ in files:
+            self.log(f"[INFO] Saving tone file: {file_name}")
 
-        worker = Worker(self.tone_manager_save_ton_file_job, file_name, tone_number)
-        worker.signals.error.connect(lambda error: self.show_error_msg(str(error[1])))
-        worker.start()
+        self.start_worker(self.engine.save_ton_files, files, on_finished=self.after_ton_files_saved)
 
-    def tone_manager_save_ton_file_job(self, file_name, tone_number):
-        tone_data = self.load_tone_data(tone_number)
-        ton_file_data = self.tyrant_midi_service.wrap_tone_file(tone_data)
-        self.save_file2(file_name, ton_file_data)
+    def after_ton_files_saved(self):
+        self.main_window.user_tone_manager_window.populate_file_table()
+        self.main_window.user_tone_manager_window.loading_animation.stop()
 
-    def tone_manager_upload_ton_file(self, file_name, tone_number):
-        self.status_msg_signal.emit("Saving... Please wait!", 10000)
-        self.log(f"[INFO] Saving tone file: {file_name}")
+    def start_user_tones_backup_worker(self, file_name):
+        self.status_msg_signal.emit("Backing up user tones... Please wait!", 10000)
+        self.log(f"[INFO] Backing up user tones to: {file_name}")
 
-        worker = Worker(self.tone_manager_upload_ton_file_process, file_name, tone_number)
-        worker.signals.error.connect(lambda error: self.show_error_msg(str(error[1])))
-        worker.start()
+        self.start_worker(self.engine.backup_user_tones, file_name,
+                          on_finished=self.main_window.user_tone_manager_window.load_memory_tone_names)
+
+    def start_user_tones_restore_worker(self, file_name):
+        self.status_msg_signal.emit("Restoring user tones... Please wait!", 10000)
+        self.log(f"[INFO] Restoring user tones from: {file_name}")
+
+        self.start_worker(self.engine.restore_user_tones, file_name,
+                          on_finished=self.main_window.user_tone_manager_window.load_memory_tone_names)
+
+    def tone_manager_upload_ton_file(self, tone_number, wrapped_ton_file_data):
+        self.status_msg_signal.emit("Saving... Please wait!", 10000)
+        self.log(f"[INFO] Saving tone file to: {tone_number}")
 
-    def tone_manager_upload_ton_file_process(self, tone_number, wrapped_ton_file_data):
-        try:
-            unwrapped_ton_file_data = self.tyrant_midi_service.unwrap_tone_file(wrapped_ton_file_data)
-            self.tyrant_midi_service.bulk_upload(tone_number - USER_TONE_TABLE_ROW_OFFSET, unwrapped_ton_file_data,
-                                                 memory=1, category=3)
-        finally:
-            self.close_midi_ports()
-            self.open_midi_ports()
-
-            self.main_window.user_tone_manager_window.load_memory_tone_names()  # reload list and stop loading animation
-            self.status_msg_signal.emit("Tone successfully uploaded!", 3000)
+        self.start_worker(self.engine.upload_ton_file, tone_number, wrapped_ton_file_data)
@@ -0,0 +1,78 @@
+import threading
+import time
+from collections import deque
+
+
+class InboundMidiQueue:
+    """
+    Bounded ring buffer between the rtmidi callback and message processing.
+
+    The rtmidi callback thread only appends raw bytes and their arrival time ("push"); a consumer thread takes
+    them in batches and passes every message to "process_fn(message, received_at)". When the buffer is full, the oldest message is overwritten and
+    counted as dropped.
+    """
+
+    def __init__(self, process_fn, capacity: int, batch_size: int, error_fn=None, overflow_fn=None):
+        self.process_fn = process_fn
+        self.error_fn = error_fn
+        self.overflow_fn = overflow_fn  # called from the consumer thread with the number of newly dropped messages
+        self.capacity = max(1, capacity)
+        self.batch_size = max(1, batch_size)
+
+        self.dropped_count = 0
+        self.processed_count = 0
+        self.max_depth = 0  # high-water mark
+
+        self._condition = threading.Condition()
+        self._buffer = deque(maxlen=self.capacity)
+        self._reported_dropped_count = 0
+
+        self._thread = threading.Thread(target=self._run, name="MidiInbound", daemon=True)
+        self._thread.start()
+
+    def push(self, event, _=None):
+        """rtmidi callback: (message, deltatime) event and optional user data."""
+        message = bytes(event[0])
+        received_at = time.monotonic()
+        with self._condition:
+            if len(self._buffer) == self.capacity:
+                self.dropped_count += 1
+            self._buffer.append((message, received_at))
+            self.max_depth = max(self.max_depth, len(self._buffer))
+            self._condition.notify()
+
+    def depth(self) -> int:
+        with self._condition:
+            return len(self._buffer)
+
+    def stats(self) -> dict:
+        with self._condition:
+            return {"depth": len(self._buffer), "max_depth": self.max_depth, "capacity": self.capacity,
+                    "dropped": self.dropped_count, "processed": self.processed_count}
+
+    def _take_batch(self) -> list:
+        # Must be called with the lock held
+        count = min(self.batch_size, len(self._buffer))
+        return [self._buffer.popleft() for _ in range(count)]
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._buffer:
+                    self._condition.wait()
+                batch = self._take_batch()
+                newly_dropped = self.dropped_count - self._reported_dropped_count
+                self._reported_dropped_count = self.dropped_count
+
+            if newly_dropped and self.overflow_fn:
+                self.overflow_fn(newly_dropped)
+
+            for message, received_at in batch:
+                try:
+                    self.process_fn(message, received_at)
+                except Exception as e:
+                    if self.error_fn:
+                        self.error_fn(e)
+
+            with self._condition:
+                self.processed_count += len(batch)
@@ -0,0 +1,82 @@
+import threading
+from collections import deque
+
+# Histogram bucket upper bounds, milliseconds (the last bucket is unbounded)
+HISTOGRAM_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+class LatencyMonitor:
+    """
+    Rolling statistics of request/reply round trips.
+
+    Every completed request is split into phases, to tell where the time goes:
+        backlog: from the request submission until a slot in the request window was free;
+        queue: from then until it was written to the MIDI port (our own send path);
+        link: from the write until the reply arrived in the MIDI input callback (USB-MIDI link and keyboard);
+        processing: from the arrival until the reply was decoded and handled (our own receive path).
+    Timeouts and orphan replies (replies without a matching request) are counted separately.
+    """
+
+    PHASES = ("total", "backlog", "queue", "link", "processing")
+
+    def __init__(self, window_size: int = 1000):
+        self._lock = threading.Lock()
+        self._samples = {phase: deque(maxlen=window_size) for phase in self.PHASES}  # seconds
+        self.completed_count = 0
+        self.timeout_count = 0
+        self.orphan_count = 0
+
+    def record(self, total: float, backlog: float = None, queue: float = None, link: float = None,
+               processing: float = None):
+        with self._lock:
+            self.completed_count += 1
+            for phase, value in zip(self.PHASES, (total, backlog, queue, link, processing)):
+                if value is not None:
+                    self._samples[phase].append(max(0.0, value))
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeout_count += 1
+
+    def record_orphan(self):
+        with self._lock:
+            self.orphan_count += 1
+
+    def reset(self):
+        with self._lock:
+            for samples in self._samples.values():
+                samples.clear()
+            self.completed_count = self.timeout_count = self.orphan_count = 0
+
+    def snapshot(self) -> dict:
+        """
+        Counters, per-phase percentiles in milliseconds and the histogram of total round trip times,
+        over the rolling window of the latest samples.
+        """
+        with self._lock:
+            samples = {phase: sorted(values) for phase, values in self._samples.items()}
+            snapshot = {"completed": self.completed_count, "timeouts": self.timeout_count,
+                        "orphans": self.orphan_count}
+
+        for phase, values in samples.items():
+            snapshot[phase] = {"count": len(values),
+                               "p50": self._percentile_ms(values, 50),
+                               "p90": self._percentile_ms(values, 90),
+                               "p99": self._percentile_ms(values, 99),
+                               "max": values[-1] * 1000 if values else 0.0}
+
+        histogram = [0] * (len(HISTOGRAM_BUCKETS_MS) + 1)
+        for value in samples["total"]:
+            value_ms = value * 1000
+            index = next((i for i, bound in enumerate(HISTOGRAM_BUCKETS_MS) if value_ms <= bound),
+                         len(HISTOGRAM_BUCKETS_MS))
+            histogram[index] += 1
+        snapshot["histogram"] = {"buckets_ms": list(HISTOGRAM_BUCKETS_MS), "counts": histogram}
+        return snapshot
+
+    @staticmethod
+    def _percentile_ms(sorted_values: list, p: int) -> float:
+        if not sorted_values:
+            return 0.0
+        index = min(len(sorted_values) - 1, int(round((len(sorted_values) - 1) * p / 100)))
+        return sorted_values[index] * 1000
@@ -1,18 +1,26 @@
 import configparser
 import threading
-import time
 from collections import deque
+from contextlib import contextmanager
+from functools import partial
+from typing import NamedTuple, Callable
 
 import rtmidi
-from PySide2.QtCore import QReadWriteLock
 
 from constants import constants
-from constants.constants import DEFAULT_MIDI_IN_PORT, DEFAULT_MIDI_OUT_PORT, DEFAULT_MIDI_CHANNEL
-from constants.enums import SysexType, SysexId, Size
+from constants.constants import DEFAULT_MIDI_IN_PORT, DEFAULT_MIDI_OUT_PORT, DEFAULT_MIDI_CHANNEL, \
+    DEFAULT_REQUEST_WINDOW, DEFAULT_REQUEST_TIMEOUT, DEFAULT_REALTIME_RATE, DEFAULT_SYNC_RATE, DEFAULT_BULK_RATE, \
+    DEFAULT_INBOUND_QUEUE_SIZE, INBOUND_BATCH_SIZE, VIRTUAL_SYNTH_PORT_NAME, LATENCY_WINDOW_SIZE
+from constants.enums import SysexType, SysexId, Size, MidiLane, ParameterType
 from models.instrument import Instrument
-from utils.utils import int_to_hex, int_to_lsb_msb, format_as_nice_hex, list_to_hex_str, \
-    int_to_lsb_msb_8bit, size_to_lsb_msb, lsb_msb_to_int
-from utils.worker import Worker
+from services.inbound_queue import InboundMidiQueue
+from services.latency_monitor import LatencyMonitor
+from services.midi_writer import MidiWriter
+from services.request_engine import ParameterRequestEngine
+from services.sysex_stream_parser import SysexStreamParser
+from utils import sysex_builder
+from utils.sysex_builder import SysexLogEntry
+from utils.utils import lsb_msb_to_int
 
 # TODO: group all params into enums; use for different log highlighting colors
 SYSEX_FIRST_BYTE = 0xF0
@@ -31,6 +39,17 @@ BLOCK_0_INDEX = 16
 SYSEX_TYPE_INDEX = 18
 PARAM_SET_INDEX = 8
 
+VOLUME_PARAMETER = 234  # category 2, block0: 0-3 for UPPER 1, UPPER 2, LOWER 1, LOWER 2
+PAN_PARAMETER = 237  # category 2, block0: 0-3 for UPPER 1, UPPER 2, LOWER 1, LOWER 2
+TIMBRE_TYPE_PARAMS = ("Sound A Timbre Type", "Sound B Timbre Type")  # the synth stores the value doubled
+
+
+# Route of a memory 3 reply: the decoder extracts the value from the message, the handler receives it
+class ResponseRoute(NamedTuple):
+    title: str
+    decoder: Callable
+    handler: Callable
+
 
 class MidiService:
     __instance = None
@@ -50,43 +69,99 @@ class MidiService:
             raise Exception("This class is a singleton!")
         else:
             MidiService.__instance = self
-            self.core = parent
-            self.lock = QReadWriteLock()
+            self.engine = parent
+            self.lock = threading.RLock()  # port objects: held while writing, (re)opening and closing
             self.bank_select_msg_queue = deque()
-            self.active_sync_job_count = 0
 
             self.midi_in = None
             self.midi_out = None
             self.input_name = None
             self.output_name = None
             self.channel = None
-            self.short_params = [234, 237]  # volume, pan
-            self.long_params = []
-
-            for param in self.core.tone.main_parameter_list:
-                if param.name in constants.SHORT_PARAMS:
-                    self.short_params.append(param.param_number)
-                else:
-                    self.long_params.append(param.param_number)
-
-            for param in self.core.tone.advanced_parameter_list:
-                if param.name in constants.SHORT_PARAMS:
-                    self.short_params.append(param.param_number)
-                else:
-                    self.long_params.append(param.param_number)
-
+            self.virtual_synth = None  # emulator, created when selected as the MIDI port
+            self.message_handlers = ()  # attached protocol handlers, newest first (replaced, never mutated)
+            self.sysex_parser = SysexStreamParser()  # joins SysEx messages the MIDI driver delivers in parts
+            self._message_handlers_lock = threading.Lock()
+            self.short_params = {VOLUME_PARAMETER, PAN_PARAMETER}
+            self.response_routes = {}  # (category, sysex_type, block0) -> ResponseRoute
+
+            cfg = configparser.ConfigParser()
+            cfg.read(constants.CONFIG_FILENAME)
+            self.midi_writer = MidiWriter(
+                self._write_sysex,
+                error_fn=lambda e: self.engine.show_error_msg(str(e)),
+                lane_rates={
+                    MidiLane.REALTIME: cfg.getfloat("Midi", "RealtimeRate", fallback=DEFAULT_REALTIME_RATE),
+                    MidiLane.SYNC: cfg.getfloat("Midi", "SyncRate", fallback=DEFAULT_SYNC_RATE),
+                    MidiLane.BULK: cfg.getfloat("Midi", "BulkRate", fallback=DEFAULT_BULK_RATE)})
+            self.latency_monitor = LatencyMonitor(LATENCY_WINDOW_SIZE)
+            self.request_engine = ParameterRequestEngine(
+                lambda sysex: self.midi_writer.enqueue(sysex, MidiLane.SYNC, with_future=True),
+                window_size=cfg.getint("Midi", "RequestWindow", fallback=DEFAULT_REQUEST_WINDOW),
+                timeout=cfg.getfloat("Midi", "RequestTimeout", fallback=DEFAULT_REQUEST_TIMEOUT),
+                monitor=self.latency_monitor)
+            self.inbound_queue = InboundMidiQueue(
+                self._dispatch_message,
+                capacity=cfg.getint("Midi", "InboundQueueSize", fallback=DEFAULT_INBOUND_QUEUE_SIZE),
+                batch_size=INBOUND_BATCH_SIZE,
+                error_fn=lambda e: self.engine.show_error_msg(str(e)),
+                overflow_fn=lambda count: self.engine.log(
+                    f"[INFO] MIDI input overload: {count} message(s) dropped, {self.inbound_queue.dropped_count} in total"))
+
+            self._build_response_routes()
             self.open_midi_ports()
 
+    # Built once: every memory 3 reply is dispatched by a single dictionary lookup
+    def _build_response_routes(self):
+        for param in self.engine.tone.main_parameter_list + self.engine.tone.advanced_parameter_list:
+            if param.type == ParameterType.SPECIAL_ATK_REL_KNOB:
+                decoder = self._decode_8bit_value
+            elif param.name in TIMBRE_TYPE_PARAMS:
+                decoder = self._decode_timbre_type
+            elif param.name in constants.SHORT_PARAMS:
+                decoder = self._decode_short_value
+            else:
+                decoder = self._decode_value
+            if param.name in constants.SHORT_PARAMS:
+                self.short_params.add(param.param_number)
+            self.response_routes[(3, param.param_number, param.block0)] = ResponseRoute(
+                f"[MIDI IN] Parameter {param.param_number}", decoder,
+                partial(self.engine.process_parameter_response, param))
+
+        self.response_routes[(3, SysexType.TONE_NAME.value, 0)] = ResponseRoute(
+            "[MIDI IN] Tone Name", self._decode_tone_name, self.engine.process_tone_name_response)
+
+        for block0 in constants.BLOCK_MAPPING:
+            self.response_routes[(3, SysexType.DSP_MODULE.value, block0)] = ResponseRoute(
+                "[MIDI IN] DSP module", self._decode_dsp_module, partial(self.engine.process_dsp_module_response, block0))
+            self.response_routes[(3, SysexType.DSP_PARAMS.value, block0)] = ResponseRoute(
+                "[MIDI IN] DSP parameters", self._decode_dsp_params,
+                partial(self.engine.process_dsp_module_parameters_response, block0))
+            self.response_routes[(2, SysexType.TONE_NUMBER.value, block0)] = ResponseRoute(
+                f"[MIDI IN] Parameter {SysexType.TONE_NUMBER.value}", self._decode_tone_number,
+                partial(self.engine.process_tone_number_from_performance_params_response, block0=block0))
+            self.response_routes[(2, VOLUME_PARAMETER, block0)] = ResponseRoute(
+                f"[MIDI IN] Parameter {VOLUME_PARAMETER}", self._decode_short_value,
+                partial(self.engine.process_volume_response, block0))
+            self.response_routes[(2, PAN_PARAMETER, block0)] = ResponseRoute(
+                f"[MIDI IN] Parameter {PAN_PARAMETER}", self._decode_short_value,
+                partial(self.engine.process_pan_response, block0))
+
+    # Must be called with the lock held, or before the ports are in use
     def open_midi_ports(self):
-        self.midi_in = rtmidi.MidiIn()
-        self.midi_out = rtmidi.MidiOut()
-
         cfg = configparser.ConfigParser()
         cfg.read(constants.CONFIG_FILENAME)
         self.input_name = cfg.get("Midi", "InPort", fallback=DEFAULT_MIDI_IN_PORT)
         self.output_name = cfg.get("Midi", "OutPort", fallback=DEFAULT_MIDI_OUT_PORT)
         self.channel = DEFAULT_MIDI_CHANNEL
 
+        if VIRTUAL_SYNTH_PORT_NAME in (self.input_name, self.output_name):
+            self.input_name = self.output_name = VIRTUAL_SYNTH_PORT_NAME
+            self.midi_in, self.midi_out = self.get_virtual_synth(cfg).open_ports()
+        else:
+            self.midi_in = rtmidi.MidiIn()
+            self.midi_out = rtmidi.MidiOut()
+
         for i in range(self.midi_out.get_port_count()):
             if self.output_name == self.midi_out.get_port_name(i):
                 self.midi_out.open_port(port=i)
@@ -94,62 +169,115 @@ class MidiService:
             if self.input_name == self.midi_in.get_port_name(i):
                 self.midi_in.ignore_types(sysex=False, timing=True, active_sense=True)
                 self.midi_in.open_port(port=i)
-                self.midi_in.set_callback(self.process_message)
-
+                self.midi_in.set_callback(self.inbound_queue.push)  # the callback thread only queues raw bytes
+        self.engine.process_midi_ports_opened(self.input_name, self.output_name)
+
+    def get_virtual_synth(self, cfg: configparser.ConfigParser):
+        if self.virtual_synth is None:
+            from services.virtual_synth import VirtualSynth  # imports TyrantMidiService, which imports this module
+            self.virtual_synth = VirtualSynth(
+                latency=cfg.getfloat("Emulator", "Latency", fallback=0.0),
+                busy_probability=cfg.getfloat("Emulator", "BusyProbability", fallback=0.0),
+                loss_probability=cfg.getfloat("Emulator", "LossProbability", fallback=0.0),
+                not_ready_time=cfg.getfloat("Emulator", "NotReadyTime", fallback=0.0))
+        return self.virtual_synth
+
+    # Pending messages are written first; the ports are deleted only while no other thread is writing to them
     def close_midi_ports(self):
-        self.midi_in.close_port()
-        self.midi_out.close_port()
-        self.midi_in.delete()
-        self.midi_out.delete()
+        self.midi_writer.wait_until_empty(1.0)
+        with self.lock:
+            self._delete_midi_ports()
+
+    # Only needed when the MIDI settings have changed: the port pair is long-lived otherwise
+    def reopen_midi_ports(self):
+        self.midi_writer.wait_until_empty(1.0)
+        with self.lock:
+            self._delete_midi_ports()
+            self.open_midi_ports()
+
+    def _delete_midi_ports(self):
+        # Must be called with the lock held
+        if self.midi_in is not None:
+            self.midi_in.close_port()
+            self.midi_in.delete()
+        if self.midi_out is not None:
+            self.midi_out.close_port()
+            self.midi_out.delete()
+        self.midi_in = None
+        self.midi_out = None
+
+    def is_midi_port_open(self) -> bool:
+        return (self.midi_in is not None and self.midi_out is not None
+                and self.midi_in.is_port_open() and self.midi_out.is_port_open())
 
     def check_and_reopen_midi_ports(self):
-        if not self.midi_out.is_port_open() or not self.midi_in.is_port_open():
-            self.open_midi_ports()
-        if not self.midi_out.is_port_open() or not self.midi_in.is_port_open():
-            raise Exception("Unable to open MIDI port. Please check the MIDI settings.")
+        with self.lock:
+            if not self.is_midi_port_open():
+                self._delete_midi_ports()
+                self.open_midi_ports()
+            if not self.is_midi_port_open():
+                raise Exception("Unable to open MIDI port. Please check the MIDI settings.")
 
     def provide_midi_ports(self):
-        self.check_and_reopen_midi_ports()
-        return self.midi_in, self.midi_out
+        with self.lock:
+            self.check_and_reopen_midi_ports()
+            return self.midi_in, self.midi_out
 
-    def send_sysex(self, sysex_hex_str: str):
-        self.lock.lockForWrite()
-        try:
+    # Non-blocking: the message is written by the MIDI writer thread
+    def send_sysex(self, sysex: bytearray, lane: MidiLane = MidiLane.REALTIME, with_future: bool = False):
+        return self.midi_writer.enqueue(sysex, lane, with_future=with_future)
+
+    # Queues a parameter change: only the newest pending value per (category, parameter, block0) is sent
+    def send_coalesced_sysex(self, category: int, parameter: int, block0: int, sysex: bytearray):
+        self.midi_writer.enqueue(sysex, MidiLane.REALTIME, key=(category, parameter, block0))
+
+    # Raw packet without logging: used by the bulk transfer protocol
+    def send_packet(self, packet, lane: MidiLane = MidiLane.BULK, with_future: bool = False):
+        return self.midi_writer.enqueue(bytearray(packet), lane, with_future=with_future, write_fn=self._write_packet)
+
+    # Runs on the MIDI writer thread only
+    def _write_sysex(self, sysex: bytearray):
+        with self.lock:
             self.check_and_reopen_midi_ports()
-            self.core.log("[MIDI OUT]\n" + format_as_nice_hex(sysex_hex_str))
-            self.active_sync_job_count = self.active_sync_job_count + 1
-            self.midi_out.send_message(bytearray(bytes.fromhex(sysex_hex_str)))
-        except Exception as e:
-            self.core.show_error_msg(str(e))
-        finally:
-            self.lock.unlock()
-        time.sleep(0.01)
+            self.engine.log(SysexLogEntry("[MIDI OUT]", sysex))  # hex is formatted only when the log is displayed
+            self.midi_out.send_message(sysex)
+
+    # Runs on the MIDI writer thread only
+    def _write_packet(self, packet: bytearray):
+        with self.lock:
+            self.check_and_reopen_midi_ports()
+            self.midi_out.send_message(packet)
+
+    # Queues a request in the request engine; returned Future is resolved with the reply message
+    def send_request_sysex(self, key: tuple, sysex: bytearray):
+        future = self.request_engine.submit(key, sysex)
+        future.add_done_callback(self._on_request_done)
+        return future
+
+    def _on_request_done(self, future):
+        e = future.exception()
+        if e is None:
+            return
+        if isinstance(e, ParameterRequestEngine.RequestTimeoutError):
+            self.engine.log("[INFO] " + str(e))
+        else:
+            self.engine.show_error_msg(str(e))
 
     def send_custom_midi_msg(self, msg_str: str):
-        self.lock.lockForWrite()
         try:
-            self.check_and_reopen_midi_ports()
-            msg_hex: str = format_as_nice_hex(msg_str)
-            line_break = "\n" if msg_hex is not None and msg_hex.startswith("F0") else ""
-            self.core.log("[MIDI OUT]" + line_break + msg_hex)
-            self.active_sync_job_count = self.active_sync_job_count + 1
-            self.midi_out.send_message(bytearray(bytes.fromhex(msg_str)))
+            self.send_sysex(bytearray(bytes.fromhex(msg_str)))
         except Exception as e:
-            self.core.show_error_msg(str(e))
-        finally:
-            self.lock.unlock()
-        time.sleep(0.01)
+            self.engine.show_error_msg(str(e))
 
     def request_tone_name(self):
-        size = size_to_lsb_msb(Size.TONE_NAME)
-        msg = "F0 44 19 01 7F 00 03 03 00 00 00 00 00 00 00 00 00 00 00 00 00 00" + size + "F7"
-        self.send_sysex(msg)
+        msg = sysex_builder.build_parameter_request(0, SysexType.TONE_NAME.value, size=Size.TONE_NAME - 1)
+        key = ParameterRequestEngine.make_key(3, MEMORY_3, 0, 0, SysexType.TONE_NAME.value)
+        return self.send_request_sysex(key, msg)
 
     def request_parameter_value(self, block0: int, parameter: int):
-        msg = "F0 44 19 01 7F 00 03 03 00 00 00 00 00 00 00 00" \
-              + int_to_lsb_msb(block0) + int_to_lsb_msb(parameter) + "00 00 00 00 F7"
-        self.send_sysex(msg)
-        # time.sleep(0.1)
+        msg = sysex_builder.build_parameter_request(block0, parameter)
+        key = ParameterRequestEngine.make_key(3, MEMORY_3, 0, block0, parameter)
+        return self.send_request_sysex(key, msg)
 
     def request_parameter_value_full(self,
                                      block0: int,
@@ -158,10 +286,9 @@ class MidiService:
                                      memory: int,
                                      parameter_set: int,
                                      size: int):
-        msg = "F0 44 19 01 7F 00" + int_to_hex(category) + int_to_hex(memory) \
-              + int_to_lsb_msb(parameter_set) + "00 00 00 00 00 00" + int_to_lsb_msb(block0) \
-              + int_to_lsb_msb(parameter) + "00 00" + int_to_lsb_msb(size) + "F7"
-        self.send_sysex(msg)
+        msg = sysex_builder.build_parameter_request(block0, parameter, category, memory, parameter_set, size)
+        key = ParameterRequestEngine.make_key(category, memory, parameter_set, block0, parameter)
+        return self.send_request_sysex(key, msg)
 
     def send_parameter_value_full(self,
                                   block0: int,
@@ -171,38 +298,64 @@ class MidiService:
                                   parameter_set: int,
                                   value: int,
                                   size: int):
-        msg_value = int_to_hex(value) if param_number in self.short_params else int_to_lsb_msb(value)
-        msg = "F0 44 19 01 7F 01" + int_to_hex(category) + int_to_hex(memory) \
-              + int_to_lsb_msb(parameter_set) + "00 00 00 00 00 00" + int_to_lsb_msb(block0) \
-              + int_to_lsb_msb(param_number) + "00 00" + int_to_lsb_msb(size) + msg_value + "F7"
+        if param_number in self.short_params:
+            msg = sysex_builder.build_parameter_set_short(block0, param_number, value, category, memory,
+                                                          parameter_set, size)
+        else:
+            msg = sysex_builder.build_parameter_set(block0, param_number, value, category, memory, parameter_set,
+                                                    size)
         if self.IS_DEBUG_MODE:
-            print(">> " + format_as_nice_hex(msg))
-        self.send_sysex(msg)
+            print(">> " + msg.hex(" ").upper())
+        self.send_coalesced_sysex(category, param_number, block0, msg)
 
     def request_dsp_module(self, block0: int):
-        msg_start = "F0 44 19 01 7F 00 03 03 00 00 00 00 00 00 00 00"
-        msg_block0 = int_to_lsb_msb(block0)
-        msg_end = "55 00 00 00 00 00 F7"
-        self.send_sysex(msg_start + msg_block0 + msg_end)
+        msg = sysex_builder.build_parameter_request(block0, SysexType.DSP_MODULE.value)
+        key = ParameterRequestEngine.make_key(3, MEMORY_3, 0, block0, SysexType.DSP_MODULE.value)
+        return self.send_request_sysex(key, msg)
 
     def request_dsp_params(self, block0: int):
-        size = size_to_lsb_msb(Size.DSP_PARAMS)
-        msg_start = "F0 44 19 01 7F 00 03 03 00 00 00 00 00 00 00 00"
-        msg_block0 = int_to_lsb_msb(block0)
-        msg_end = "57 00 00 00" + size + "F7"
-        self.send_sysex(msg_start + msg_block0 + msg_end)
-
-    def process_message(self, message, _):
-        message, deltatime = message
-
-        self.lock.lockForWrite()
+        msg = sysex_builder.build_parameter_request(block0, SysexType.DSP_PARAMS.value, size=Size.DSP_PARAMS - 1)
+        key = ParameterRequestEngine.make_key(3, MEMORY_3, 0, block0, SysexType.DSP_PARAMS.value)
+        return self.send_request_sysex(key, msg)
+
+    # Protocol handlers (e.g. bulk transfers) receive messages before the default processing, on the same ports.
+    # A handler returns True if it has consumed the message.
+    def attach_message_handler(self, handler):
+        with self._message_handlers_lock:
+            self.message_handlers = (handler,) + self.message_handlers
+
+    def detach_message_handler(self, handler):
+        with self._message_handlers_lock:
+            self.message_handlers = tuple(h for h in self.message_handlers if h != handler)
+
+    @contextmanager
+    def attached_message_handler(self, handler):
+        self.attach_message_handler(handler)
         try:
-            self.active_sync_job_count = max(0, self.active_sync_job_count - 1)  # count-- until 0
+            yield
         finally:
-            self.lock.unlock()
+            self.detach_message_handler(handler)
+
+    # SysEx packets are passed to the handlers as memoryview slices of the received data, and copied to bytes
+    # only for the default processing
+    def _dispatch_message(self, message: bytes, received_at: float):
+        if message[0] == SYSEX_FIRST_BYTE or (message[0] < 0x80 and self.sysex_parser.in_packet):
+            for packet in self.sysex_parser.feed(message):
+                self._dispatch_packet(packet, received_at)
+        else:
+            self.sysex_parser.reset()  # a channel message cannot continue a SysEx message
+            self._dispatch_packet(message, received_at)
 
+    def _dispatch_packet(self, packet, received_at: float):
+        for handler in self.message_handlers:
+            if handler(packet, received_at):
+                return
+        self.process_message(bytes(packet), received_at)
+
+    # Runs on the inbound queue consumer thread; "received_at" is the arrival time in the MIDI input callback
+    def process_message(self, message: bytes, received_at: float = None):
         if self.IS_DEBUG_MODE:
-            print(format_as_nice_hex(list_to_hex_str(message)))
+            print(bytes(message).hex(" ").upper())
 
         if message[0] == SYSEX_FIRST_BYTE and message[1] == SysexId.CASIO and len(message) > (SYSEX_TYPE_INDEX + 1):
             block0 = lsb_msb_to_int(message[BLOCK_0_INDEX], message[BLOCK_0_INDEX + 1])
@@ -215,12 +368,16 @@ class MidiService:
                 self._process_memory_3_message(sysex_type, block0, param_set, message)
             else:
                 self.log("[MIDI IN] SysEx", message)
+
+            # Resolve the matching request only after the reply has been processed
+            self.request_engine.resolve(
+                ParameterRequestEngine.make_key(message[6], message[7], param_set, block0, sysex_type), message,
+                received_at)
         elif message[0] == SYSEX_FIRST_BYTE and message[1] == SysexId.REAL_TIME:
             self.log("[MIDI IN] Real Time SysEx", message)
         elif message[0] == CC_FIRST_BYTE and message[1] == CC_BANK_SELECT_MSB:
             self.log("[MIDI IN] Bank change MSB ", message)
             self.bank_select_msg_queue.append(message)
-            time.sleep(0.01)
         elif message[0] == CC_FIRST_BYTE and message[1] == CC_BANK_SELECT_LSB:
             self.log("[MIDI IN] Bank change LSB ", message)
         # elif message[0] == CC_FIRST_BYTE:
@@ -229,16 +386,14 @@ class MidiService:
             self.log("[MIDI IN] Program change ", message)
             bank_select_msg = self.get_last_bank_select_message()
             if bank_select_msg is not None:
-                self.core.process_instrument_select_response(bank_select_msg[2], message[1])
+                self.engine.process_instrument_select_response(bank_select_msg[2], message[1])
 
-                worker = Worker(self.core.countdown_and_autosynchronize, 2)
-                worker.signals.error.connect(lambda error: self.core.show_error_msg(str(error[1])))
-                worker.start()
+                self.engine.start_thread(self.engine.countdown_and_autosynchronize, 2)
         elif message[0] in [INSTRUMENT_SELECT_FIRST_BYTE_CH1, INSTRUMENT_SELECT_FIRST_BYTE_CH2, INSTRUMENT_SELECT_FIRST_BYTE_CH3]:
             self.log("[MIDI IN] Upper/Lower program change ", message)
-            self.core.request_custom_parameter(SysexType.TONE_NUMBER.value, 1, 2, 3, 0, 0)
-            self.core.request_custom_parameter(SysexType.TONE_NUMBER.value, 2, 2, 3, 0, 0)
-            self.core.request_custom_parameter(SysexType.TONE_NUMBER.value, 3, 2, 3, 0, 0)
+            self.engine.request_custom_parameter(SysexType.TONE_NUMBER.value, 1, 2, 3, 0, 0)
+            self.engine.request_custom_parameter(SysexType.TONE_NUMBER.value, 2, 2, 3, 0, 0)
+            self.engine.request_custom_parameter(SysexType.TONE_NUMBER.value, 3, 2, 3, 0, 0)
         else:
             self.log("[MIDI IN] ", message)
 
@@ -247,50 +402,59 @@ class MidiService:
             self.log("[MIDI IN] Tone Name (Memory 1)", message)
             tone_number_response = message[8:10]  # "parameter set" value
             tone_name_response = message[-1 - Size.TONE_NAME:-1]
-            self.core.process_user_memory_tone_name_response(tone_number_response, tone_name_response)
+            self.engine.process_user_memory_tone_name_response(tone_number_response, tone_name_response)
         else:
             self.log("[MIDI IN] SysEx (Memory 1)", message)
 
     def _process_memory_3_message(self, sysex_type, block0, param_set, message):
-        if sysex_type == SysexType.TONE_NAME.value:
-            self.log("[MIDI IN] Tone Name", message)
-            response = message[-1 - Size.TONE_NAME:-1]
-            self.core.process_tone_name_response(response)
-        elif sysex_type in self.long_params:
-            self.log(f"[MIDI IN] Parameter {sysex_type}", message)
-            response = message[-1 - Size.MAIN_PARAMETER:-1]
-            self.core.process_parameter_response(sysex_type, block0, param_set, response)  # 2 bytes
-        elif sysex_type in self.short_params:
-            self.log(f"[MIDI IN] Parameter {sysex_type}", message)
-            response = message[-1 - Size.MAIN_PARAMETER_SHORT:-1]
-            self.core.process_parameter_response(sysex_type, block0, param_set, response[:1])  # 1 byte
-        elif sysex_type == SysexType.DSP_MODULE.value:
-            self.log("[MIDI IN] DSP module", message)
-            response = message[-1 - Size.DSP_MODULE:-1]
-            self.core.process_dsp_module_response(block0, response[0])
-        elif sysex_type == SysexType.DSP_PARAMS.value:
-            self.log("[MIDI IN] DSP parameters", message)
-            response = message[-1 - Size.DSP_PARAMS:-1]
-            self.core.process_dsp_module_parameters_response(block0, response)
-        elif sysex_type == SysexType.TONE_NUMBER.value:
-            self.log(f"[MIDI IN] Parameter {sysex_type}", message)
-            tone_number = 0
-            response = message[-1 - Size.MAIN_PARAMETER:-1]
-            tone_tumber_response = lsb_msb_to_int(response[0], response[1])
-
-            if tone_tumber_response in range(0, 800):
-                tone_number = tone_tumber_response + 1
-            elif tone_tumber_response in range(820, 920):
-                tone_number = tone_tumber_response - 19
-
-            self.core.process_tone_number_from_performance_params_response(tone_number, block0)
-        else:
+        route = self.response_routes.get((message[6], sysex_type, block0))
+        if route is None:
             self.log("[MIDI IN] SysEx", message)
+            return
+        self.log(route.title, message)
+        route.handler(route.decoder(message))
+
+    @staticmethod
+    def _decode_value(message) -> int:
+        return lsb_msb_to_int(message[-1 - Size.MAIN_PARAMETER], message[-Size.MAIN_PARAMETER])
+
+    @staticmethod
+    def _decode_short_value(message) -> int:
+        return message[-1 - Size.MAIN_PARAMETER_SHORT]
+
+    # 8-bit LSB + 8-bit MSB: attack/release time
+    @staticmethod
+    def _decode_8bit_value(message) -> int:
+        return message[-1 - Size.MAIN_PARAMETER] + 256 * message[-Size.MAIN_PARAMETER]
+
+    @staticmethod
+    def _decode_timbre_type(message) -> int:
+        return message[-1 - Size.MAIN_PARAMETER_SHORT] // 2
+
+    @staticmethod
+    def _decode_tone_name(message):
+        return message[-1 - Size.TONE_NAME:-1]
+
+    @staticmethod
+    def _decode_dsp_module(message) -> int:
+        return message[-1 - Size.DSP_MODULE]
+
+    @staticmethod
+    def _decode_dsp_params(message):
+        return message[-1 - Size.DSP_PARAMS:-1]
+
+    # Performance parameter 228: internal number to tone number, 0 if unknown
+    @staticmethod
+    def _decode_tone_number(message) -> int:
+        internal_number = lsb_msb_to_int(message[-1 - Size.MAIN_PARAMETER], message[-Size.MAIN_PARAMETER])
+        if internal_number in range(0, 800):
+            return internal_number + 1
+        elif internal_number in range(820, 920):
+            return internal_number - 19
+        return 0
 
     def log(self, title, message):
-        msg_hex: str = format_as_nice_hex(list_to_hex_str(message))
-        line_break = "\n" if msg_hex is not None and msg_hex.startswith("F0") else ""
-        self.core.log(title + line_break + msg_hex)
+        self.engine.log(SysexLogEntry(title, message))
 
     def get_last_bank_select_message(self):
         last_message = None
@@ -314,86 +478,47 @@ class MidiService:
         self.send_parameter_change_short_sysex(block0, SysexType.DSP_BYPASS.value, value)
 
     def send_dsp_params_change_sysex(self, block0: int, params_list: list):
-        # Array size is always 14 bytes: length is "0D" TODO: use size
-        msg_start = "F0 44 19 01 7F 01 03 03 00 00 00 00 00 00 00 00"
-        msg_block0_param_and_size = int_to_lsb_msb(block0) + "57 00 00 00 0D 00"
-        msg_params = list_to_hex_str(params_list)
-        msg_end = "F7"
-        self.send_sysex(msg_start + msg_block0_param_and_size + msg_params + msg_end)
+        # The whole 14-byte DSP block is coalesced as one value
+        self.send_coalesced_sysex(3, SysexType.DSP_PARAMS.value, block0,
+                                  sysex_builder.build_dsp_params_set(block0, params_list))
 
     def send_parameter_change_sysex(self, block0: int, parameter: int, value: int):
         sysex = self.make_sysex(block0, parameter, value)
-        self.send_sysex(sysex)
+        self.send_coalesced_sysex(3, parameter, block0, sysex)
 
     def send_parameter_change_short_sysex(self, block0: int, parameter: int, value: int):
         sysex = self.make_sysex_short_value(block0, parameter, value)
-        self.send_sysex(sysex)
-
-    # # Same as send_parameter_change_short_sysex, but with parameter_set
-    # def send_parameter_change_short_sysex_2(self, block0: int, parameter: int, parameter_set: int, value: int):
-    #     sysex = self.make_sysex_short_value_2(block0, parameter, parameter_set, value)
-    #     self.send_sysex(sysex)
+        self.send_coalesced_sysex(3, parameter, block0, sysex)
 
     def send_atk_rel_parameter_change_sysex(self, block0: int, parameter: int, value: int):
         sysex = self.make_sysex_8bit_value(block0, parameter, value)
-        self.send_sysex(sysex)
+        self.send_coalesced_sysex(3, parameter, block0, sysex)
 
     def send_change_tone_msg(self, tone_number, block0):
         internal_number = tone_number - 1
         if tone_number > 800:
             internal_number = tone_number + 19
-        msg = "F0 44 19 01 7F 01 02 03 00 00 00 00 00 00 00 00 " + int_to_lsb_msb(block0) + " 64 01 00 00 00 00" \
-              + int_to_lsb_msb(internal_number) + "F7"
-        self.send_sysex(msg)
+        self.send_sysex(sysex_builder.build_tone_change(block0, internal_number))
 
     # for calibration tones
     def send_change_tone_msg_2(self, tone_number):
-        msg = "F0 44 19 01 7F 01 02 03 00 00 00 00 00 00 00 00 00 00 64 01 00 00 00 00" \
-              + int_to_lsb_msb(tone_number) + "F7"
-        self.send_sysex(msg)
+        self.send_sysex(sysex_builder.build_tone_change(0, tone_number))
 
     def send_change_tone_cc_msg(self, instrument: Instrument):
-        self.midi_out.send_message([CC_FIRST_BYTE, CC_BANK_SELECT_MSB, instrument.bank])
-        time.sleep(0.01)
-        self.midi_out.send_message([CC_FIRST_BYTE, CC_BANK_SELECT_LSB, 0x00])
-        time.sleep(0.01)
-        self.midi_out.send_message([INSTRUMENT_SELECT_FIRST_BYTE_CH0, instrument.program])
+        self.send_sysex(bytearray([CC_FIRST_BYTE, CC_BANK_SELECT_MSB, instrument.bank]))
+        self.send_sysex(bytearray([CC_FIRST_BYTE, CC_BANK_SELECT_LSB, 0x00]))
+        self.send_sysex(bytearray([INSTRUMENT_SELECT_FIRST_BYTE_CH0, instrument.program]))
 
     @staticmethod
-    def make_sysex(block0: int, parameter: int, value: int) -> str:
-        return "F0 44 19 01 7F 01 03 03 00 00 00 00 00 00 00 00" \
-            + int_to_lsb_msb(block0) \
-            + int_to_lsb_msb(parameter) \
-            + "00 00 00 00" \
-            + int_to_lsb_msb(value) \
-            + "F7"
+    def make_sysex(block0: int, parameter: int, value: int) -> bytearray:
+        return sysex_builder.build_parameter_set(block0, parameter, value)
 
     # Special case for "SHORT_PARAMS" list parameters
     @staticmethod
-    def make_sysex_short_value(block0: int, parameter: int, value: int) -> str:
-        return "F0 44 19 01 7F 01 03 03 00 00 00 00 00 00 00 00" \
-            + int_to_lsb_msb(block0) \
-            + int_to_lsb_msb(parameter) \
-            + "00 00 00 00" \
-            + int_to_hex(value) \
-            + "F7"
-
-    # # Same as make_sysex_short_value, but with parameter_set
-    # @staticmethod
-    # def make_sysex_short_value_2(block0: int, parameter: int, parameter_set: int, value: int) -> str:
-    #     return "F0 44 19 01 7F 01 03 03 " + int_to_lsb_msb(parameter_set) + " 00 00 00 00 00 00" \
-    #         + int_to_lsb_msb(block0) \
-    #         + int_to_lsb_msb(parameter) \
-    #         + "00 00 00 00" \
-    #         + int_to_hex(value) \
-    #         + "F7"
+    def make_sysex_short_value(block0: int, parameter: int, value: int) -> bytearray:
+        return sysex_builder.build_parameter_set_short(block0, parameter, value)
 
     # Special case for "Attack time" and "Release time" parameters
     @staticmethod
-    def make_sysex_8bit_value(block0: int, parameter: int, value: int) -> str:
-        return "F0 44 19 01 7F 01 03 03 00 00 00 00 00 00 00 00" \
-            + int_to_lsb_msb(block0) \
-            + int_to_lsb_msb(parameter) \
-            + "00 00 00 00" \
-            + int_to_lsb_msb_8bit(value) \
-            + "F7"
+    def make_sysex_8bit_value(block0: int, parameter: int, value: int) -> bytearray:
+        return sysex_builder.build_parameter_set(block0, parameter, value, is_8bit=True)
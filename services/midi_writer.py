@@ -0,0 +1,119 @@
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from constants.enums import MidiLane
+
+
+class MidiWriter:
+    """
+    Single MIDI writer thread fed by a priority queue.
+
+    Every lane (realtime edits, sync requests, bulk transfers) is a FIFO with its own rate limit; the writer
+    always sends from the highest priority lane that is allowed to send. Messages enqueued with a key are
+    coalesced: only the newest pending message per key is kept (latest value wins), so a fast knob drag
+    cannot pile up stale messages.
+    """
+
+    def __init__(self, write_fn, error_fn=None, lane_rates: dict = None):
+        self.write_fn = write_fn
+        self.error_fn = error_fn
+        lane_rates = lane_rates or {}
+        self.min_intervals = {lane: (1.0 / lane_rates[lane] if lane_rates.get(lane, 0) > 0 else 0.0)
+                              for lane in MidiLane}
+        self.coalesced_count = 0  # messages replaced by a newer value before they were written
+
+        self._condition = threading.Condition()
+        self._lanes = {lane: OrderedDict() for lane in MidiLane}  # key -> (message, write_fn, future)
+        self._last_written = {lane: 0.0 for lane in MidiLane}
+        self._sequence = itertools.count()
+        self._is_writing = False
+
+        self._thread = threading.Thread(target=self._run, name="MidiWriter", daemon=True)
+        self._thread.start()
+
+    def enqueue(self, message, lane: MidiLane = MidiLane.REALTIME, key=None, with_future: bool = False,
+                write_fn=None):
+        """
+        Non-blocking enqueue.
+
+        Args:
+            key: Coalescing key; a pending message with the same key in the same lane is replaced.
+            with_future: Return a Future, resolved with True when written, or with False when superseded.
+            write_fn: Overrides the default write function for this message.
+        """
+        future = Future() if with_future else None
+        superseded = None
+        with self._condition:
+            queue = self._lanes[lane]
+            if key is None:
+                key = (None, next(self._sequence))  # unique: never coalesced
+            else:
+                superseded = queue.pop(key, None)
+                if superseded is not None:
+                    self.coalesced_count += 1
+            queue[key] = (message, write_fn or self.write_fn, future)  # at the end: order of the latest updates
+            self._condition.notify_all()
+
+        if superseded is not None and superseded[2] is not None:
+            superseded[2].set_result(False)
+        return future
+
+    def pending_count(self, lane: MidiLane = None) -> int:
+        with self._condition:
+            lanes = [lane] if lane is not None else list(MidiLane)
+            return sum(len(self._lanes[lane]) for lane in lanes)
+
+    def wait_until_empty(self, timeout: float) -> bool:
+        """Block until every pending message has been written. Returns False on timeout."""
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while self._is_writing or any(self._lanes.values()):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    def _take_next(self):
+        # Must be called with the lock held. Returns (lane, item) or (None, seconds to wait)
+        now = time.monotonic()
+        wait_time = None
+        for lane in MidiLane:  # in priority order
+            queue = self._lanes[lane]
+            if not queue:
+                continue
+            ready_at = self._last_written[lane] + self.min_intervals[lane]
+            if ready_at <= now:
+                _, item = queue.popitem(last=False)
+                return lane, item
+            wait_time = ready_at - now if wait_time is None else min(wait_time, ready_at - now)
+        return None, wait_time
+
+    def _run(self):
+        while True:
+            with self._condition:
+                lane, item = self._take_next()
+                while lane is None:
+                    self._condition.wait(item)
+                    lane, item = self._take_next()
+                self._is_writing = True
+
+            message, write_fn, future = item
+            try:
+                if future is None or future.set_running_or_notify_cancel():
+                    write_fn(message)
+                    if future is not None:
+                        future.set_result(True)
+            except Exception as e:
+                if future is not None:
+                    future.set_exception(e)
+                elif self.error_fn:
+                    self.error_fn(e)
+            finally:
+                with self._condition:
+                    self._last_written[lane] = time.monotonic()
+                    self._is_writing = False
+                    self._condition.notify_all()
@@ -0,0 +1,225 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+from constants.constants import DEFAULT_REQUEST_WINDOW, DEFAULT_REQUEST_TIMEOUT
+
+
+class _Request:
+    __slots__ = ("key", "message", "future", "submitted_at", "sent_at", "written_at")
+
+    def __init__(self, key: tuple, message, future: Future):
+        self.key = key
+        self.message = message
+        self.future = future
+        self.submitted_at = time.monotonic()
+        self.sent_at = None  # handed to send_fn
+        self.written_at = None  # written to the MIDI port, if send_fn returns a Future
+
+
+class ParameterRequestEngine:
+    """
+    Pipelined parameter requests.
+
+    Keeps up to "window_size" requests in flight; the rest wait in a backlog and are sent as soon as
+    a reply frees a slot. Every reply is matched to its request by the key
+    (category, memory, parameter_set, block0, parameter), and every request is represented by a Future
+    that receives the raw reply message (or a RequestTimeoutError).
+
+    If a LatencyMonitor is given, round trip times, timeouts and orphan replies are recorded. When send_fn
+    returns a Future, which is resolved once the message is written, the time spent in our own send queue
+    is measured separately from the time spent on the MIDI link.
+
+    Overdue requests are failed by an expiry thread, so lost replies never hold window slots, even if nobody
+    waits for them. A request is completed only by the thread that has taken it out of the in-flight set
+    (reply, expiry or write error), so its Future is resolved exactly once.
+    """
+
+    class RequestTimeoutError(Exception):
+        pass
+
+    def __init__(self, send_fn, window_size: int = DEFAULT_REQUEST_WINDOW, timeout: float = DEFAULT_REQUEST_TIMEOUT,
+                 monitor=None):
+        self.send_fn = send_fn
+        self.window_size = max(1, window_size)
+        self.timeout = timeout
+        self.monitor = monitor
+
+        self._condition = threading.Condition()
+        self._backlog = deque()  # requests not sent yet
+        self._in_flight = {}  # key -> deque of requests
+        self._in_flight_count = 0
+
+        self._expiry_thread = threading.Thread(target=self._expire_overdue, name="RequestExpiry", daemon=True)
+        self._expiry_thread.start()
+
+    @staticmethod
+    def make_key(category: int, memory: int, parameter_set: int, block0: int, parameter: int) -> tuple:
+        return category, memory, parameter_set, block0, parameter
+
+    def submit(self, key: tuple, message) -> Future:
+        """Queue a request and return a Future, which is resolved with the matching reply."""
+        future = Future()
+        with self._condition:
+            expired = self._take_expired()
+            self._backlog.append(_Request(key, message, future))
+            sendable = self._take_sendable()
+        self._fail_expired(expired)
+        self._send_all(sendable)
+        return future
+
+    def resolve(self, key: tuple, message, received_at: float = None) -> bool:
+        """
+        Resolve the oldest in-flight request with the given key. Returns False for unsolicited messages.
+
+        Args:
+            received_at: time.monotonic() of the reply arrival in the MIDI input callback, if known.
+        """
+        with self._condition:
+            waiting = self._in_flight.get(key)
+            if not waiting:
+                if self.monitor:
+                    self.monitor.record_orphan()
+                return False
+            request = waiting.popleft()
+            if not waiting:
+                del self._in_flight[key]
+            self._in_flight_count -= 1
+            sendable = self._take_sendable()
+            self._condition.notify_all()
+
+        if self.monitor:
+            self._record_latency(request, received_at)
+        if not request.future.done():
+            request.future.set_result(message)
+        self._send_all(sendable)
+        return True
+
+    def wait_until_idle(self, timeout: float) -> bool:
+        """Block until all queued requests are answered or expired. Returns False on timeout."""
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._condition:
+                expired = self._take_expired()
+                sendable = self._take_sendable()
+                is_idle = not self._backlog and self._in_flight_count == 0
+                remaining = deadline - time.monotonic()
+                if not is_idle and remaining > 0 and not expired and not sendable:
+                    self._condition.wait(min(remaining, self.timeout))
+            self._fail_expired(expired)
+            self._send_all(sendable)
+            if is_idle:
+                return True
+            if remaining <= 0:
+                return False
+
+    def check_timeouts(self):
+        """Fail the requests whose reply is overdue and send the requests they were holding back."""
+        with self._condition:
+            expired = self._take_expired()
+            sendable = self._take_sendable()
+        self._fail_expired(expired)
+        self._send_all(sendable)
+
+    def pending_count(self) -> int:
+        with self._condition:
+            return len(self._backlog) + self._in_flight_count
+
+    def _take_sendable(self) -> list:
+        # Must be called with the lock held
+        sendable = []
+        while self._backlog and self._in_flight_count < self.window_size:
+            request = self._backlog.popleft()
+            if not request.future.set_running_or_notify_cancel():
+                continue  # cancelled before it was sent
+            request.sent_at = time.monotonic()
+            self._in_flight.setdefault(request.key, deque()).append(request)
+            self._in_flight_count += 1
+            sendable.append(request)
+        if sendable:
+            self._condition.notify_all()  # the expiry thread waits for the oldest request
+        return sendable
+
+    def _expire_overdue(self):
+        # Runs on the expiry thread: sleeps until the oldest in-flight request is due
+        while True:
+            with self._condition:
+                while True:
+                    sent_at = [waiting[0].sent_at for waiting in self._in_flight.values()]
+                    if not sent_at:
+                        self._condition.wait()
+                        continue
+                    remaining = min(sent_at) + self.timeout - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+            self.check_timeouts()
+
+    def _take_expired(self) -> list:
+        # Must be called with the lock held
+        expired = []
+        oldest_allowed = time.monotonic() - self.timeout
+        for key in list(self._in_flight):
+            waiting = self._in_flight[key]
+            while waiting and waiting[0].sent_at < oldest_allowed:
+                expired.append(waiting.popleft())
+                self._in_flight_count -= 1
+            if not waiting:
+                del self._in_flight[key]
+        if expired:
+            self._condition.notify_all()
+        return expired
+
+    def _send_all(self, sendable: list):
+        for request in sendable:
+            try:
+                written = self.send_fn(request.message)
+            except Exception as e:
+                if self._discard(request):
+                    self._set_exception(request, e)
+                continue
+            if isinstance(written, Future):
+                written.add_done_callback(lambda f, r=request: self._on_written(r, f))
+
+    def _on_written(self, request: _Request, written: Future):
+        request.written_at = time.monotonic()
+        if written.exception() is not None and self._discard(request):
+            self._set_exception(request, written.exception())
+
+    def _record_latency(self, request: _Request, received_at: float):
+        now = time.monotonic()
+        written_at = request.written_at
+        self.monitor.record(
+            total=now - request.submitted_at,
+            backlog=request.sent_at - request.submitted_at,
+            queue=written_at - request.sent_at if written_at is not None else None,
+            link=received_at - written_at if written_at is not None and received_at is not None else None,
+            processing=now - received_at if received_at is not None else None)
+
+    def _discard(self, request: _Request) -> bool:
+        """Take a request out of the in-flight set. Returns False if a reply or the expiry has taken it already."""
+        with self._condition:
+            waiting = self._in_flight.get(request.key)
+            if waiting is None or request not in waiting:
+                return False
+            waiting.remove(request)
+            self._in_flight_count -= 1
+            if not waiting:
+                del self._in_flight[request.key]
+            sendable = self._take_sendable()
+            self._condition.notify_all()
+        self._send_all(sendable)
+        return True
+
+    @staticmethod
+    def _set_exception(request: _Request, e: Exception):
+        # Only the thread that has taken the request out of the in-flight set completes it
+        if not request.future.done():
+            request.future.set_exception(e)
+
+    def _fail_expired(self, expired: list):
+        for request in expired:
+            if self.monitor:
+                self.monitor.record_timeout()
+            self._set_exception(request, self.RequestTimeoutError(f"No reply to request {request.key}"))
@@ -0,0 +1,83 @@
+import threading
+import time
+from concurrent.futures import Future
+from typing import NamedTuple
+
+
+class SyncReport(NamedTuple):
+    complete: bool  # every tracked request has been answered
+    elapsed: float  # seconds
+    received: int  # replies
+    missing: list  # names of the parameters without a reply (timed out, failed or still outstanding)
+
+
+class SyncTransaction:
+    """
+    One tone synchronization, as a transaction over the replies it is waiting for.
+
+    Every request of the synchronization is tracked by the Future of its reply, including requests that are made
+    while replies are processed (the DSP parameters are requested on the DSP module reply). A request is resolved
+    only after its reply has been processed, so the set of outstanding replies cannot run empty in between.
+    "wait" returns once the set is empty or at the deadline, exactly once, with the elapsed time and the parameters
+    that did not arrive. A cancelled transaction (superseded by a new synchronization) returns at once.
+    """
+
+    def __init__(self, timeout: float, check_timeouts_fn=None, poll_interval: float = 1.0):
+        self.started_at = time.monotonic()
+        self.deadline = self.started_at + timeout
+        self.check_timeouts_fn = check_timeouts_fn  # fails overdue requests: their Futures must not wait forever
+        self.poll_interval = poll_interval
+
+        self._condition = threading.Condition()
+        self._outstanding = {}  # Future -> parameter name
+        self._missing = []
+        self._received = 0
+        self._finished = False
+        self._cancelled = False
+
+    @property
+    def is_active(self) -> bool:
+        return not self._finished
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    def track(self, future: Future, name: str) -> bool:
+        """Add a request to the transaction. Returns False if the transaction is already finished."""
+        with self._condition:
+            if self._finished:
+                return False
+            self._outstanding[future] = name
+        future.add_done_callback(self._on_done)  # called at once if the reply is already there
+        return True
+
+    def cancel(self):
+        with self._condition:
+            self._cancelled = True
+            self._condition.notify_all()
+
+    def wait(self) -> SyncReport:
+        """Block until all tracked replies are in, the deadline has passed or the transaction is cancelled."""
+        while True:
+            with self._condition:
+                remaining = self.deadline - time.monotonic()
+                if not self._outstanding or self._cancelled or remaining <= 0:
+                    self._finished = True
+                    missing = self._missing + sorted(self._outstanding.values())
+                    return SyncReport(not missing, time.monotonic() - self.started_at, self._received, missing)
+                self._condition.wait(min(remaining, self.poll_interval))
+            if self.check_timeouts_fn:
+                self.check_timeouts_fn()  # outside of the lock: failed Futures call back into the transaction
+
+    def _on_done(self, future: Future):
+        with self._condition:
+            name = self._outstanding.pop(future, None)
+            if name is None:
+                return
+            if future.cancelled() or future.exception() is not None:
+                self._missing.append(name)
+            else:
+                self._received += 1
+            if not self._outstanding:
+                self._condition.notify_all()
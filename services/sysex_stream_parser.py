@@ -0,0 +1,93 @@
+import re
+import threading
+
+SYSEX_START = 0xF0
+SYSEX_END = 0xF7
+
+_STATUS_BYTE = re.compile(rb"[\x80-\xff]")
+
+
+class SysexStreamParser:
+    """
+    Incremental parser of a MIDI byte stream into SysEx packets (F0 ... F7).
+
+    "feed" accepts chunks of any size: a packet may be split over several chunks (e.g. long SysEx messages
+    that the MIDI driver delivers in parts) and a chunk may hold several packets. The chunk is scanned for
+    status bytes only, so data bytes are never looked at one by one. Complete packets are returned as
+    memoryview slices: of the chunk itself when the packet is in one chunk (no copy), otherwise of a buffer
+    the split packet has been assembled in. Buffers are replaced, never modified, so the slices stay valid.
+
+    Counters:
+        packet_count: complete packets returned;
+        truncated_count: packets cut off by the start of a new packet before their end byte;
+        malformed_count: packets dropped because of another status byte in their data.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buffer = bytearray()  # the beginning of a packet split over chunks
+        self._in_packet = False
+        self.packet_count = 0
+        self.truncated_count = 0
+        self.malformed_count = 0
+
+    @property
+    def in_packet(self) -> bool:
+        """True if a packet has been started but not yet completed."""
+        return self._in_packet
+
+    def feed(self, data) -> list:
+        """Parse a chunk of the stream. Returns the packets completed by this chunk."""
+        if not isinstance(data, (bytes, bytearray)):
+            data = bytes(data)
+        view = memoryview(data)
+        length = len(data)
+        packets = []
+
+        with self._lock:
+            start = 0  # where the not yet buffered part of the current packet begins in this chunk
+            pos = 0
+            while pos < length:
+                match = _STATUS_BYTE.search(data, pos)
+                if match is None:
+                    break
+                index = match.start()
+                status = data[index]
+
+                if status == SYSEX_START:
+                    if self._in_packet:
+                        self.truncated_count += 1
+                    self._buffer = bytearray()
+                    self._in_packet = True
+                    start = index
+                elif self._in_packet:
+                    if status == SYSEX_END:
+                        if self._buffer:
+                            self._buffer += view[start:index + 1]
+                            packets.append(memoryview(self._buffer))
+                            self._buffer = bytearray()
+                        else:
+                            packets.append(view[start:index + 1])
+                        self.packet_count += 1
+                    else:  # a status byte inside a packet: the packet is broken
+                        self.malformed_count += 1
+                        self._buffer = bytearray()
+                    self._in_packet = False
+                pos = index + 1  # outside of packets, status and data bytes are skipped
+
+            if self._in_packet and start < length:
+                self._buffer += view[start:]
+        return packets
+
+    def reset(self):
+        """Drop a partially received packet."""
+        with self._lock:
+            if self._in_packet:
+                self.truncated_count += 1
+            self._buffer = bytearray()
+            self._in_packet = False
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"packets": self.packet_count, "truncated": self.truncated_count,
+                    "malformed": self.malformed_count}
@@ -0,0 +1,162 @@
+import binascii
+import json
+import os
+import struct
+import zipfile
+import zlib
+from datetime import datetime
+
+from services.tone_codec import wrap_tone_file, unwrap_tone_file
+from services.user_tone_cache import UserToneCache
+
+MANIFEST_FILENAME = "manifest.json"
+ARCHIVE_FORMAT_VERSION = 1
+RESTORE_PROGRESS_FILENAME = "restore_progress.json"
+
+
+class ToneArchiveWriter:
+    """
+    Writes user tones into a single compressed archive (zip): one .ton file per slot and a manifest
+    (slot, name, CRC32 and synthesizer model). Tones are written as they are added, so a backup streams
+    into the archive instead of being collected in memory first.
+    """
+
+    def __init__(self, file_name: str, synthesizer_model: str):
+        self.file_name = file_name
+        self.synthesizer_model = synthesizer_model
+        self.tones = []  # manifest entries
+        self._zip_file = None
+
+    def __enter__(self):
+        self._zip_file = zipfile.ZipFile(self.file_name, "w", compression=zipfile.ZIP_DEFLATED)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if exc_type is None:
+                manifest = {"format": ARCHIVE_FORMAT_VERSION,
+                            "model": self.synthesizer_model,
+                            "created": datetime.now().isoformat(timespec="seconds"),
+                            "tones": self.tones}
+                self._zip_file.writestr(MANIFEST_FILENAME, json.dumps(manifest, indent=2))
+        finally:
+            self._zip_file.close()
+
+    def add(self, tone_number: int, tone_data):
+        tone_data = bytes(tone_data)
+        entry_name = f"tones/{tone_number}.ton"
+        self._zip_file.writestr(entry_name, wrap_tone_file(tone_data))
+        self.tones.append({"slot": tone_number,
+                           "name": UserToneCache.tone_name(tone_data),
+                           "crc": f"{binascii.crc32(tone_data):08x}",
+                           "file": entry_name})
+
+
+class ToneArchiveReader:
+    """
+    Reads an archive written by ToneArchiveWriter. Every tone is checked against the CRC32 in the manifest:
+    the whole archive is verified when it is opened, so a damaged archive is rejected before anything
+    is uploaded.
+    """
+
+    class InvalidArchiveError(Exception):
+        pass
+
+    def __init__(self, file_name: str):
+        self.file_name = file_name
+        try:
+            with zipfile.ZipFile(file_name, "r") as zip_file:
+                self.manifest = json.loads(zip_file.read(MANIFEST_FILENAME))
+        except (KeyError, ValueError, zipfile.BadZipFile, zlib.error):
+            raise self.InvalidArchiveError("Not a tone backup archive: the manifest is missing or damaged.")
+        if not isinstance(self.manifest, dict):
+            raise self.InvalidArchiveError("Not a tone backup archive: the manifest is damaged.")
+        if self.manifest.get("format") != ARCHIVE_FORMAT_VERSION:
+            raise self.InvalidArchiveError(f"Unsupported backup format: {self.manifest.get('format')}")
+        self.verify()
+
+    def verify(self):
+        """Check every tone of the manifest: its slot (801-900), its .ton file and its CRC32."""
+        tone_numbers = self.tone_numbers
+        if len(set(tone_numbers)) != len(tone_numbers):
+            raise self.InvalidArchiveError("The backup contains a user tone more than once.")
+        for tone_number in tone_numbers:
+            if not isinstance(tone_number, int) or tone_number < 801 or tone_number > 900:
+                raise self.InvalidArchiveError(f"Invalid user tone number in the backup: {tone_number}")
+        self.read_tones(tone_numbers)
+
+    @property
+    def synthesizer_model(self) -> str:
+        return self.manifest.get("model")
+
+    @property
+    def archive_id(self) -> str:
+        """CRC32 of the manifest, which lists the CRC32 of every tone: identifies the archive contents."""
+        return f"{binascii.crc32(json.dumps(self.manifest, sort_keys=True).encode()):08x}"
+
+    @property
+    def tone_numbers(self) -> list:
+        try:
+            return [entry["slot"] for entry in self.manifest["tones"]]
+        except (KeyError, TypeError):
+            raise self.InvalidArchiveError("Not a tone backup archive: the manifest is damaged.")
+
+    def read_tones(self, tone_numbers) -> dict:
+        """Tone data of the given slots (tone number -> tone data)."""
+        entries = {entry["slot"]: entry for entry in self.manifest["tones"]}
+        tones_data = {}
+        with zipfile.ZipFile(self.file_name, "r") as zip_file:
+            for tone_number in tone_numbers:
+                entry = entries[tone_number]
+                try:
+                    tone_data = bytes(unwrap_tone_file(zip_file.read(entry["file"])))
+                except (KeyError, ValueError, struct.error, zipfile.BadZipFile, zlib.error) as e:
+                    raise self.InvalidArchiveError(f"Tone {tone_number} is damaged: {e}")
+                if f"{binascii.crc32(tone_data):08x}" != entry.get("crc"):
+                    raise self.InvalidArchiveError(f"Tone {tone_number} is damaged (CRC mismatch).")
+                tones_data[tone_number] = tone_data
+        return tones_data
+
+
+class RestoreProgress:
+    """
+    The slots a restore has written so far (tone number -> CRC32 of the written tone), kept on disk in
+    "directory" until the restore has finished. A restore that has been interrupted (closed ports, a crash)
+    can then skip the slots it has already written. The progress of another archive is discarded.
+    """
+
+    def __init__(self, directory: str, archive_id: str):
+        self.path = os.path.join(directory, RESTORE_PROGRESS_FILENAME) if directory else None  # None: in memory
+        self.archive_id = archive_id
+        self.written = {}
+        if self.path is None:
+            return
+        try:
+            with open(self.path, "r") as progress_file:
+                progress = json.load(progress_file)
+            if progress.get("archive") == archive_id:
+                self.written = {int(tone_number): crc for tone_number, crc in progress["slots"].items()}
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            pass  # no interrupted restore, or unreadable: start from the beginning
+
+    def is_written(self, tone_number: int, tone_data) -> bool:
+        return self.written.get(tone_number) == f"{binascii.crc32(bytes(tone_data)):08x}"
+
+    def add(self, tones_data: dict):
+        """Record uploaded tones (tone number -> tone data); written to disk at once."""
+        for tone_number, tone_data in tones_data.items():
+            self.written[tone_number] = f"{binascii.crc32(bytes(tone_data)):08x}"
+        if self.path is None:
+            return
+        progress = {"archive": self.archive_id,
+                    "slots": {str(tone_number): crc for tone_number, crc in sorted(self.written.items())}}
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w") as progress_file:
+            json.dump(progress, progress_file, indent=1)
+        os.replace(temp_path, self.path)  # a crash never leaves a truncated file behind
+
+    def finish(self):
+        self.written = {}
+        if self.path is not None and os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,191 @@
+"""
+Offline conversion between tone images (HBR form, as in .ton files) and the Tone model, without the keyboard.
+
+The image stores the raw synth values, the Tone model the values shown in the GUI: the conversion is the same as
+for parameter replies and parameter changes sent over MIDI. The image holds more parameters than the Tone model,
+so a tone is always encoded on top of a base image. Parameters whose value did not change keep their raw value,
+so decoding and encoding an image gives back the same bytes (except for flags the layout always sets).
+.ton files are tone images with a header (model, CRC32 and length) and a footer: see wrap_tone_file.
+"""
+
+import binascii
+import copy
+import json
+import struct
+
+from constants import constants
+from constants.constants import EMPTY_TONE, EMPTY_DSP_MODULE_ID
+from constants.enums import ParameterType
+from models.tone import Tone
+from services.tone_layout import HBR_LAYOUT, encode_tone_name
+from services.user_tone_cache import UserToneCache
+from utils.object_encoder import ObjectEncoder
+from utils.utils import decode_param_value, encode_value_by_type, decode_dsp_params, encode_dsp_params, \
+    get_all_instruments
+
+TIMBRE_TYPE_PARAMS = ("Sound A Timbre Type", "Sound B Timbre Type")  # the synth stores the value doubled
+DSP_MODULE_PARAMETER = 85
+DSP_BYPASS_PARAMETER = 86
+DSP_PARAMS_PARAMETER = 87
+DSP_PARAMS_SIZE = 14
+JSON_DSP_BLOCKS = {"dsp_1": 0, "dsp_2": 1, "dsp_3": 2, "dsp_4": 3}
+
+
+def decode_tone(tone_data, synthesizer_model: str = None) -> Tone:
+    """Tone model from a tone image: name, main and advanced parameters and DSP modules."""
+    values = HBR_LAYOUT.decode(tone_data)
+    tone = Tone()
+    tone.name = UserToneCache.tone_name(tone_data) or constants.DEFAULT_TONE_NAME
+    tone.synthesizer_model = synthesizer_model
+
+    for parameter in tone.main_parameter_list + tone.advanced_parameter_list:
+        parameter.value = _decode_value(values[(parameter.param_number, parameter.block0)], parameter)
+
+    for block0, (dsp_module_attr, _) in constants.BLOCK_MAPPING.items():
+        setattr(tone, dsp_module_attr, _decode_dsp_module(values, block0))
+    return tone
+
+
+def encode_tone(tone: Tone, base_tone_data=EMPTY_TONE) -> bytearray:
+    """Tone image of the Tone model, on top of "base_tone_data" (parameters the Tone model does not hold)."""
+    values = HBR_LAYOUT.decode(base_tone_data)
+
+    if tone.name and tone.name != UserToneCache.tone_name(base_tone_data):
+        values[(0, 0)] = encode_tone_name(tone.name[:8])  # the synth shows 8 symbols
+
+    for parameter in tone.main_parameter_list + tone.advanced_parameter_list:
+        key = (parameter.param_number, parameter.block0)
+        if _decode_value(values[key], parameter) != parameter.value:
+            values[key] = _encode_value(parameter)
+
+    for block0, (dsp_module_attr, _) in constants.BLOCK_MAPPING.items():
+        dsp_module = getattr(tone, dsp_module_attr)
+        if _dsp_module_state(dsp_module) != _dsp_module_state(_decode_dsp_module(values, block0)):
+            _encode_dsp_module(values, block0, dsp_module)
+
+    return HBR_LAYOUT.encode(values, base=base_tone_data)
+
+
+def tone_from_json(json_tone: dict) -> Tone:
+    """Tone model from a JSON tone, as saved by "Save Tone (JSON)". Unknown parameters are ignored."""
+    tone = Tone()
+    tone.name = json_tone.get("name")
+    tone.synthesizer_model = json_tone.get("synthesizer_model")
+
+    json_parent_tone = json_tone.get("parent_tone") or {}
+    tone.parent_tone = next((instrument for instrument in get_all_instruments()
+                             if instrument.bank == json_parent_tone.get("bank")
+                             and instrument.program == json_parent_tone.get("program")), None)
+
+    _load_parameters_from_json(tone.main_parameter_list, json_tone.get("parameters", []))
+    _load_parameters_from_json(tone.advanced_parameter_list, json_tone.get("advanced_parameters", []))
+
+    for json_dsp_id, json_dsp_module in (json_tone.get("dsp_modules") or {}).items():
+        block0 = JSON_DSP_BLOCKS.get(json_dsp_id)
+        if block0 is None or not json_dsp_module or "name" not in json_dsp_module:
+            continue
+        dsp_module = copy.deepcopy(next((dsp_module for dsp_module in constants.ALL_DSP_MODULES
+                                         if dsp_module.name == json_dsp_module["name"]), None))
+        if dsp_module is not None and dsp_module.id is not None:
+            dsp_module.bypass.value = 1 if json_dsp_module.get("bypass") else 0
+            _load_parameters_from_json(dsp_module.dsp_parameter_list, json_dsp_module.get("parameters", []))
+            setattr(tone, constants.BLOCK_MAPPING[block0][0], dsp_module)
+    return tone
+
+
+def tone_to_json(tone: Tone) -> str:
+    """JSON tone, in the format of "Save Tone (JSON)"."""
+    return json.dumps(tone, cls=ObjectEncoder, indent=4)
+
+
+def wrap_tone_file(x):
+    """Tone image -> .ton file data."""
+    y = b'CT-X3000'
+    y += struct.pack('<2I', 0, 0)
+    y += b'TONH'
+    y += struct.pack('<3I', 0, binascii.crc32(x), len(x))
+    y += x
+    y += b'EODA'
+    return y
+
+
+def unwrap_tone_file(y):
+    """.ton file data -> tone image."""
+    # Ensure that 'y' is a bytes object
+    if not isinstance(y, bytes):
+        raise ValueError("Expected a bytes object")
+
+    # Check for the expected start and end markers
+    if not y.startswith(b'CT-X') or not y.endswith(b'EODA'):
+        raise ValueError("Invalid tone file format")
+
+    # Remove the 'EODA' footer before proceeding
+    y = y[:-4]  # Remove the 'EODA' footer (length of 'EODA' is 4 bytes)
+
+    # Skip the 'CT-X3000' prefix and read the next parts
+    offset = len(b'CT-X3000') + struct.calcsize('<2I')  # Skip CT-X3000 + 2 ints (0,0)
+    if y[offset:offset + 4] != b'TONH':
+        raise ValueError("Invalid tone file format: missing TONH")
+
+    # Unpack the 3 integers (we expect CRC, length, and 0) from the "TONH" section
+    crc, length, _ = struct.unpack('<3I', y[offset + 4:offset + 16])  # Unpacking 3 integers
+
+    # Now extract the actual data
+    actual_data = y[offset + 16:offset + 16 + length]
+
+    # Enforce exact file length (without 'EODA')
+    expected_length = 0x1C8  # 456 bytes
+    if len(actual_data) != expected_length:
+        raise ValueError(f"Invalid tone file length: expected {expected_length} bytes, got {len(y)} bytes")
+
+    return bytearray(actual_data)
+
+
+def _load_parameters_from_json(parameters: list, json_parameters: list):
+    parameters_by_name = {parameter.name: parameter for parameter in parameters}
+    for json_parameter in json_parameters:
+        parameter = parameters_by_name.get(json_parameter.get("name"))
+        if parameter is not None and "value" in json_parameter:
+            value = json_parameter["value"]
+            parameter.value = value - 1 if parameter.type == ParameterType.COMBO else value
+
+
+def _decode_value(value: int, parameter):
+    if parameter.type == ParameterType.SPECIAL_ATK_REL_KNOB:
+        value = (value & 0x7F) + 256 * (value >> 7)  # 7-bit LSB + MSB in the image, 8-bit in SysEx
+    elif parameter.name in TIMBRE_TYPE_PARAMS:
+        value = value // 2
+    return decode_param_value(value, parameter)
+
+
+def _encode_value(parameter) -> int:
+    value = encode_value_by_type(parameter)
+    if parameter.type == ParameterType.SPECIAL_ATK_REL_KNOB:
+        value = (value & 0xFF) + 128 * (value >> 8)
+    elif parameter.name in TIMBRE_TYPE_PARAMS:
+        value = value * 2
+    return value
+
+
+def _decode_dsp_module(values: dict, block0: int):
+    dsp_module = copy.deepcopy(Tone.get_dsp_module_by_id(values[(DSP_MODULE_PARAMETER, block0)]))
+    if dsp_module is not None:
+        dsp_module.bypass.value = values[(DSP_BYPASS_PARAMETER, block0)]
+        decode_dsp_params(dsp_module, values[(DSP_PARAMS_PARAMETER, block0)][:DSP_PARAMS_SIZE])
+    return dsp_module
+
+
+def _encode_dsp_module(values: dict, block0: int, dsp_module):
+    if dsp_module is None:
+        values[(DSP_MODULE_PARAMETER, block0)] = EMPTY_DSP_MODULE_ID
+        values[(DSP_BYPASS_PARAMETER, block0)] = 1
+    else:
+        values[(DSP_MODULE_PARAMETER, block0)] = dsp_module.id
+        values[(DSP_BYPASS_PARAMETER, block0)] = dsp_module.bypass.value
+    values[(DSP_PARAMS_PARAMETER, block0)] = bytes(encode_dsp_params(dsp_module))
+
+
+def _dsp_module_state(dsp_module):
+    if dsp_module is None:
+        return None
+    return dsp_module.id, dsp_module.bypass.value, encode_dsp_params(dsp_module)
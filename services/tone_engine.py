@@ -0,0 +1,717 @@
+"""
+Tone engine: the tone model, the MIDI session, tone synchronization and bulk operations, without any GUI.
+
+The engine reports everything that happens through events (constants.enums.EngineEvent): listeners subscribe
+to the events they are interested in. Listeners are called on the thread that caused the event, which is often
+the MIDI input thread or a worker thread, so the GUI must hand events over to its own thread (see Core).
+Batch tools can use the engine directly, without a QApplication or any widgets.
+"""
+
+import concurrent.futures
+import configparser
+import copy
+import functools
+import threading
+import time
+from typing import Union, Callable
+
+from constants import constants
+from constants.constants import DEFAULT_TONE_NAME, DEFAULT_SYNTH_MODEL, EMPTY_TONE, EMPTY_DSP_MODULE_ID, \
+    EMPTY_DSP_PARAMS_LIST, INTERNAL_MEMORY_USER_TONE_COUNT, USER_TONE_TABLE_ROW_OFFSET, SYNC_TIMEOUT, \
+    USER_TONE_CACHE_DIR, BACKUP_CHUNK_SIZE, NAME_SCAN_TIMEOUT
+from constants.enums import EngineEvent, ParameterType, SysexType, Size
+from models.parameter import MainParameter, AdvancedParameter
+from models.tone import Tone
+from services.midi_service import MidiService, VOLUME_PARAMETER, PAN_PARAMETER
+from services.sync_transaction import SyncTransaction, SyncReport
+from services.tone_archive import ToneArchiveReader, ToneArchiveWriter, RestoreProgress
+from services.tyrant_midi_service import TyrantMidiService
+from services.user_tone_cache import UserToneCache, SlotWriteReport, plan_slot_writes, required_slots
+from utils import utils
+from utils.file_operations import FileOperations
+from utils.utils import decode_param_value, lsb_msb_to_int, get_all_instruments
+
+LAYER_NAMES = ("UPPER 1", "UPPER 2", "LOWER 1", "LOWER 2")  # by block0
+PAN = AdvancedParameter(PAN_PARAMETER, PAN_PARAMETER, 0, "Pan", "Pan", ParameterType.KNOB, [-64, 63])
+
+
+# Tone state and all communication with the synthesizer
+# NB! Use int values as its method parameters, all required byte/hex conversions make in the Midi Service!
+class ToneEngine:
+    def __init__(self):
+        self.tone: Tone = Tone()
+        self.timeout = 0
+        self.sync_transaction = None  # the last tone synchronization
+        self._listeners = {}  # event -> listeners (replaced, never mutated)
+        self._listeners_lock = threading.Lock()
+
+        cfg = configparser.ConfigParser()
+        cfg.read(constants.CONFIG_FILENAME)
+        self.tone.synthesizer_model = cfg.get("Synthesizer", "Model", fallback=DEFAULT_SYNTH_MODEL)
+        self.skip_unchanged_uploads = cfg.getboolean("UserToneManager", "SkipUnchangedUploads", fallback=False)
+        self.verify_uploads = cfg.getboolean("UserToneManager", "VerifyUploads", fallback=False)
+
+        self.midi_port_names = None  # (input, output) of the open port pair
+        self.tyrant_midi_service = TyrantMidiService(user_tone_cache=UserToneCache(USER_TONE_CACHE_DIR))
+        self.midi_service = MidiService(self)  # opens the ports
+
+    def subscribe(self, event: EngineEvent, listener: Callable):
+        with self._listeners_lock:
+            self._listeners[event] = self._listeners.get(event, ()) + (listener,)
+
+    def unsubscribe(self, event: EngineEvent, listener: Callable):
+        with self._listeners_lock:
+            self._listeners[event] = tuple(item for item in self._listeners.get(event, ()) if item != listener)
+
+    def emit(self, event: EngineEvent, *args):
+        for listener in self._listeners.get(event, ()):
+            listener(*args)
+
+    def log(self, msg):
+        self.emit(EngineEvent.LOG, msg)
+
+    def show_error_msg(self, text: str):
+        self.log("[ERROR] " + text)
+        self.emit(EngineEvent.ERROR, text)
+
+    def show_status_msg(self, text: str, msecs: int):
+        self.emit(EngineEvent.STATUS, text, msecs)
+
+    # Run "fn" on a new thread; its errors are reported as engine errors
+    def start_thread(self, fn, *args):
+        def run():
+            try:
+                fn(*args)
+            except Exception as e:
+                self.show_error_msg(str(e))
+
+        threading.Thread(target=run, daemon=True).start()
+
+    @property
+    def is_synchronizing(self) -> bool:
+        return self.sync_transaction is not None and self.sync_transaction.is_active
+
+    # Synchronize all Tone data: name, main params, DSP modules and their params.
+    # The replies are tracked as one transaction: SYNC_FINISHED is emitted once, when all have arrived or timed out.
+    def synchronize_tone_with_synth(self):
+        self.log("[INFO] Synchronizing tone...")
+        self.midi_service.midi_writer.wait_until_empty(1.0)  # apply pending changes before reading them back
+
+        try:
+            self.midi_service.check_and_reopen_midi_ports()  # the long-lived ports are reopened only if closed
+            is_port_open = True
+        except Exception as e:
+            self.show_error_msg(str(e))
+            is_port_open = False
+
+        if self.sync_transaction is not None:
+            self.sync_transaction.cancel()  # superseded: only the new synchronization reports
+        request_engine = self.midi_service.request_engine
+        transaction = SyncTransaction(SYNC_TIMEOUT, request_engine.check_timeouts, request_engine.timeout)
+        self.sync_transaction = transaction
+        self.emit(EngineEvent.SYNC_STARTED)
+
+        if is_port_open:
+            self.request_tone_name()
+            self.request_main_parameters()
+            self.request_dsp_module(0)
+            self.request_dsp_module(1)
+            self.request_dsp_module(2)
+            self.request_dsp_module(3)
+            self.request_advanced_parameters()
+            self.request_volume_values()
+            self.request_pan_values()
+
+            self.request_layer_tone_numbers()  # upper2, lower1 and lower2 tone names
+
+        self.start_thread(self.wait_for_synchronization, transaction)
+
+    def wait_for_synchronization(self, transaction: SyncTransaction) -> SyncReport:
+        # Wait for the replies (including DSP parameters requested on DSP module replies) instead of guessing
+        report = transaction.wait()
+        if transaction.cancelled:
+            return report
+        if report.complete:
+            self.log(f"[INFO] Tone synchronized in {report.elapsed:.2f} s: {report.received} replies")
+        else:
+            self.log(f"[INFO] Synchronization incomplete after {report.elapsed:.2f} s, "
+                     f"not received: {', '.join(report.missing)}")
+            self.show_status_msg(f"Synchronization incomplete: {len(report.missing)} parameter(s) not received", 5000)
+        self.emit(EngineEvent.SYNC_FINISHED, report)
+        return report
+
+    # Add a request to the running tone synchronization
+    def track_sync_request(self, future, name: str):
+        transaction = self.sync_transaction
+        if transaction is not None and future is not None:
+            transaction.track(future, name)
+
+    # Request tone name from synth
+    def request_tone_name(self):
+        try:
+            self.track_sync_request(self.midi_service.request_tone_name(), "Tone Name")
+        except Exception as e:
+            self.show_error_msg(str(e))
+
+    # Process tone name from synth response
+    def process_tone_name_response(self, response):
+        tone_name = ''.join(chr(i) for i in response if chr(i).isprintable()).strip()
+        self.log(f"[INFO] Synth tone name: {tone_name}")
+        if tone_name:
+            # Works only with user tones?
+            self.tone.name = tone_name
+        elif self.tone.name is None:
+            self.tone.name = constants.DEFAULT_TONE_NAME
+            self.request_tone_number_from_performance_params()
+
+        self.emit(EngineEvent.TONE_NAME_CHANGED)
+
+    # A new method for retrieving tone number and name
+    def request_tone_number_from_performance_params(self):
+        try:
+            self.track_sync_request(
+                self.midi_service.request_parameter_value_full(0, SysexType.TONE_NUMBER.value, 2, 3, 0, 0),
+                f"{LAYER_NAMES[0]} Tone")
+        except Exception as e:
+            self.show_error_msg(str(e))
+
+    def process_tone_number_from_performance_params_response(self, tone_number, block0):
+        for instrument in get_all_instruments():
+            if instrument.id == tone_number:
+                self.log(f"[INFO] Tone name (by number from performance params): {instrument.name}")
+
+                if block0 == 0:
+                    self.tone.name = instrument.name
+                    self.tone.parent_tone = instrument
+                    self.emit(EngineEvent.PARENT_TONE_SELECTED, instrument)
+                    self.emit(EngineEvent.TONE_NAME_CHANGED)
+                else:
+                    self.emit(EngineEvent.LAYER_TONE_CHANGED, block0, instrument.id)
+
+                break
+
+    # Request main parameter value from synth
+    def request_main_parameters(self):
+        for parameter in self.tone.main_parameter_list:
+            self.log("[INFO] Requesting parameter: " + parameter.name)
+            try:
+                self.track_sync_request(
+                    self.midi_service.request_parameter_value(parameter.block0, parameter.param_number), parameter.name)
+            except Exception as e:
+                self.show_error_msg(str(e))
+
+    # Request advanced parameter value from synth
+    def request_advanced_parameters(self):
+        for parameter in self.tone.advanced_parameter_list:
+            self.log("[INFO] Requesting parameter: " + parameter.name)
+            try:
+                self.track_sync_request(
+                    self.midi_service.request_parameter_value(parameter.block0, parameter.param_number), parameter.name)
+            except Exception as e:
+                self.show_error_msg(str(e))
+
+    # Process main/advanced parameter value response: the value is already decoded by the Midi Service
+    def process_parameter_response(self, parameter: Union[MainParameter, AdvancedParameter], value: int):
+        self.log(f"[INFO] {parameter.name}: {value}")
+        parameter.value = decode_param_value(value, parameter)
+        self.emit(EngineEvent.PARAMETER_CHANGED, parameter)
+
+    # Request UPPER 1, UPPER 2, LOWER 1 and LOWER 2 volume
+    def request_volume_values(self):
+        try:
+            for block0, layer_name in enumerate(LAYER_NAMES):
+                self.track_sync_request(
+                    self.midi_service.request_parameter_value_full(block0, VOLUME_PARAMETER, 2, 3, 0, 0),
+                    f"{layer_name} Volume")
+        except Exception as e:
+            self.show_error_msg(str(e))
+
+    # Request UPPER 1, UPPER 2, LOWER 1 and LOWER 2 pan
+    def request_pan_values(self):
+        try:
+            for block0, layer_name in enumerate(LAYER_NAMES):
+                self.track_sync_request(
+                    self.midi_service.request_parameter_value_full(block0, PAN_PARAMETER, 2, 3, 0, 0),
+                    f"{layer_name} Pan")
+        except Exception as e:
+            self.show_error_msg(str(e))
+
+    # Request UPPER 2, LOWER 1 and LOWER 2 tone numbers
+    def request_layer_tone_numbers(self):
+        try:
+            for block0 in range(1, len(LAYER_NAMES)):
+                self.track_sync_request(
+                    self.request_custom_parameter(SysexType.TONE_NUMBER.value, block0, 2, 3, 0, 0),
+                    f"{LAYER_NAMES[block0]} Tone")
+        except Exception as e:
+            self.show_error_msg(str(e))
+
+    # Process UPPER 1, UPPER 2, LOWER 1 or LOWER 2 volume response
+    def process_volume_response(self, block0: int, value: int):
+        self.emit(EngineEvent.VOLUME_CHANGED, block0, value)
+
+    # Process UPPER 1, UPPER 2, LOWER 1 or LOWER 2 pan response
+    def process_pan_response(self, block0: int, value: int):
+        self.emit(EngineEvent.PAN_CHANGED, block0, decode_param_value(value, PAN))
+
+    # Send message to update synth's main parameter
+    def send_parameter_change_sysex(self, parameter: Union[MainParameter, AdvancedParameter]):
+        self.log(
+            "[INFO] Param " + str(parameter.name) + ": " + str(parameter.param_number) + ", " + str(parameter.value))
+        value = utils.encode_value_by_type(parameter)
+        if parameter.name == "Sound A Timbre Type" or parameter.name == "Sound B Timbre Type":
+            value = int(value * 2)
+
+        try:
+            if parameter.type == ParameterType.SPECIAL_ATK_REL_KNOB:
+                self.midi_service.send_atk_rel_parameter_change_sysex(parameter.block0,
+                                                                      parameter.param_number, value)
+            elif parameter.name in constants.SHORT_PARAMS:
+                self.midi_service.send_parameter_change_short_sysex(parameter.block0,
+                                                                    parameter.param_number, value)
+            else:
+                self.midi_service.send_parameter_change_sysex(parameter.block0, parameter.param_number, value)
+        except Exception as e:
+            self.show_error_msg(str(e))
+
+    def send_performance_param_change_sysex(self, parameter: AdvancedParameter):
+        self.log(
+            "[INFO] Param " + str(parameter.name) + ": " + str(parameter.param_number) + ", " + str(parameter.value))
+        value = utils.encode_value_by_type(parameter)
+        self.midi_service.send_parameter_value_full(parameter.block0, parameter.param_number, 2, 3, 0, value, 0)
+
+    # Request DSP module from synth
+    def request_dsp_module(self, block0):
+        try:
+            self.track_sync_request(self.midi_service.request_dsp_module(block0), f"DSP {block0 + 1} Module")
+        except Exception as e:
+            self.show_error_msg(str(e))
+
+    # Process DSP module from synth response
+    def process_dsp_module_response(self, block0: int, dsp_module_id: int):
+        self.update_tone_dsp_module(block0, dsp_module_id)
+        self.request_dsp_module_parameters(block0, dsp_module_id)
+
+    # Change the DSP module of the tone and send module change sysex
+    def change_dsp_module(self, block0, dsp_module_id):
+        self.update_tone_dsp_module(block0, dsp_module_id)
+
+        try:
+            if dsp_module_id is None:
+                self.midi_service.send_dsp_module_change_sysex(block0, EMPTY_DSP_MODULE_ID)
+                self.midi_service.send_dsp_params_change_sysex(block0, EMPTY_DSP_PARAMS_LIST)
+                self.midi_service.send_dsp_bypass_sysex(block0, True)
+                self.emit(EngineEvent.DSP_PARAMS_CHANGED, block0)
+            else:
+                self.midi_service.send_dsp_bypass_sysex(block0, False)
+                self.midi_service.send_dsp_module_change_sysex(block0, dsp_module_id)
+                self.request_dsp_module_parameters(block0, dsp_module_id)
+        except Exception as e:
+            self.show_error_msg(str(e))
+
+    # Update tone dsp module (with default parameters)
+    def update_tone_dsp_module(self, block0, dsp_module_id):
+        dsp_module_attr, _ = constants.BLOCK_MAPPING[block0]
+        dsp_module = copy.deepcopy(Tone.get_dsp_module_by_id(dsp_module_id))
+        setattr(self.tone, dsp_module_attr, dsp_module)
+        if dsp_module:
+            self.log(f"[INFO] DSP module: {dsp_module.name}")
+            dsp_module.bypass.value = 0
+        self.emit(EngineEvent.DSP_MODULE_CHANGED, block0, dsp_module_id)
+
+    # Request DSP module parameters from synth
+    def request_dsp_module_parameters(self, block0, dsp_module_id):
+        if dsp_module_id is not None:
+            try:
+                self.track_sync_request(self.midi_service.request_dsp_params(block0), f"DSP {block0 + 1} Parameters")
+            except Exception as e:
+                self.show_error_msg(str(e))
+
+    # Process DSP module parameters from synth response
+    def process_dsp_module_parameters_response(self, block0, synth_dsp_params):
+        dsp_module = getattr(self.tone, constants.BLOCK_MAPPING[block0][0])
+        if dsp_module is not None:
+            utils.decode_dsp_params(dsp_module, synth_dsp_params)
+        self.emit(EngineEvent.DSP_PARAMS_CHANGED, block0)
+
+    # Send message to update synth's DSP parameters (from the DSP module of the tone)
+    def send_dsp_params(self, block0):
+        try:
+            dsp_module = getattr(self.tone, constants.BLOCK_MAPPING[block0][0])
+            self.midi_service.send_dsp_params_change_sysex(block0, utils.encode_dsp_params(dsp_module))
+        except Exception as e:
+            self.show_error_msg(str(e))
+
+    def send_dsp_bypass(self, block0, bypass):
+        try:
+            self.midi_service.send_dsp_bypass_sysex(block0, bypass)
+        except Exception as e:
+            self.show_error_msg(str(e))
+
+    # Send program change message
+    def change_instrument_by_id(self, instrument_id):
+        instrument = Tone.get_instrument_by_id(instrument_id)
+        if instrument:
+            self.tone.name = instrument.name
+            self.tone.parent_tone = instrument
+            self.log(f"[INFO] Selected tone: {instrument_id} - {self.tone.parent_tone.name}")
+            try:
+                self.midi_service.send_change_tone_msg(instrument_id, 0)
+                self.emit(EngineEvent.SYNC_REQUESTED)
+            except Exception as e:
+                self.show_error_msg(str(e))
+
+    # Select calibration tone
+    def select_calibration_tone(self, instrument):
+        try:
+            self.midi_service.send_change_tone_msg_2(instrument.id)
+            self.tone.name = instrument.name
+            self.tone.parent_tone = None
+            self.emit(EngineEvent.SYNC_REQUESTED)
+        except Exception as e:
+            self.show_error_msg(str(e))
+
+    # Intercept instrument change messages from synth
+    def process_instrument_select_response(self, bank, program):
+        self.emit(EngineEvent.INSTRUMENT_CHANGED_ON_SYNTH, bank, program)
+        self.log("[INFO] Instrument: " + str(bank) + ", " + str(program))
+        self.find_instrument_and_update_tone(bank, program)
+        self.emit(EngineEvent.TONE_NAME_CHANGED)
+
+    def find_instrument_and_update_tone(self, bank, program):
+        self.tone.name = DEFAULT_TONE_NAME
+        self.tone.parent_tone = None
+        for instrument in get_all_instruments():
+            if instrument.bank == bank and instrument.program == program:
+                self.tone.name = instrument.name
+                self.tone.parent_tone = instrument
+                break
+        self.emit(EngineEvent.PARENT_TONE_SELECTED, self.tone.parent_tone)
+
+    def countdown_and_autosynchronize(self, timeout):
+        try:
+            if self.timeout > 0:
+                # countdown timer exists: reset time and exit
+                self.timeout = timeout
+            else:
+                # start countdown
+                self.timeout = timeout
+                while self.timeout > 0:
+                    self.show_status_msg(f"Auto-synchronize countdown: {self.timeout}", 1000)
+                    self.timeout -= 1
+                    time.sleep(1)
+
+                self.emit(EngineEvent.SYNC_REQUESTED)
+        except Exception as e:
+            self.show_error_msg(str(e))
+
+    # Reopen midi ports (with the current MIDI settings)
+    def reopen_midi_ports(self):
+        self.midi_service.reopen_midi_ports()
+
+    # A new port session: the keyboard may have been changed or reset in between, so cached user tones must be
+    # validated again. Cached user tones of another port are dropped.
+    def process_midi_ports_opened(self, input_name: str, output_name: str):
+        user_tone_cache = self.tyrant_midi_service.user_tone_cache
+        if self.midi_port_names is not None and self.midi_port_names != (input_name, output_name):
+            user_tone_cache.clear()
+        else:
+            user_tone_cache.reset_validation()
+        self.midi_port_names = (input_name, output_name)
+
+    def set_synthesizer_model(self, synthesizer_model: str):
+        if synthesizer_model != self.tone.synthesizer_model:
+            self.tyrant_midi_service.user_tone_cache.clear()  # user tones of another model
+        self.tone.synthesizer_model = synthesizer_model
+
+    # Close midi ports
+    def close_midi_ports(self):
+        self.midi_service.close_midi_ports()
+
+    def send_custom_midi_msg(self, midi_msg: str):
+        self.midi_service.send_custom_midi_msg(midi_msg)
+
+    def request_custom_parameter(self, number: int, block0: int, category: int, memory: int, parameter_set: int,
+                                 size: int):
+        return self.midi_service.request_parameter_value_full(block0, number, category, memory, parameter_set, size)
+
+    def send_instrument_change_sysex(self, block0, tone_number):
+        self.midi_service.send_change_tone_msg(tone_number, block0)
+
+    def get_current_tone_as_ton_file(self, tone_name: str):
+        new_tone_name = tone_name[:8]  # trim to first 8 symbols
+        current_tone = self.tyrant_midi_service.read_current_tone(new_tone_name)
+        ton_file_data = self.tyrant_midi_service.wrap_tone_file(current_tone)
+
+        return ton_file_data
+
+    # upload_tone: used in old separate rename-dialog
+    def upload_tone(self, tone_number, tone_name):
+        if not tone_name:
+            tone_name = DEFAULT_TONE_NAME
+
+        current_tone = self.tyrant_midi_service.read_current_tone(tone_name[:8])
+
+        self.tyrant_midi_service.bulk_upload(tone_number - USER_TONE_TABLE_ROW_OFFSET, current_tone, memory=1,
+                                             category=3)
+
+        self.show_status_msg("Tone successfully saved!", 3000)
+
+    # @Deprecated(used in old separate rename-dialog)
+    def rename_tone_from_main_menu(self, tone_number, new_name):
+        tone_data = self.tyrant_midi_service.bulk_download(tone_number - USER_TONE_TABLE_ROW_OFFSET, memory=1,
+                                                           category=3)
+
+        if new_name:
+            tone_data = bytearray(tone_data)  # Convert the tone data to a mutable bytearray
+            new_tone_name_bytes = new_name.encode('utf-8')
+            tone_data[0x1A6:0x1B6] = new_tone_name_bytes.ljust(16, b' ')
+            tone_data[0x1A6 + 8] = 0x00
+
+        self.tyrant_midi_service.bulk_upload(tone_number - USER_TONE_TABLE_ROW_OFFSET, tone_data, memory=1, category=3)
+
+        self.emit(EngineEvent.SYNC_REQUESTED)
+        self.show_status_msg("Tone successfully renamed!", 3000)
+
+    def rename_tone(self, tone_number, new_tone_name):
+        """Tone manager: Rename tone"""
+        if tone_number < 801 or tone_number > 900:
+            raise Exception("The 'Tone Number' must be in the range of 801 to 900.")
+
+        self.log(f"[INFO] Renaming tone: {tone_number} - {new_tone_name}")
+        tone_data = self.load_tone_data(tone_number)
+
+        if new_tone_name:
+            tone_data = bytearray(tone_data)  # Convert the tone data to a mutable bytearray
+            new_tone_name_bytes = new_tone_name.encode('utf-8')[:8]  # trim to first 8 symbols and get bytes
+            tone_data[0x1A6:0x1B6] = new_tone_name_bytes.ljust(16, b' ')
+            tone_data[0x1A6 + 8] = 0x00
+
+        self.tyrant_midi_service.bulk_upload(tone_number - USER_TONE_TABLE_ROW_OFFSET, tone_data, memory=1, category=3)
+
+        self.emit(EngineEvent.USER_TONES_CHANGED)
+        self.show_status_msg("Tone successfully renamed!", 3000)
+
+    # @Deprecated (used in old separate delete-dialog)
+    def delete_tone(self, tone_number):
+        self.tyrant_midi_service.bulk_upload(tone_number - USER_TONE_TABLE_ROW_OFFSET, EMPTY_TONE, memory=1, category=3)
+
+        self.emit(EngineEvent.SYNC_REQUESTED)
+        self.show_status_msg("Tone successfully deleted!", 3000)
+
+    def delete_tones(self, tones):
+        """Tone manager: Delete tones (list of tone number and name tuples) in one bulk session"""
+        for tone_number, tone_name in tones:
+            self.log(f"[INFO] Deleting tone: {tone_number} - {tone_name}")
+        self.save_tones_data({tone_number: EMPTY_TONE for tone_number, _ in tones})
+
+    def request_user_memory_tone_names(self, notify: bool = True) -> set:
+        """
+        Scan all user tone names, which validates the user tone cache for the current port session.
+        With "notify", every name is reported to the tone manager (USER_TONE_NAME), otherwise the scan is silent.
+        Blocks until every name has arrived or timed out. Returns the user tone numbers (0-99) which have answered.
+        """
+        with self.tyrant_midi_service.user_tone_cache.batch():  # the cache index is written once
+            futures = {i: self.request_user_memory_tone_name(i) for i in range(0, INTERNAL_MEMORY_USER_TONE_COUNT)}
+            if notify:
+                for i, future in futures.items():
+                    future.add_done_callback(functools.partial(self.notify_user_memory_tone_name, i))
+            concurrent.futures.wait(futures.values(), timeout=NAME_SCAN_TIMEOUT)
+        return {i for i, future in futures.items() if future.done() and future.exception() is None}
+
+    def request_user_memory_tone_name(self, tone_number):
+        return self.midi_service.request_parameter_value_full(0, 0, 3, 1, tone_number, 12)
+
+    # Every name reply validates the user tone cache, also the replies to a silent scan
+    def process_user_memory_tone_name_response(self, tone_number_response, tone_name_response):
+        tone_number = lsb_msb_to_int(tone_number_response[0], tone_number_response[1])
+        tone_name = self.decode_user_memory_tone_name(tone_name_response)
+        self.tyrant_midi_service.user_tone_cache.validate_name(tone_number, tone_name)  # drop changed slots
+
+    # Called when the request of a notifying scan is done: the reply has already been processed
+    def notify_user_memory_tone_name(self, tone_number, future):
+        if future.cancelled() or future.exception() is not None:
+            return
+        tone_name = self.decode_user_memory_tone_name(future.result()[-1 - Size.TONE_NAME:-1])
+        self.emit(EngineEvent.USER_TONE_NAME, tone_number, tone_name)
+
+    @staticmethod
+    def decode_user_memory_tone_name(tone_name_response) -> str:
+        return ''.join(chr(i) for i in tone_name_response if chr(i).isprintable()).strip()
+
+    def load_tone_data(self, tone_number):
+        return self.load_tones_data([tone_number])[tone_number]
+
+    def save_tone_data(self, tone_number, tone_data, skip_unchanged=None, verify=None) -> SlotWriteReport:
+        return self.save_tones_data({tone_number: tone_data}, skip_unchanged, verify)
+
+    def load_tones_data(self, tone_numbers, use_cache=True) -> dict:
+        """
+        Download several user tones in one bulk session. Returns tone number -> tone data.
+        With "use_cache", tones in the user tone cache are not downloaded again: only tones validated in the
+        current port session (by the name scan of the tone manager, or transferred) are served from the cache.
+        """
+        for tone_number in tone_numbers:
+            if tone_number < 801 or tone_number > 900:
+                raise Exception("The 'Tone Number' must be in the range of 801 to 900.")
+
+        slots = [tone_number - USER_TONE_TABLE_ROW_OFFSET for tone_number in tone_numbers]
+        tones_data = self.tyrant_midi_service.user_tone_cache.get_many(slots) if use_cache else {}
+        missing_slots = [slot for slot in slots if slot not in tones_data]
+        tones_data.update(self.tyrant_midi_service.bulk_download_many(missing_slots, memory=1, category=3))
+
+        return {tone_number: tones_data[tone_number - USER_TONE_TABLE_ROW_OFFSET] for tone_number in tone_numbers}
+
+    def save_tones_data(self, tones_data: dict, skip_unchanged=None, verify=None) -> SlotWriteReport:
+        """
+        Upload several user tones (tone number -> tone data) in one bulk session.
+
+        Args:
+            skip_unchanged: Do not upload tones whose slot already holds the same bytes, according to the
+                user tone cache (validated in the current port session). Other slots are uploaded.
+            verify: Read the uploaded slots back in one bulk session and compare them.
+            Default for both: as configured ("UserToneManager" section: SkipUnchangedUploads, VerifyUploads).
+        """
+        for tone_number in tones_data:
+            if tone_number < 801 or tone_number > 900:
+                raise Exception("The 'Tone Number' must be in the range of 801 to 900.")
+        skip_unchanged = self.skip_unchanged_uploads if skip_unchanged is None else skip_unchanged
+        verify = self.verify_uploads if verify is None else verify
+
+        tones_data = {tone_number: bytes(tone_data) for tone_number, tone_data in tones_data.items()}
+        skipped = []
+        if skip_unchanged:
+            cached = self.tyrant_midi_service.user_tone_cache.get_many(
+                [tone_number - USER_TONE_TABLE_ROW_OFFSET for tone_number in tones_data])
+            skipped = [tone_number for tone_number, tone_data in tones_data.items()
+                       if cached.get(tone_number - USER_TONE_TABLE_ROW_OFFSET) == tone_data]
+
+        writes = {tone_number: tone_data for tone_number, tone_data in tones_data.items() if tone_number not in skipped}
+        self.tyrant_midi_service.bulk_upload_many(
+            {tone_number - USER_TONE_TABLE_ROW_OFFSET: tone_data for tone_number, tone_data in writes.items()},
+            memory=1, category=3)
+
+        verified, mismatched = [], []
+        if verify and writes:
+            read_back = self.load_tones_data(list(writes), use_cache=False)
+            for tone_number, tone_data in writes.items():
+                (verified if read_back[tone_number] == tone_data else mismatched).append(tone_number)
+
+        report = SlotWriteReport(list(writes), skipped, verified, mismatched)
+        self.log(f"[INFO] User tone upload: {report}")
+        if mismatched:
+            self.log(f"[ERROR] Verification failed for tone(s): {', '.join(map(str, mismatched))}")
+        return report
+
+    def reorder_user_tones(self, layout: dict):
+        """
+        Tone manager: Rearrange user tones. "layout": tone number -> tone number whose tone it should hold.
+        Only the slots whose contents change are uploaded; cached slots are not downloaded again.
+        """
+        slot_layout = {target - USER_TONE_TABLE_ROW_OFFSET: source - USER_TONE_TABLE_ROW_OFFSET
+                       for target, source in layout.items()}
+        sources = [slot + USER_TONE_TABLE_ROW_OFFSET for slot in required_slots(slot_layout)]
+        images = {tone_number - USER_TONE_TABLE_ROW_OFFSET: tone_data
+                  for tone_number, tone_data in self.load_tones_data(sources, use_cache=True).items()}
+        images.update(self.tyrant_midi_service.user_tone_cache.get_many(slot_layout.keys()))  # known targets
+
+        writes = plan_slot_writes(slot_layout, images)
+        self.log(f"[INFO] Rearranging user tones: {len(writes)} slot(s) to write")
+        self.save_tones_data({slot + USER_TONE_TABLE_ROW_OFFSET: tone_data for slot, tone_data in writes.items()})
+
+    def upload_current_tone(self, tone_number) -> SlotWriteReport:
+        """Tone manager: Save current tone"""
+        tone_name = self.tone.name
+        if not tone_name:
+            tone_name = DEFAULT_TONE_NAME
+
+        current_tone = self.tyrant_midi_service.read_current_tone(tone_name[:8])
+        report = self.save_tone_data(tone_number, current_tone)
+
+        self.emit(EngineEvent.USER_TONES_CHANGED)
+        self.show_status_msg(self.get_upload_status_msg(report, "Tone successfully saved!"), 3000)
+        return report
+
+    @staticmethod
+    def get_upload_status_msg(report: SlotWriteReport, success_msg: str) -> str:
+        if report.mismatched:
+            return "Verification failed: the keyboard holds different data!"
+        if report.skipped and not report.written:
+            return "Tone is already up to date."
+        return success_msg
+
+    def save_ton_files(self, files):
+        """Tone manager: Save tones to .ton files (list of file name and tone number tuples)"""
+        tones_data = self.load_tones_data([tone_number for _, tone_number in files])  # one bulk session
+        for file_name, tone_number in files:
+            FileOperations.save_binary_file(file_name, self.tyrant_midi_service.wrap_tone_file(tones_data[tone_number]))
+        self.show_status_msg("File successfully saved!", 3000)
+
+    def upload_ton_file(self, tone_number, wrapped_ton_file_data) -> SlotWriteReport:
+        """Tone manager: Upload a .ton file into a user tone"""
+        status_msg = "Tone successfully uploaded!"
+        try:
+            unwrapped_ton_file_data = self.tyrant_midi_service.unwrap_tone_file(wrapped_ton_file_data)
+            report = self.save_tone_data(tone_number, unwrapped_ton_file_data)
+            status_msg = self.get_upload_status_msg(report, status_msg)
+            return report
+        finally:
+            self.emit(EngineEvent.USER_TONES_CHANGED)
+            self.show_status_msg(status_msg, 3000)
+
+    def backup_user_tones(self, file_name):
+        """Tone manager: Save all user tones (801-900) into one archive, downloading them chunk by chunk"""
+        tone_numbers = [USER_TONE_TABLE_ROW_OFFSET + i for i in range(INTERNAL_MEMORY_USER_TONE_COUNT)]
+        with ToneArchiveWriter(file_name, self.tone.synthesizer_model) as archive:
+            for i in range(0, len(tone_numbers), BACKUP_CHUNK_SIZE):
+                chunk = tone_numbers[i:i + BACKUP_CHUNK_SIZE]
+                for tone_number, tone_data in self.load_tones_data(chunk, use_cache=False).items():
+                    archive.add(tone_number, tone_data)
+                self.show_status_msg(f"Backing up user tones... {i + len(chunk)}/{len(tone_numbers)}", 10000)
+
+        self.log(f"[INFO] Backup finished: {len(tone_numbers)} user tones")
+        self.show_status_msg("User tones successfully backed up!", 3000)
+
+    def restore_user_tones(self, file_name) -> SlotWriteReport:
+        """
+        Tone manager: Upload the user tones of a backup archive, chunk by chunk.
+
+        The whole archive is verified before the first upload. Resumable, also after the ports have been reopened
+        or the application restarted: the slots written so far are recorded on disk (RestoreProgress). A recorded
+        slot is skipped only if the name scan made before the restore confirms that it still holds the archived
+        tone (its name matches the cached image of the written tone). All other slots are uploaded.
+        """
+        archive = ToneArchiveReader(file_name)  # raises InvalidArchiveError if any tone is damaged
+        if archive.synthesizer_model != self.tone.synthesizer_model:
+            raise Exception(f"The backup was made for {archive.synthesizer_model}, "
+                            f"but the selected synthesizer model is {self.tone.synthesizer_model}.")
+
+        user_tone_cache = self.tyrant_midi_service.user_tone_cache
+        progress = RestoreProgress(user_tone_cache.directory, archive.archive_id)
+        tone_numbers = archive.tone_numbers
+        # Silent: the tone manager keeps its controls disabled until the restore has finished
+        scanned_slots = self.request_user_memory_tone_names(notify=False)  # drops the slots changed on the keyboard
+        confirmed = user_tone_cache.get_many([tone_number - USER_TONE_TABLE_ROW_OFFSET for tone_number in tone_numbers
+                                              if tone_number - USER_TONE_TABLE_ROW_OFFSET in scanned_slots])
+
+        report = SlotWriteReport([], [], [], [])
+        for i in range(0, len(tone_numbers), BACKUP_CHUNK_SIZE):
+            chunk = tone_numbers[i:i + BACKUP_CHUNK_SIZE]
+            tones_data = archive.read_tones(chunk)
+            skipped = [tone_number for tone_number, tone_data in tones_data.items()
+                       if progress.is_written(tone_number, tone_data)
+                       and confirmed.get(tone_number - USER_TONE_TABLE_ROW_OFFSET) == tone_data]
+            chunk_report = self.save_tones_data(
+                {tone_number: tone_data for tone_number, tone_data in tones_data.items() if tone_number not in skipped},
+                skip_unchanged=False)
+            progress.add({tone_number: tones_data[tone_number] for tone_number in chunk_report.written
+                          if tone_number not in chunk_report.mismatched})
+            report = SlotWriteReport(*(done + new for done, new in zip(report, chunk_report)))
+            report = report._replace(skipped=report.skipped + skipped)
+            self.show_status_msg(f"Restoring user tones... {i + len(chunk)}/{len(tone_numbers)}", 10000)
+
+        if not report.mismatched:
+            progress.finish()  # otherwise a restore of the same archive only uploads the mismatched tones again
+        self.log(f"[INFO] Restore finished: {report}")
+        self.show_status_msg(self.get_upload_status_msg(report, "User tones successfully restored!"), 3000)
+        return report
@@ -0,0 +1,193 @@
+"""
+Layout of a tone in HBR form (the 0x1C8 byte image of bulk transfers and .ton files).
+
+The layout is a table of fields: parameter, block, offset, struct format of the stored word and, for bit-packed
+parameters, the position of the value within the word. Several bit-packed fields may share one word. The table
+is compiled once into a single struct.Struct, so a tone image is packed or unpacked in one pass.
+"""
+
+import struct
+from typing import NamedTuple
+
+TONE_SIZE = 0x1C8
+BLANK_NAME = b' ' * 16
+
+
+class LayoutField(NamedTuple):
+    parameter: int
+    block: int
+    offset: int
+    fmt: str  # struct format of the stored word: "B", "H", "I" (little-endian) or "16s"
+    shift: int = 0  # bit-packed field: position of the lowest bit within the word
+    bits: int = 0  # bit-packed field: width; 0 if the field is the whole word
+    default: object = 0  # stored when no value is given
+    fixed: int = None  # stored instead of the value (a flag the keyboard requires to be set)
+    clamp: bool = False  # out of range values are clamped instead of rejected
+
+
+def _bit_fields(offset: int, fmt: str, *fields, block: int = 0) -> list:
+    """Bit-packed fields of one word: (parameter, shift, bits) or (parameter, shift, bits, fixed value)."""
+    return [LayoutField(f[0], block, offset, fmt, f[1], f[2], fixed=f[3] if len(f) > 3 else None) for f in fields]
+
+
+def _interleaved(parameter_1: int, parameter_2: int, offset: int, count: int) -> list:
+    """Two block arrays of 16-bit words, stored in pairs: parameter_1[k], parameter_2[k], ..."""
+    return [LayoutField(parameter, k, offset + 4 * k + 2 * i, "H")
+            for k in range(count) for i, parameter in enumerate((parameter_1, parameter_2))]
+
+
+def _bytes(offset: int, *parameters) -> list:
+    """Consecutive single byte parameters."""
+    return [LayoutField(parameter, 0, offset + i, "B") for i, parameter in enumerate(parameters)]
+
+
+def _sound(a: int, base: int) -> list:
+    """Parameters of one of the two sounds (A: 1-20, B: 21-40)."""
+    return (_interleaved(a + 7, a + 6, base + 0x00, 3)
+            + _interleaved(a + 11, a + 10, base + 0x0C, 7)
+            + _interleaved(a + 13, a + 12, base + 0x28, 7)
+            + _interleaved(a + 18, a + 17, base + 0x44, 7)
+            + _interleaved(a + 20, a + 19, base + 0x60, 7)
+            + _bytes(base + 0x7C, a + 8, a + 9, a + 14, a + 15, a + 16)
+            + [LayoutField(a + 2, 0, base + 0x82, "H")]
+            + _bytes(base + 0x84, a + 3, a + 4, a + 5)
+            + [LayoutField(a + 1, 0, base + 0x87, "B", clamp=True)])  # sometimes read as -1
+
+
+HBR_TONE_LAYOUT = (
+    _sound(0, 0x00)
+    + _sound(20, 0x88)
+    + _bytes(0x110, 56, 57, 58, 60, 61, 62, 63, 64, 65, 67, 68, 69, 70, 71, 72, 73, 74, 75, 76, 77)
+    + _bit_fields(0x124, "B", (66, 0, 4), (59, 4, 4))
+    + [LayoutField(84, 0, 0x126, "16s", default=BLANK_NAME)]  # DSP name
+    + [field for j in range(4) for field in (
+        _bit_fields(0x136 + j * 0x12, "H", (85, 0, 14), (86, 14, 1), block=j)  # DSP type and bypass
+        + [LayoutField(87, j, 0x138 + j * 0x12, "16s", default=b'')])]  # DSP parameters
+    + _bit_fields(0x17E, "B", (99, 0, 1), (96, 1, 1), (95, 2, 1), (94, 3, 2), (92, 5, 3))
+    + _bit_fields(0x17F, "B", (91, 1, 1), (90, 2, 1), (89, 3, 2), (88, 7, 1))
+    + _bytes(0x180, 93, 97, 98)
+    + [LayoutField(100, 0, 0x184, "I"), LayoutField(101, 0, 0x188, "I")]
+    + _bytes(0x18C, 102, 103, 104, 105)
+    + [LayoutField(106, 0, 0x190, "I")]
+    + _bytes(0x194, 107, 108)
+    + _bit_fields(0x196, "B", (109, 0, 1))
+    + _bytes(0x197, 110, 111, 112)
+    + _bit_fields(0x19A, "B", (113, 0, 4), (114, 4, 1), (115, 5, 1), (116, 6, 2))
+    + [field for j, offset in enumerate((0x19C, 0x1A0)) for field in (  # filters
+        _bit_fields(offset, "H", (117, 0, 4), (118, 4, 6), (119, 10, 6), block=j)
+        + _bit_fields(offset + 2, "B", (122, 0, 3), (121, 3, 1), (120, 4, 4), block=j))]
+    # Parameter 81 must always be set, or the "CASIO Data Manager for CT-X" shows an empty tone name
+    + _bit_fields(0x1A4, "B", (83, 0, 1), (82, 1, 1), (81, 2, 1, 1), (80, 3, 4), (55, 7, 1))
+    + _bit_fields(0x1A5, "B", (44, 0, 1), (43, 1, 3), (42, 5, 2), (41, 7, 1))
+    + [LayoutField(0, 0, 0x1A6, "16s", default=BLANK_NAME)]  # tone name
+    + _bytes(0x1B6, 45, 46, 47, 48, 49, 50, 51, 52, 53, 54, 78, 79, 200, 201, 202)
+)
+
+
+def encode_tone_name(tone_name: str) -> bytes:
+    """Tone name field: padded with spaces, the 9th byte is always zero."""
+    name = bytearray(tone_name.encode('utf-8').ljust(16, b' ')[:16])
+    name[8] = 0x00
+    return bytes(name)
+
+
+class ToneLayout:
+    """
+    Encoder and decoder of tone images, compiled from a layout table.
+
+    Values are dictionaries (parameter, block) -> value: an integer, or bytes for "16s" fields.
+    """
+
+    def __init__(self, fields=HBR_TONE_LAYOUT, size: int = TONE_SIZE):
+        self.fields = tuple(fields)
+        self.size = size
+
+        words = {}  # offset -> fields stored in the word
+        for field in self.fields:
+            words.setdefault(field.offset, []).append(field)
+        self._words = []  # (fields, whole word field or None, mask of the bits used), in the order of the struct items
+        self._gaps = []  # (start, end) of the bytes no field uses
+        fmt = "<"
+        position = 0
+        for offset in sorted(words):
+            word_fields = words[offset]
+            word_fmt = word_fields[0].fmt
+            if offset < position or any(field.fmt != word_fmt for field in word_fields):
+                raise ValueError(f"Overlapping fields at offset 0x{offset:X}")
+            if offset > position:
+                self._gaps.append((position, offset))
+            fmt += "x" * (offset - position) + word_fmt
+            position = offset + struct.calcsize("<" + word_fmt)
+            whole = word_fields[0] if len(word_fields) == 1 and not word_fields[0].bits else None
+            mask = 0
+            for field in word_fields:
+                mask |= ((1 << field.bits) - 1) << field.shift
+            self._words.append((tuple(word_fields), whole, mask))
+        if position > size:
+            raise ValueError("The layout does not fit into the tone image")
+        if position < size:
+            self._gaps.append((position, size))
+        self._struct = struct.Struct(fmt + "x" * (size - position))
+
+    def encode(self, values: dict, base=None) -> bytearray:
+        """
+        Tone image from the parameter values. Missing values are stored as the field defaults.
+        With a base image, the bytes and bits that no field uses are copied from it.
+        """
+        if base is None:
+            buffer = bytearray(self.size)
+            self.pack_into(buffer, values)
+        else:
+            buffer = bytearray(base)
+            self.pack_into(buffer, values, keep_unused=True)
+        return buffer
+
+    def pack_into(self, buffer, values: dict, offset: int = 0, keep_unused: bool = False):
+        """Pack the values into an existing buffer; "keep_unused" keeps the bytes and bits that no field uses."""
+        if keep_unused:
+            current_words = self._struct.unpack_from(buffer, offset)
+            gaps = [(start, bytes(buffer[offset + start:offset + end])) for start, end in self._gaps]
+
+        items = []
+        for i, (word_fields, whole, mask) in enumerate(self._words):
+            if whole is not None:
+                items.append(self._encode_value(whole, values.get((whole.parameter, whole.block), whole.default)))
+                continue
+            word = current_words[i] & ~mask if keep_unused else 0
+            for field in word_fields:
+                word |= self._encode_value(field, values.get((field.parameter, field.block), field.default))
+            items.append(word)
+        self._struct.pack_into(buffer, offset, *items)
+
+        if keep_unused:
+            for start, data in gaps:
+                buffer[offset + start:offset + start + len(data)] = data
+
+    def decode(self, buffer, offset: int = 0) -> dict:
+        """Parameter values of a tone image."""
+        values = {}
+        for (word_fields, whole, _), word in zip(self._words, self._struct.unpack_from(buffer, offset)):
+            if whole is not None:
+                values[(whole.parameter, whole.block)] = word
+                continue
+            for field in word_fields:
+                values[(field.parameter, field.block)] = (word >> field.shift) & ((1 << field.bits) - 1)
+        return values
+
+    @staticmethod
+    def _encode_value(field: LayoutField, value):
+        if field.fmt.endswith("s"):
+            return bytes(value)
+        if field.clamp:
+            value = max(0, min(255, value))
+        if not field.bits:
+            return value  # range checked by struct
+
+        if value >= 1 << field.bits:
+            raise ValueError(f"Parameter {field.parameter} (block {field.block}) out of range: {value}")
+        if field.fixed is not None:
+            value = field.fixed
+        return (value % (1 << field.bits)) << field.shift
+
+
+HBR_LAYOUT = ToneLayout()
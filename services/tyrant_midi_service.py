@@ -7,17 +7,186 @@ https://github.com/michgz/ac7maker/blob/master/internal/tone_rw.py
 
 import binascii
 import struct
+import threading
 import time
 
+from constants.constants import BULK_ACK_TIMEOUT, BULK_SBS_RETRIES, BULK_SETTLE_TIME, BULK_SETTLE_TIME_MIN
+from constants.enums import MidiLane
+from services import tone_codec
 from services.midi_service import MidiService  # RtMidi has been replaced with the existing MidiService
+from services.request_engine import ParameterRequestEngine
+from services.sysex_stream_parser import SysexStreamParser
+from services.tone_layout import HBR_LAYOUT, encode_tone_name
+from services.user_tone_cache import UserToneCache
+from utils import midi_codec
+
+
+class BulkSession:
+    """
+    State of one exchange with the keyboard: ACK/ESS flags and receive buffers.
+
+    Used as a context manager: on entry the session attaches its message handler to the (long-lived) MIDI ports
+    of its MidiService, on exit it detaches it. The session only consumes the packet types it is interested in,
+    so a parameter reader and a bulk transfer can run at the same time, each with its own session. The session
+    lock is reentrant: a thread may nest transfers on the same session, other threads wait for their turn.
+    """
+
+    TRANSFER_PACKET_TYPES = frozenset((0x03, 0x05, 0x0A, 0x0B, 0x0D, 0x0E))
+    READ_PACKET_TYPES = frozenset((0x01,))
+
+    def __init__(self, midi_service=None, packet_types=TRANSFER_PACKET_TYPES, request_engine=None):
+        self.midi_service = midi_service or MidiService.get_instance()
+        self.packet_types = packet_types
+        self.request_engine = request_engine  # resolves type 1 replies of pipelined reads
+
+        self.lock = threading.RLock()
+        self.condition = threading.Condition()  # notified whenever "have_got_ack" is set
+        self.parser = SysexStreamParser()  # for raw byte streams ("parse_response")
+        self.have_got_ack = False
+        self.have_got_ess = False
+        self.is_busy = False
+        self.got_busy = False  # a busy packet has been received since "expect_ack"
+        self.must_send_ack = False
+        self.total_rxed = b''
+        self.type_1_rxed = b''
+
+    def __enter__(self):
+        self.lock.acquire()
+        try:
+            self.midi_service.check_and_reopen_midi_ports()
+            self.midi_service.attach_message_handler(self.process_message)
+        except Exception:
+            self.lock.release()
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.midi_service.detach_message_handler(self.process_message)
+        self.lock.release()
+
+    def send_packet(self, packet, lane=MidiLane.BULK):
+        """
+        Send a packet through the MIDI writer thread and wait until it has been written. Write errors are raised.
+        """
+        self.midi_service.send_packet(packet, lane, with_future=True).result()
+
+    def expect_ack(self):
+        """
+        Reset the ACK state. Must be called before sending: the reply may arrive before "send_packet" returns.
+        """
+        with self.condition:
+            self.have_got_ack = False
+            self.got_busy = False
+
+    def signal_ack(self):
+        with self.condition:
+            self.have_got_ack = True
+            self.condition.notify_all()
+
+    def wait_for_ack(self, timeout: float) -> bool:
+        """
+        Wait until "handle_pkt" has received an ACK. Returns False on timeout.
+        """
+        with self.condition:
+            return self.condition.wait_for(lambda: self.have_got_ack, timeout)
+
+    def process_message(self, message, received_at: float = None) -> bool:
+        """
+        Message handler attached to MidiService. Consumes Casio SysEx packets of the session's packet types.
+        MidiService has already joined split packets: every message is a complete packet.
+        """
+        if TyrantMidiService.IS_DEBUG_MODE:
+            print(f"MIDI IN message: {bytes(message).hex(' ').upper()}")
+        if len(message) < 6 or message[0] != 0xF0 or message[1] != 0x44:
+            return False  # leave notes, program changes etc. to the default processing
+        if message[5] not in self.packet_types:
+            return False  # another session or the default processing handles it
+        if message[5] == 0x01 and self.request_engine is not None:
+            return self.resolve_reply(message, received_at)  # replies to other requests are left to other handlers
+        self.handle_pkt(message)
+        return True
+
+    def resolve_reply(self, packet, received_at: float = None) -> bool:
+        """
+        Pass a type 1 packet to the request engine of a pipelined read. Returns False if no request in flight
+        matches it.
+        """
+        if len(packet) < 25:
+            return False
+        # Tag the reply by parameter and block: pipelined replies may arrive in any order
+        key = ParameterRequestEngine.make_key(packet[6], packet[7], packet[8] + 128 * packet[9],
+                                              packet[16] + 128 * packet[17], packet[18] + 128 * packet[19])
+        return self.request_engine.resolve(key, bytes(packet[24:-1]), received_at)
 
-have_got_ack = False
-have_got_ess = False
-is_busy = False
-must_send_ack = False
-so_far = b''
-total_rxed = b''
-type_1_rxed = b''
+    def parse_response(self, data):
+        """
+        Parse bytes received from the MIDI port, collating them into SYSEX packets.
+
+        Parameters:
+            data (bytes): The incoming MIDI data.
+        """
+        for packet in self.parser.feed(data):
+            if TyrantMidiService.IS_DEBUG_MODE:
+                print("so_far: " + packet.hex(" ").upper())
+            self.handle_pkt(packet)
+
+    def handle_pkt(self, packet):
+        """
+        Handle a complete packet as received from the MIDI port (bytes or a memoryview).
+        It is assumed that each packet is in Casio SYSEX format.
+        """
+        if TyrantMidiService.IS_DEBUG_MODE:
+            print(f"packet received: {packet.hex()}")
+
+        # Validate packet length
+        if len(packet) < 7:
+            self.log_error(f"Bad bulk packet (too short): {bytes(packet).hex(' ').upper()}")
+            return
+
+        # Validate packet structure
+        if not (packet[0] == 0xF0 and packet[1] == 0x44 and packet[4] == 0x7F and packet[-1] == 0xF7):
+            self.log_error(f"Bad bulk packet: {bytes(packet).hex(' ').upper()}")
+            return
+
+        # Extract packet type
+        packet_type = packet[5]
+
+        # Handle different packet types
+        if packet_type == 0x0B:  # Busy signal
+            self.is_busy = True
+            self.got_busy = True
+            return
+        else:
+            self.is_busy = False
+            if packet_type == 0x0A:  # ACK
+                self.signal_ack()
+            elif packet_type == 0x0D:  # ESS
+                self.have_got_ess = True
+                self.signal_ack()
+
+        # Handle CRC-validated packets
+        if packet_type in (0x03, 0x05):  # Packets requiring CRC
+            crc_received = TyrantMidiService._extract_crc(packet)
+            crc_calculated = binascii.crc32(packet[1:-6])
+
+            if crc_calculated == crc_received:
+                self.must_send_ack = True
+                if packet_type == 0x05:  # Packet with data
+                    data = TyrantMidiService.midi_7bit_to_8bit(packet[12:-6])
+                    self.total_rxed += data
+                    self.signal_ack()
+            else:
+                self.log_error(f"Bad CRC in bulk packet of type {packet_type:#04x}")
+
+        # Handle type 1 packets
+        if packet_type == 0x01:
+            self.type_1_rxed = bytes(packet[24:-1])
+            if self.request_engine is not None:
+                self.resolve_reply(packet)
+
+    def log_error(self, text: str):
+        # Through the engine log, like all other MIDI errors: not printed to the console
+        self.midi_service.engine.log("[ERROR] " + text)
 
 
 class TyrantMidiService:
@@ -29,10 +198,23 @@ class TyrantMidiService:
     TONE_CATEGORY = 3
     PARAM_LIST = list(range(0, 123)) + [200, 201, 202]  # Correct for CT-X3000/5000
     IS_DEBUG_MODE = False
+    IS_PIPELINED_READ = True  # issue several single parameter reads at once
+    READ_WINDOW = 8  # single parameter reads in flight at once
+    READ_TIMEOUT = 0.3  # seconds to wait for a single parameter reply
+    READ_RETRIES = 3  # attempts to re-read a parameter whose reply is missing
 
     class SysexTimeoutError(Exception):
         pass
 
+    def __init__(self, midi_service=None, user_tone_cache: UserToneCache = None):
+        self.midi_service = midi_service  # None: the MidiService singleton
+        self.transfer_lock = threading.RLock()  # the keyboard handles one bulk transfer at a time
+        self.user_tone_cache = user_tone_cache or UserToneCache()  # user tone slots as last transferred
+        self.settle_time = BULK_SETTLE_TIME  # learned time the keyboard needs after ESS/EBS
+        self.settle_time_floor = BULK_SETTLE_TIME_MIN  # shortest settle time not yet seen to fail
+        self.ack_timeout = BULK_ACK_TIMEOUT
+        self.ready_at = 0.0  # monotonic time when the keyboard is expected to accept the next packet
+
     def read_current_tone(self, new_tone_name: str):
         """
         Original name: tone_read
@@ -49,319 +231,37 @@ class TyrantMidiService:
         if self.IS_DEBUG_MODE:
             t1 = time.time()
 
-        # Get MIDI ports and replace callback (callback is used instead of MidiIn.get_message())
-        midi_in, midi_out = MidiService.get_instance().provide_midi_ports()
-        midi_in.set_callback(self.process_message)
-
-        y = []
+        # Apply pending parameter changes before reading them back
+        self.get_midi_service().midi_writer.wait_until_empty(1.0)
 
+        reads = []  # (parameter, block0, length)
         for p in self.PARAM_LIST:
-            z = []
             if p != 0 and p != 84:  # Name or DSP name. They will be filled with default values only, so don't need to read
                 for b in range(self.block_count_for_parameter(p)):
-                    length = 0
-                    if p == 87:
-                        length = 15
-                    single_parameter = self.get_single_parameter(midi_out, p, length=length, memory=memory,
-                                                                 category=self.TONE_CATEGORY,
-                                                                 parameter_set=parameter_set, block0=b)
-                    z.append(single_parameter)
+                    reads.append((p, b, 15 if p == 87 else 0))
 
-            y.append(z)
-
-            if self.IS_DEBUG_MODE:
-                print("-----")
+        if self.IS_PIPELINED_READ:
+            values = self.get_parameters_pipelined(reads, category=self.TONE_CATEGORY, memory=memory,
+                                                   parameter_set=parameter_set)
+        else:
+            values = {}
+            for (p, b, length) in reads:
+                values[(p, b)] = self.get_single_parameter(p, length=length, memory=memory,
+                                                           category=self.TONE_CATEGORY,
+                                                           parameter_set=parameter_set, block0=b)
 
         if self.IS_DEBUG_MODE:
             t2 = time.time()
             print("tone_read() function: time elapsed {0:.3f} seconds".format(t2 - t1))
 
-        x = bytearray(b'\x00' * 0x1C8)
-
         # Name
         if new_tone_name:
-            new_tone_name_bytes = new_tone_name.encode('utf-8')
-            x[0x1A6:0x1B6] = new_tone_name_bytes.ljust(16, b' ')
-            x[0x1A6 + 8] = 0x00  # Set the 9th byte in the range to \x00
-        else:
-            x[0x1A6:0x1B6] = b'                '
-
-        for (a, b) in [(0, 0x00), (20, 0x88)]:
-            x[b + 0x00:b + 0x02] = self.to_2b(y[a + 7][0])
-            x[b + 0x02:b + 0x04] = self.to_2b(y[a + 6][0])
-            x[b + 0x04:b + 0x06] = self.to_2b(y[a + 7][1])
-            x[b + 0x06:b + 0x08] = self.to_2b(y[a + 6][1])
-            x[b + 0x08:b + 0x0A] = self.to_2b(y[a + 7][2])
-            x[b + 0x0A:b + 0x0C] = self.to_2b(y[a + 6][2])
-
-            x[b + 0x0C:b + 0x0E] = self.to_2b(y[a + 11][0])
-            x[b + 0x0E:b + 0x10] = self.to_2b(y[a + 10][0])
-            x[b + 0x10:b + 0x12] = self.to_2b(y[a + 11][1])
-            x[b + 0x12:b + 0x14] = self.to_2b(y[a + 10][1])
-            x[b + 0x14:b + 0x16] = self.to_2b(y[a + 11][2])
-            x[b + 0x16:b + 0x18] = self.to_2b(y[a + 10][2])
-            x[b + 0x18:b + 0x1A] = self.to_2b(y[a + 11][3])
-
-            x[b + 0x1A:b + 0x1C] = self.to_2b(y[a + 10][3])
-            x[b + 0x1C:b + 0x1E] = self.to_2b(y[a + 11][4])
-            x[b + 0x1E:b + 0x20] = self.to_2b(y[a + 10][4])
-            x[b + 0x20:b + 0x22] = self.to_2b(y[a + 11][5])
-            x[b + 0x22:b + 0x24] = self.to_2b(y[a + 10][5])
-            x[b + 0x24:b + 0x26] = self.to_2b(y[a + 11][6])
-            x[b + 0x26:b + 0x28] = self.to_2b(y[a + 10][6])
-
-            x[b + 0x7C] = y[a + 8][0]
-            x[b + 0x7D] = y[a + 9][0]
-            x[b + 0x7E:b + 0x7F] = self.to_1b(y[a + 14][0])
-            x[b + 0x7F:b + 0x80] = self.to_1b(y[a + 15][0])
-            x[b + 0x80:b + 0x81] = self.to_1b(y[a + 16][0])
-
-            x[b + 0x28:b + 0x2A] = self.to_2b(y[a + 13][0])
-            x[b + 0x2A:b + 0x2C] = self.to_2b(y[a + 12][0])
-            x[b + 0x2C:b + 0x2E] = self.to_2b(y[a + 13][1])
-            x[b + 0x2E:b + 0x30] = self.to_2b(y[a + 12][1])
-            x[b + 0x30:b + 0x32] = self.to_2b(y[a + 13][2])
-            x[b + 0x32:b + 0x34] = self.to_2b(y[a + 12][2])
-            x[b + 0x34:b + 0x36] = self.to_2b(y[a + 13][3])
-            x[b + 0x36:b + 0x38] = self.to_2b(y[a + 12][3])
-            x[b + 0x38:b + 0x3A] = self.to_2b(y[a + 13][4])
-            x[b + 0x3A:b + 0x3C] = self.to_2b(y[a + 12][4])
-            x[b + 0x3C:b + 0x3E] = self.to_2b(y[a + 13][5])
-            x[b + 0x3E:b + 0x40] = self.to_2b(y[a + 12][5])
-            x[b + 0x40:b + 0x42] = self.to_2b(y[a + 13][6])
-            x[b + 0x42:b + 0x44] = self.to_2b(y[a + 12][6])
-
-            x[b + 0x44:b + 0x46] = self.to_2b(y[a + 18][0])
-            x[b + 0x46:b + 0x48] = self.to_2b(y[a + 17][0])
-            x[b + 0x48:b + 0x4A] = self.to_2b(y[a + 18][1])
-            x[b + 0x4A:b + 0x4C] = self.to_2b(y[a + 17][1])
-            x[b + 0x4C:b + 0x4E] = self.to_2b(y[a + 18][2])
-            x[b + 0x4E:b + 0x50] = self.to_2b(y[a + 17][2])
-            x[b + 0x50:b + 0x52] = self.to_2b(y[a + 18][3])
-            x[b + 0x52:b + 0x54] = self.to_2b(y[a + 17][3])
-            x[b + 0x54:b + 0x56] = self.to_2b(y[a + 18][4])
-            x[b + 0x56:b + 0x58] = self.to_2b(y[a + 17][4])
-            x[b + 0x58:b + 0x5A] = self.to_2b(y[a + 18][5])
-            x[b + 0x5A:b + 0x5C] = self.to_2b(y[a + 17][5])
-            x[b + 0x5C:b + 0x5E] = self.to_2b(y[a + 18][6])
-            x[b + 0x5E:b + 0x60] = self.to_2b(y[a + 17][6])
-
-            x[b + 0x60:b + 0x62] = self.to_2b(y[a + 20][0])
-            x[b + 0x62:b + 0x64] = self.to_2b(y[a + 19][0])
-            x[b + 0x64:b + 0x66] = self.to_2b(y[a + 20][1])
-            x[b + 0x66:b + 0x68] = self.to_2b(y[a + 19][1])
-            x[b + 0x68:b + 0x6A] = self.to_2b(y[a + 20][2])
-            x[b + 0x6A:b + 0x6C] = self.to_2b(y[a + 19][2])
-            x[b + 0x6C:b + 0x6E] = self.to_2b(y[a + 20][3])
-            x[b + 0x6E:b + 0x70] = self.to_2b(y[a + 19][3])
-            x[b + 0x70:b + 0x72] = self.to_2b(y[a + 20][4])
-            x[b + 0x72:b + 0x74] = self.to_2b(y[a + 19][4])
-            x[b + 0x74:b + 0x76] = self.to_2b(y[a + 20][5])
-            x[b + 0x76:b + 0x78] = self.to_2b(y[a + 19][5])
-            x[b + 0x78:b + 0x7A] = self.to_2b(y[a + 20][6])
-            x[b + 0x7A:b + 0x7C] = self.to_2b(y[a + 19][6])
-
-            x[b + 0x82:b + 0x84] = self.to_2b(y[a + 2][0])
-            x[b + 0x84:b + 0x85] = self.to_1b(y[a + 3][0])
-            x[b + 0x85:b + 0x86] = self.to_1b(y[a + 4][0])
-            x[b + 0x86:b + 0x87] = self.to_1b(y[a + 5][0])
-
-            # x[b + 0x87] = y[a + 1][0]
-            # Prevent "ValueError('byte must be in range(0, 256)". Sometimes value was -1.
-            x[b + 0x87] = max(0, min(255, y[a + 1][0]))
-
-        x[0x110] = y[56][0]
-        x[0x111] = y[57][0]
-        x[0x112] = y[58][0]
-        x[0x113] = y[60][0]
-        x[0x114] = y[61][0]
-        x[0x115] = y[62][0]
-        x[0x116] = y[63][0]
-        x[0x117] = y[64][0]
-        x[0x118] = y[65][0]
-
-        x[0x119] = y[67][0]
-        x[0x11A] = y[68][0]
-        x[0x11B] = y[69][0]
-        x[0x11C] = y[70][0]
-
-        x[0x11D] = y[71][0]
-        x[0x11E] = y[72][0]
-        x[0x11F] = y[73][0]
-        x[0x120] = y[74][0]
-
-        x[0x121:0x122] = self.to_1b(y[75][0])
-        x[0x122:0x123] = self.to_1b(y[76][0])
-        x[0x123:0x124] = self.to_1b(y[77][0])
-
-        x[0x180:0x181] = self.to_1b(y[93][0])
-        x[0x181:0x182] = self.to_1b(y[97][0])
-        x[0x182:0x183] = self.to_1b(y[98][0])
-
-        x[0x184:0x188] = struct.pack('<I', y[100][0])
-        x[0x188:0x18C] = struct.pack('<I', y[101][0])
-        x[0x18C] = y[102][0]
-        x[0x18D:0x18E] = self.to_1b(y[103][0])
-        x[0x18E:0x18F] = self.to_1b(y[104][0])
-        x[0x18F:0x190] = self.to_1b(y[105][0])
-        x[0x190:0x194] = struct.pack('<I', y[106][0])
-        x[0x194:0x195] = self.to_1b(y[107][0])
-        x[0x195:0x196] = self.to_1b(y[108][0])
-
-        x[0x1B6:0x1B7] = self.to_1b(y[45][0])
-        x[0x1B7:0x1B8] = self.to_1b(y[46][0])
-        x[0x1B8:0x1B9] = self.to_1b(y[47][0])
-        x[0x1B9:0x1BA] = self.to_1b(y[48][0])
-        x[0x1BA:0x1BB] = self.to_1b(y[49][0])
-        x[0x1BB:0x1BC] = self.to_1b(y[50][0])
-        x[0x1BC:0x1BD] = self.to_1b(y[51][0])
-        x[0x1BD:0x1BE] = self.to_1b(y[52][0])
-        x[0x1BE:0x1BF] = self.to_1b(y[53][0])
-        x[0x1BF:0x1C0] = self.to_1b(y[54][0])
-
-        x[0x1C0:0x1C1] = self.to_1b(y[78][0])
-        x[0x1C1:0x1C2] = self.to_1b(y[79][0])
-
-        x[0x124] = 0xFF  # ?? Always 0xFF but no parameters
-
-        x[0x1C2] = y[123][0]  # parameter 200
-        x[0x1C3] = y[124][0]  # parameter 201
-        x[0x1C4] = y[125][0]  # parameter 202
-        x[0x1C5:0x1C8] = b'\x00\x00\x00'
-
-        # DSP parameters
-        x[0x126:0x136] = b'                '  # Name
-        for j in range(4):
-            dsp = y[85][j]
-            self.check_less(y[86][j], 2)
-            if y[86][j] != 0:
-                dsp += 0x4000
-            x[0x136 + j * 0x12:0x138 + j * 0x12] = struct.pack('<H', dsp)
-            if len(y[87][j]) > 0 and len(y[87][j]) < 16:
-                x[0x138 + j * 0x12:0x138 + len(y[87][j]) + j * 0x12] = y[87][j]
-
-        # Bit field parameters
-        self.check_less(y[109][0], 2)
-
-        if y[109][0]:
-            x[0x196] = 1
-        x[0x197] = y[110][0]
-        x[0x198] = y[111][0]
-        x[0x199] = y[112][0]
-
-        v = 0
-        self.check_less(y[113][0], 16)
-        self.check_less(y[114][0], 2)
-        self.check_less(y[115][0], 2)
-        self.check_less(y[116][0], 4)
-        if y[113][0]:
-            v += (y[113][0] % 16)
-        if y[114][0]:
-            v += 0x10
-        if y[115][0]:
-            v += 0x20
-        v += 0x40 * (y[116][0] % 4)
-        x[0x19A] = v
-
-        v = 0
-        self.check_less(y[92][0], 8)
-        self.check_less(y[94][0], 4)
-        self.check_less(y[95][0], 2)
-        self.check_less(y[96][0], 2)
-        self.check_less(y[99][0], 2)
-        if y[99][0]:
-            v += 1
-        if y[96][0]:
-            v += 0x02
-        if y[95][0]:
-            v += 0x04
-        v += 0x08 * (y[94][0] % 4)
-        v += 0x20 * (y[92][0] % 8)
-        x[0x17E] = v
-
-        v = 0
-        self.check_less(y[88][0], 2)
-        self.check_less(y[89][0], 4)
-        self.check_less(y[90][0], 2)
-        self.check_less(y[91][0], 2)
-        if y[91][0]:
-            v += 0x02
-        if y[90][0]:
-            v += 0x04
-        v += 0x08 * (y[89][0] % 4)
-        if y[88][0]:
-            v += 0x80
-        x[0x17F] = v
-
-        v = 0
-        self.check_less(y[55][0], 2)
-        self.check_less(y[80][0], 16)
-        self.check_less(y[81][0], 2)
-        self.check_less(y[82][0], 2)
-        self.check_less(y[83][0], 2)
-        if y[83][0]:
-            v += 0x01
-        if y[82][0]:
-            v += 0x02
-        if True:  # y[81][0]
-            # Trying to fix the issue where the final v is 139 instead of 143.
-            # This was the reason the tone name was empty in the "CASIO Data Manager for CT-X".
-            v += 0x04
-        v += 0x08 * (y[80][0] % 16)
-        if y[55][0]:
-            v += 0x80
-        x[0x1A4] = v
-
-        v = 0
-        self.check_less(y[41][0], 2)
-        self.check_less(y[42][0], 4)
-        self.check_less(y[43][0], 8)
-        self.check_less(y[44][0], 2)
-        if y[44][0]:
-            v += 0x01
-        v += 2 * (y[43][0] % 8)
-        v += 0x20 * (y[42][0] % 4)
-        if y[41][0]:
-            v += 0x80
-        x[0x1A5] = v
-
-        v = 0
-        self.check_less(y[59][0], 16)
-        self.check_less(y[66][0], 16)
-        v += 16 * (y[59][0] % 16)
-        v += (y[66][0] % 16)
-        x[0x124] = v
-
-        # Filters
-        self.check_less(y[117][0], 16)
-        self.check_less(y[118][0], 64)
-        self.check_less(y[119][0], 64)
-        self.check_less(y[120][0], 16)
-        self.check_less(y[121][0], 2)
-        self.check_less(y[122][0], 8)
-        self.check_less(y[117][1], 16)
-        self.check_less(y[118][1], 64)
-        self.check_less(y[119][1], 64)
-        self.check_less(y[120][1], 16)
-        self.check_less(y[121][1], 2)
-        self.check_less(y[122][1], 8)
-
-        x[0x19C] = (y[117][0] % 16) + 16 * (y[118][0] % 16)
-        x[0x1A0] = (y[117][1] % 16) + 16 * (y[118][1] % 16)
-
-        x[0x19D] = ((y[118][0] // 16) % 4) + 4 * (y[119][0] % 64)
-        x[0x1A1] = ((y[118][1] // 16) % 4) + 4 * (y[119][1] % 64)
-
-        x[0x19E] = (y[122][0] % 8) + 8 * (y[121][0] % 2) + 16 * (y[120][0] % 16)
-        x[0x1A2] = (y[122][1] % 8) + 8 * (y[121][1] % 2) + 16 * (y[120][1] % 16)
-
-        return x
-
-    def get_single_parameter(self, midi_out, parameter, category=3, memory=3, parameter_set=0, block0=0, block1=0,
-                             length=0):
-        global type_1_rxed
-        type_1_rxed = b''
+            values[(0, 0)] = encode_tone_name(new_tone_name)
 
+        return HBR_LAYOUT.encode(values)
+
+    def get_single_parameter(self, parameter, category=3, memory=3, parameter_set=0, block0=0, block1=0,
+                             length=0):
         if length > 0:
             l = length
         else:
@@ -373,40 +273,96 @@ class TyrantMidiService:
         if self.IS_DEBUG_MODE:
             print("Parameter {0} ([{1},{2}])".format(parameter, block1, block0))
             print(f"packet: {packet.hex()}")
-        midi_out.send_message(bytearray(packet))
-        time.sleep(0.01)
+        with BulkSession(self.get_midi_service(), BulkSession.READ_PACKET_TYPES) as session:
+            session.send_packet(packet, MidiLane.SYNC)
+            time.sleep(0.01)
+
+        return self.decode_parameter_value(session.type_1_rxed, length)
+
+    def get_parameters_pipelined(self, reads, category=3, memory=3, parameter_set=0):
+        """
+        Read many single parameters with up to READ_WINDOW requests in flight.
 
-        # Decode the response. Value of "length" determines whether to regard it as a string or a number.
+        Replies are tagged by parameter and block, so they may arrive in any order. A read without
+        a reply is retried READ_RETRIES times, after that SysexTimeoutError is raised: a late reply is never
+        silently decoded as -1 or b''.
+
+        Args:
+            reads: List of (parameter, block0, length) tuples.
+
+        Returns:
+            Dictionary (parameter, block0) -> decoded value.
+        """
+        midi_service = self.get_midi_service()
+        request_engine = ParameterRequestEngine(
+            lambda packet: midi_service.send_packet(packet, MidiLane.SYNC, with_future=True),
+            window_size=self.READ_WINDOW, timeout=self.READ_TIMEOUT, monitor=midi_service.latency_monitor)
+        values = {}
+        with BulkSession(midi_service, BulkSession.READ_PACKET_TYPES, request_engine):
+            remaining = reads
+            for attempt in range(self.READ_RETRIES + 1):
+                futures = []
+                for (p, b, length) in remaining:
+                    packet = self.make_packet(parameter_set=parameter_set, category=category, memory=memory,
+                                              parameter=p, block=[0, 0, 0, b], length=max(1, length))
+                    key = ParameterRequestEngine.make_key(category, memory, parameter_set, b, p)
+                    futures.append(((p, b, length), request_engine.submit(key, packet)))
+
+                request_engine.wait_until_idle(self.READ_TIMEOUT * (len(remaining) + 1))
+
+                remaining = []
+                for (p, b, length), future in futures:
+                    if future.done() and future.exception() is None and len(future.result()) > 0:
+                        values[(p, b)] = self.decode_parameter_value(future.result(), length)
+                    else:
+                        future.cancel()
+                        remaining.append((p, b, length))
+
+                if not remaining:
+                    break
+                if self.IS_DEBUG_MODE:
+                    print(f"Attempt {attempt + 1}: no reply for {[(p, b) for (p, b, _) in remaining]}")
+
+        if remaining:
+            missing = ", ".join(f"{p} (block {b})" for (p, b, _) in remaining)
+            raise self.SysexTimeoutError(f"No reply within {self.READ_TIMEOUT}s for parameter(s): {missing}")
+        return values
+
+    @staticmethod
+    def decode_parameter_value(data, length=0):
+        """
+        Decode the response. Value of "length" determines whether to regard it as a string or a number.
+        """
         if length > 0:
             # Regard the response as a string
-            if len(type_1_rxed) > 0:  # should maybe check this is equal to length??
-                return type_1_rxed
+            if len(data) > 0:  # should maybe check this is equal to length??
+                return data
             else:
                 return b''  # Error! Nothing read
         else:
             # Regard the response as a number
             f = -1
-            if len(type_1_rxed) > 0:
+            if len(data) > 0:
                 # A number has been received. Decode it.
-                if len(type_1_rxed) == 1:
-                    f = struct.unpack('<B', type_1_rxed)[0]
-                elif len(type_1_rxed) == 2:
-                    g = struct.unpack('<2B', type_1_rxed)
+                if len(data) == 1:
+                    f = struct.unpack('<B', data)[0]
+                elif len(data) == 2:
+                    g = struct.unpack('<2B', data)
                     if g[0] >= 128 or g[1] >= 128:
                         raise Exception("Invalid packed value")
                     f = g[0] + 128 * g[1]
-                elif len(type_1_rxed) == 3:
-                    g = struct.unpack('<3B', type_1_rxed)
+                elif len(data) == 3:
+                    g = struct.unpack('<3B', data)
                     if g[0] >= 128 or g[1] >= 128 or g[2] >= 128:
                         raise Exception("Invalid packed value")
                     f = g[0] + 128 * g[1] + 128 * 128 * g[2]
-                elif len(type_1_rxed) == 4:
-                    g = struct.unpack('<4B', type_1_rxed)
+                elif len(data) == 4:
+                    g = struct.unpack('<4B', data)
                     if g[0] >= 128 or g[1] >= 128 or g[2] >= 128 or g[3] >= 128:
                         raise Exception("Invalid packed value")
                     f = g[0] + 128 * g[1] + 128 * 128 * g[2] + 128 * 128 * 128 * g[3]
-                elif len(type_1_rxed) == 5:
-                    g = struct.unpack('<5B', type_1_rxed)
+                elif len(data) == 5:
+                    g = struct.unpack('<5B', data)
                     if g[0] >= 128 or g[1] >= 128 or g[2] >= 128 or g[3] >= 128 or g[4] >= 16:
                         raise Exception("Invalid packed value")
                     f = g[0] + 128 * g[1] + 128 * 128 * g[2] + 128 * 128 * 128 * g[3] + 128 * 128 * 128 * 128 * g[4]
@@ -420,44 +376,55 @@ class TyrantMidiService:
         Original name: download_ac7_internal
         Request and receive a complete parameter set from the keyboard.
         """
-        global have_got_ack, have_got_ess, total_rxed
-        total_rxed = b''
+        return self.bulk_download_many([param_set], memory=memory, category=category)[param_set]
 
-        # Get MIDI ports and replace callback
-        midi_in, midi_out = MidiService.get_instance().provide_midi_ports()
-        midi_in.set_callback(self.process_message)
+    def bulk_download_many(self, param_sets, memory=1, category=30):
+        """
+        Receive several parameter sets from the keyboard in one bulk session: a single SBS/EBS handshake,
+        with one HBR request per parameter set.
 
-        # Send SBS (Start Bulk Send) command and wait for ACK
-        sbs_packet = self.make_packet(command=8, sub_command=2)
-        if self.IS_DEBUG_MODE:
-            print(f"SBS packet: {sbs_packet.hex()}")
-        have_got_ack = False
-        midi_out.send_message(bytearray(sbs_packet))
-        self.wait_for_ack()
+        Args:
+            param_sets: Parameter set numbers (0-99 for User Tone numbers 801-900).
 
-        # Send HBR command
-        hbr_packet = self.make_packet(command=4, parameter_set=param_set, category=category, memory=memory)
-        if self.IS_DEBUG_MODE:
-            print(f"HBR packet: {hbr_packet.hex()}")
-        midi_out.send_message(bytearray(hbr_packet))
+        Returns:
+            Dictionary parameter set -> received data.
+        """
+        results = {}
+        if not param_sets:
+            return results
+        with self.transfer_lock, self.user_tone_cache.batch(), BulkSession(self.get_midi_service()) as session:
+            # Send SBS (Start Bulk Send) command and wait for ACK
+            self.start_bulk_session(session, sub_command=2)
+
+            for param_set in param_sets:
+                # Send HBR command
+                hbr_packet = self.make_packet(command=4, parameter_set=param_set, category=category, memory=memory)
+                if self.IS_DEBUG_MODE:
+                    print(f"HBR packet: {hbr_packet.hex()}")
+                session.total_rxed = b''
+                session.have_got_ess = False
+                session.expect_ack()
+                session.send_packet(hbr_packet)
+
+                while not session.have_got_ess:
+                    self.wait_for_ack(session)
+                    pkt = self.make_packet(parameter_set=param_set, category=category, memory=memory, command=0x0A)
+                    if self.IS_DEBUG_MODE:
+                        print(f"packet: {pkt.hex()}")
+                    session.expect_ack()
+                    session.send_packet(pkt)
 
-        have_got_ess = False
+                results[param_set] = session.total_rxed
+                if self.is_user_tone(memory, category):
+                    self.user_tone_cache.put(param_set, session.total_rxed)
 
-        while not have_got_ess:
-            have_got_ack = False
-            self.wait_for_ack()
-            pkt = self.make_packet(parameter_set=param_set, category=category, memory=memory, command=0x0A)
+            # Send EBS (End Bulk Send) - No ACK expected
+            esb_packet = self.make_packet(parameter_set=param_set, category=category, memory=memory, command=0x0E)
             if self.IS_DEBUG_MODE:
-                print(f"packet: {pkt.hex()}")
-            midi_out.send_message(bytearray(pkt))
-
-        # Send EBS (End Bulk Send) - No ACK expected
-        esb_packet = self.make_packet(parameter_set=param_set, category=category, memory=memory, command=0x0E)
-        if self.IS_DEBUG_MODE:
-            print(f"ESB packet: {esb_packet.hex()}")
-        midi_out.send_message(bytearray(esb_packet))
-        time.sleep(0.3)
-        return total_rxed
+                print(f"ESB packet: {esb_packet.hex()}")
+            session.send_packet(esb_packet)
+            self.ready_at = time.monotonic() + self.settle_time  # waited for before the next session only
+        return results
 
     def bulk_upload(self, param_set, data, memory=1, category=30):
         """
@@ -474,53 +441,123 @@ class TyrantMidiService:
         Raises:
             Exception: If MIDI ports cannot be opened or communication fails.
         """
-        global have_got_ack
+        self.bulk_upload_many({param_set: data}, memory=memory, category=category)
 
-        # Get MIDI ports and replace callback
-        midi_in, midi_out = MidiService.get_instance().provide_midi_ports()
-        midi_in.set_callback(self.process_message)
+    def bulk_upload_many(self, data_by_param_set, memory=1, category=30):
+        """
+        Upload several parameter sets to the keyboard in one bulk session: a single SBS/EBS handshake,
+        with the data packets and ESS of every parameter set in between.
 
-        # Send SBS (Start Bulk Send) command and wait for ACK
-        sbs_packet = self.make_packet(command=8, sub_command=3)
-        if self.IS_DEBUG_MODE:
-            print(f"> SBS Packet: {sbs_packet.hex(' ').upper()}")
-        have_got_ack = False
-        midi_out.send_message(bytearray(sbs_packet))
-        self.wait_for_ack()
-
-        # Send data in chunks of up to 0x80 bytes
-        i = 0
-        while i < len(data):
-            len_remaining = min(0x80, len(data) - i)
-            data_packet = self.make_packet(
-                parameter_set=param_set,
-                category=category,
-                memory=memory,
-                command=5,
-                length=len_remaining,
-                data=data[i:i + len_remaining]
-            )
+        Args:
+            data_by_param_set: Dictionary parameter set number -> data, uploaded in the dictionary order.
+        """
+        if not data_by_param_set:
+            return
+        with self.transfer_lock, self.user_tone_cache.batch(), BulkSession(self.get_midi_service()) as session:
+            # Send SBS (Start Bulk Send) command and wait for ACK
+            self.start_bulk_session(session, sub_command=3)
+
+            for param_set, data in data_by_param_set.items():
+                self.wait_until_ready()  # the previous ESS may need some time
+                if self.is_user_tone(memory, category):
+                    self.user_tone_cache.invalidate(param_set)  # unknown if the upload fails halfway
+
+                # Send data in chunks of up to 0x80 bytes
+                got_busy = False
+                i = 0
+                while i < len(data):
+                    len_remaining = min(0x80, len(data) - i)
+                    data_packet = self.make_packet(
+                        parameter_set=param_set,
+                        category=category,
+                        memory=memory,
+                        command=5,
+                        length=len_remaining,
+                        data=data[i:i + len_remaining]
+                    )
+                    if self.IS_DEBUG_MODE:
+                        print(f"> Data Packet (offset {i}): {data_packet.hex(' ').upper()}")
+                    session.expect_ack()
+                    session.send_packet(data_packet)
+                    self.wait_for_ack(session)
+                    got_busy = got_busy or session.got_busy
+
+                    i += len_remaining
+
+                # Send ESS (End Send Session) - No ACK expected
+                ess_packet = self.make_packet(parameter_set=param_set, category=category, memory=memory, command=0xD)
+                if self.IS_DEBUG_MODE:
+                    print(f"> ESS Packet: {ess_packet.hex(' ').upper()}")
+                session.send_packet(ess_packet)
+                if self.is_user_tone(memory, category):
+                    self.user_tone_cache.put(param_set, data)
+                self.adapt_settle_time(got_busy)
+                self.ready_at = time.monotonic() + self.settle_time
+
+            # Send EBS (End Bulk Send) - No ACK expected
+            ebs_packet = self.make_packet(parameter_set=param_set, category=category, memory=memory, command=0xE)
             if self.IS_DEBUG_MODE:
-                print(f"> Data Packet (offset {i}): {data_packet.hex(' ').upper()}")
-            have_got_ack = False
-            midi_out.send_message(bytearray(data_packet))
-            self.wait_for_ack()
+                print(f"> EBS Packet: {ebs_packet.hex(' ').upper()}")
+            self.wait_until_ready()
+            session.send_packet(ebs_packet)
+            self.ready_at = time.monotonic() + self.settle_time  # waited for before the next session only
+
+    def start_bulk_session(self, session: BulkSession, sub_command):
+        """
+        Send SBS (Start Bulk Send) and wait for its ACK.
 
-            i += len_remaining
+        The keyboard needs some time after ESS/EBS before it accepts a new session. Instead of a fixed delay,
+        the settle time is learned: it is doubled when the keyboard answers busy, and halved when the session
+        starts (or a parameter set is uploaded) without a busy reply. It is never halved below the shortest
+        settle time that has worked: an SBS without an answer raises that floor to twice the failed settle time.
+        An unanswered SBS is resent up to BULK_SBS_RETRIES times, each time after the doubled settle time.
+        """
+        sbs_packet = self.make_packet(command=8, sub_command=sub_command)
+        for attempt in range(BULK_SBS_RETRIES + 1):
+            if self.IS_DEBUG_MODE:
+                print(f"> SBS Packet: {sbs_packet.hex(' ').upper()}")
+            self.wait_until_ready()
+            session.expect_ack()
+            session.send_packet(sbs_packet)
+            try:
+                self.wait_for_ack(session)
+                break
+            except self.SysexTimeoutError:
+                # The keyboard was not ready yet: the previous settle time is the shortest one seen to work
+                self.settle_time_floor = min(BULK_SETTLE_TIME, max(self.settle_time_floor, self.settle_time * 2))
+                self.settle_time = min(BULK_SETTLE_TIME, self.settle_time * 2)
+                if attempt == BULK_SBS_RETRIES:
+                    raise
+                self.ready_at = time.monotonic() + self.settle_time
+
+        self.adapt_settle_time(session.got_busy)
+
+    def adapt_settle_time(self, got_busy):
+        if got_busy:
+            self.settle_time = min(BULK_SETTLE_TIME, self.settle_time * 2)
+        else:
+            self.settle_time = max(self.settle_time_floor, self.settle_time / 2)
 
-        # Send ESS (End Send Session) - No ACK expected
-        ess_packet = self.make_packet(parameter_set=param_set, category=category, memory=memory, command=0xD)
-        if self.IS_DEBUG_MODE:
-            print(f"> ESS Packet: {ess_packet.hex(' ').upper()}")
-        midi_out.send_message(bytearray(ess_packet))
-        time.sleep(0.3)
+    def wait_until_ready(self):
+        delay = self.ready_at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
 
-        # Send EBS (End Bulk Send) - No ACK expected
-        ebs_packet = self.make_packet(parameter_set=param_set, category=category, memory=memory, command=0xE)
-        if self.IS_DEBUG_MODE:
-            print(f"> EBS Packet: {ebs_packet.hex(' ').upper()}")
-        midi_out.send_message(bytearray(ebs_packet))
-        time.sleep(0.3)
+    def wait_for_ack(self, session: BulkSession):
+        """
+        Wait for an ACK packet from the MIDI port. Woken up by the session as soon as the ACK arrives.
+        Raises a SysexTimeoutError if no ACK is received within "ack_timeout" seconds.
+        """
+        if not session.wait_for_ack(self.ack_timeout):
+            if self.IS_DEBUG_MODE:
+                print("have_got_ack: timeout...")
+            raise self.SysexTimeoutError("SYSEX communication timed out.")
+
+    def is_user_tone(self, memory, category) -> bool:
+        return memory == 1 and category == self.TONE_CATEGORY
+
+    def get_midi_service(self) -> MidiService:
+        return self.midi_service or MidiService.get_instance()
 
     def make_packet(self, tx=False, category=30, memory=1, parameter_set=0,
                     block=None, parameter=0, index=0, length=1, command=-1,
@@ -567,232 +604,26 @@ class TyrantMidiService:
 
         return packet + b'\xf7'
 
-    def wait_for_ack(self):
-        """
-        Wait for an ACK packet from the MIDI port.
-        Raises a SysexTimeoutError if no ACK is received within 4 seconds.
-        """
-        global have_got_ack
-        start_time = time.monotonic()
-
-        while have_got_ack is False:
-            if time.monotonic() > start_time + 4.0:
-                if self.IS_DEBUG_MODE:
-                    print("have_got_ack: timeout...")
-                raise self.SysexTimeoutError("SYSEX communication timed out.")
-            time.sleep(0.02)
-
-    def process_message(self, message, _):
-        message, deltatime = message
-        if self.IS_DEBUG_MODE:
-            print(f"MIDI IN message: {message}")
-        self.parse_response(bytes(message))
-
-    def parse_response(self, data):
-        """
-        Parse bytes received from the MIDI port, collating them into SYSEX packets.
-
-        Parameters:
-            data (bytes): The incoming MIDI data.
-        """
-        global so_far
-
-        in_packet = bool(so_far)  # Determine if already in a packet
-
-        for byte in data:
-            if in_packet:
-                if byte == 0xF7:  # End of SYSEX packet
-                    so_far += b'\xF7'
-                    if self.IS_DEBUG_MODE:
-                        print("so_far: " + so_far.hex(" ").upper())
-                    self.handle_pkt(so_far)
-                    so_far = b''  # Reset packet buffer
-                    in_packet = False
-                elif byte == 0xF0:  # Unexpected start of a new SYSEX packet
-                    # Reset and start a new packet
-                    so_far = b'\xF0'
-                elif byte >= 0x80:  # Invalid MIDI data in a packet
-                    # Error: Reset state
-                    so_far = b''
-                    in_packet = False
-                else:
-                    # Append valid data to the packet
-                    so_far += bytes([byte])
-            else:
-                if byte == 0xF0:  # Start of a new SYSEX packet
-                    so_far = b'\xF0'
-                    in_packet = True
-
-    def handle_pkt(self, packet):
-        """
-        Handle a complete packet as received from the MIDI port.
-        It is assumed that each packet is in Casio SYSEX format.
-        """
-        global is_busy, must_send_ack, have_got_ack, have_got_ess, total_rxed, type_1_rxed
-
-        if self.IS_DEBUG_MODE:
-            print(f"packet received: {packet.hex()}")
-
-        # Validate packet length
-        if len(packet) < 7:
-            print("BAD PACKET!!")
-            return
-
-        # Validate packet structure
-        if not (packet[0] == 0xF0 and packet[1] == 0x44 and packet[4] == 0x7F and packet[-1] == 0xF7):
-            print("BAD PACKET!!")
-            return
-
-        # Extract packet type
-        packet_type = packet[5]
-
-        # Handle different packet types
-        if packet_type == 0x0B:  # Busy signal
-            is_busy = True
-            return
-        else:
-            is_busy = False
-            if packet_type == 0x0A:  # ACK
-                have_got_ack = True
-            elif packet_type == 0x0D:  # ESS
-                have_got_ack = True
-                have_got_ess = True
-
-        # Handle CRC-validated packets
-        if packet_type in (0x03, 0x05):  # Packets requiring CRC
-            crc_received = self._extract_crc(packet)
-            crc_calculated = binascii.crc32(packet[1:-6])
-
-            if crc_calculated == crc_received:
-                must_send_ack = True
-                if packet_type == 0x05:  # Packet with data
-                    have_got_ack = True
-                    data = self.midi_7bit_to_8bit(packet[12:-6])
-                    total_rxed += data
-            else:
-                print("BAD CRC!!!")
-
-        # Handle type 1 packets
-        if packet_type == 0x01:
-            type_1_rxed = packet[24:-1]
-
     @staticmethod
     def midi_8bit_to_7bit(b):
         """
         Encode to MIDI "7-bit format", which requires the MSb of each byte to be zero.
         """
-
-        r = 0  # remainder
-        n = 0  # position of split
-        i = 0  # pointer to input
-        c = b''  # output
-
-        while i < len(b):
-            if n == 0 or n == 7:
-                n = 0
-                c += struct.pack('<B', 0x1 * (b[i] & 0x7f))
-                r = (b[i] & 0x80) // 0x80
-            elif n == 1:
-                c += struct.pack('<B', r + 0x2 * (b[i] & 0x3f))
-                r = (b[i] & 0xc0) // 0x40
-            elif n == 2:
-                c += struct.pack('<B', r + 0x4 * (b[i] & 0x1f))
-                r = (b[i] & 0xe0) // 0x20
-            elif n == 3:
-                c += struct.pack('<B', r + 0x8 * (b[i] & 0x0f))
-                r = (b[i] & 0xf0) // 0x10
-            elif n == 4:
-                c += struct.pack('<B', r + 0x10 * (b[i] & 0x07))
-                r = (b[i] & 0xf8) // 0x8
-            elif n == 5:
-                c += struct.pack('<B', r + 0x20 * (b[i] & 0x03))
-                r = (b[i] & 0xfc) // 0x4
-            elif n == 6:
-                c += struct.pack('<B', r + 0x40 * (b[i] & 0x01))
-                c += struct.pack('<B', (b[i] & 0xfe) // 0x2)
-                r = 0
-            n += 1
-            i += 1
-        if n < 7:
-            c += struct.pack('<B', r)
-        return c
+        return midi_codec.encode_7bit(b)
 
     @staticmethod
     def midi_7bit_to_8bit(b):
         """
         Decode from MIDI "7-bit format", which requires the MSb of each byte to be zero.
         """
-
-        r = 0  # remainder
-        n = 0  # position of split
-        i = 0  # pointer to input
-        c = b''  # output
-
-        while i < len(b):
-            x = b[i]
-
-            if x >= 128:
-                raise Exception("Not valid 7-bit data at position {0} : {1:02X}!".format(i, x))
-
-            if n == 0 or n == 8:
-                r = x
-                n = 0
-            elif n == 1:
-                c += struct.pack('<B', ((x & 0x01) << 7) + r)
-                r = x // 2
-            elif n == 2:
-                c += struct.pack('<B', ((x & 0x03) << 6) + r)
-                r = x // 4
-            elif n == 3:
-                c += struct.pack('<B', ((x & 0x07) << 5) + r)
-                r = x // 8
-            elif n == 4:
-                c += struct.pack('<B', ((x & 0x0f) << 4) + r)
-                r = x // 16
-            elif n == 5:
-                c += struct.pack('<B', ((x & 0x1f) << 3) + r)
-                r = x // 32
-            elif n == 6:
-                c += struct.pack('<B', ((x & 0x3f) << 2) + r)
-                r = x // 64
-            elif n == 7:
-                c += struct.pack('<B', ((x & 0x7f) << 1) + r)
-                r = 0
-            i += 1
-            n += 1
-        if r != 0:
-            raise Exception("Left over data! Probably an error")
-
-        return c
-
-    @staticmethod
-    def to_1b(v):
-        """
-        Number to single-byte parameter
-        """
-        return struct.pack('B', v)
-
-    @staticmethod
-    def to_2b(v):
-        """
-        Number to dual-byte parameter
-        """
-        # return struct.pack('2B', v//128, v%128)
-        return struct.pack('<H', v)
-
-    @staticmethod
-    def check_less(v, mx):
-        if v >= mx:
-            # print(v)
-            raise Exception
+        return midi_codec.decode_7bit(b)
 
     @staticmethod
     def _extract_crc(packet):
         """
         Extract the CRC from a packet.
         """
-        crc_bytes = struct.unpack('<5B', packet[-6:-1])
-        return sum(crc_bytes[i] << (7 * i) for i in range(5))
+        return sum(packet[i - 6] << (7 * i) for i in range(5))
 
     @staticmethod
     def block_count_for_parameter(p):
@@ -823,41 +654,8 @@ class TyrantMidiService:
 
     @staticmethod
     def wrap_tone_file(x):
-        y = b'CT-X3000'
-        y += struct.pack('<2I', 0, 0)
-        y += b'TONH'
-        y += struct.pack('<3I', 0, binascii.crc32(x), len(x))
-        y += x
-        y += b'EODA'
-        return y
+        return tone_codec.wrap_tone_file(x)
 
     @staticmethod
     def unwrap_tone_file(y):
-        # Ensure that 'y' is a bytes object
-        if not isinstance(y, bytes):
-            raise ValueError("Expected a bytes object")
-
-        # Check for the expected start and end markers
-        if not y.startswith(b'CT-X') or not y.endswith(b'EODA'):
-            raise ValueError("Invalid tone file format")
-
-        # Remove the 'EODA' footer before proceeding
-        y = y[:-4]  # Remove the 'EODA' footer (length of 'EODA' is 4 bytes)
-
-        # Skip the 'CT-X3000' prefix and read the next parts
-        offset = len(b'CT-X3000') + struct.calcsize('<2I')  # Skip CT-X3000 + 2 ints (0,0)
-        if y[offset:offset + 4] != b'TONH':
-            raise ValueError("Invalid tone file format: missing TONH")
-
-        # Unpack the 3 integers (we expect CRC, length, and 0) from the "TONH" section
-        crc, length, _ = struct.unpack('<3I', y[offset + 4:offset + 16])  # Unpacking 3 integers
-
-        # Now extract the actual data
-        actual_data = y[offset + 16:offset + 16 + length]
-
-        # Enforce exact file length (without 'EODA')
-        expected_length = 0x1C8  # 456 bytes
-        if len(actual_data) != expected_length:
-            raise ValueError(f"Invalid tone file length: expected {expected_length} bytes, got {len(y)} bytes")
-
-        return bytearray(actual_data)
+        return tone_codec.unwrap_tone_file(y)
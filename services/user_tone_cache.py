@@ -0,0 +1,218 @@
+import binascii
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import NamedTuple
+
+TONE_NAME_OFFSET = 0x1A6
+TONE_NAME_LENGTH = 16
+INDEX_FILENAME = "index.json"
+
+
+class UserToneCache:
+    """
+    Images of the user tone slots (parameter set 0-99 -> tone data), as last downloaded from or uploaded to
+    the keyboard. Lets the tone manager skip downloads of known slots and uploads that would change nothing.
+
+    With a directory, the cache is persistent and content-addressed: every image is stored once, as
+    "<crc32>.bin" (the CRC32 that wrap_tone_file writes into .ton files), and "index.json" maps the slots
+    to the CRC32 of their image.
+
+    A stored image is only served ("get", "get_many") once it has been validated in the current MIDI port
+    session: either its tone name matches the name reported by the keyboard ("validate_name"), or the slot
+    has been transferred in this session ("put"). A slot whose name differs has been changed elsewhere and
+    is dropped. "reset_validation" starts a new port session: the keyboard may have changed in between.
+
+    Within "batch()", the index is written (and unreferenced images removed) once, when the batch ends.
+    """
+
+    def __init__(self, directory: str = None):
+        self.directory = directory  # None: in memory only
+        self._lock = threading.Lock()
+        self._images = None  # slot -> tone data, loaded on first use
+        self._validated = set()  # slots whose image is valid in the current port session
+        self._batch_depth = 0
+        self._is_index_changed = False
+
+    def get(self, slot: int):
+        with self._lock:
+            return self._load().get(slot) if slot in self._validated else None
+
+    def get_many(self, slots) -> dict:
+        """Validated images of the given slots; unknown and unvalidated slots are left out."""
+        with self._lock:
+            images = self._load()
+            return {slot: images[slot] for slot in slots if slot in images and slot in self._validated}
+
+    def put(self, slot: int, tone_data):
+        tone_data = bytes(tone_data)
+        with self._lock:
+            images = self._load()
+            self._validated.add(slot)
+            if images.get(slot) == tone_data:
+                return
+            images[slot] = tone_data
+            self._save_image(tone_data)
+            self._index_changed()
+
+    def invalidate(self, slot: int):
+        with self._lock:
+            self._validated.discard(slot)
+            if self._load().pop(slot, None) is not None:
+                self._index_changed()
+
+    def validate_name(self, slot: int, tone_name: str) -> bool:
+        """
+        Drop the image of a slot if its tone name differs from "tone_name" (as reported by the keyboard),
+        otherwise mark it as valid in the current port session. Returns True if a valid image is cached.
+        """
+        with self._lock:
+            tone_data = self._load().get(slot)
+            if tone_data is None:
+                return False
+            if self.tone_name(tone_data) == tone_name:
+                self._validated.add(slot)
+                return True
+            del self._images[slot]
+            self._validated.discard(slot)
+            self._index_changed()
+            return False
+
+    def reset_validation(self):
+        """New port session: stored images are not served until they have been validated again."""
+        with self._lock:
+            self._validated.clear()
+
+    def clear(self):
+        with self._lock:
+            self._images = {}
+            self._validated.clear()
+            self._index_changed()
+
+    @contextmanager
+    def batch(self):
+        """Defer the index writes of a bulk operation: the index is saved once, at the end (also on errors)."""
+        with self._lock:
+            self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+                if self._batch_depth == 0 and self._is_index_changed:
+                    self._save_index()
+
+    @staticmethod
+    def tone_name(tone_data) -> str:
+        """Tone name as displayed in the tone manager."""
+        name = tone_data[TONE_NAME_OFFSET:TONE_NAME_OFFSET + TONE_NAME_LENGTH]
+        return ''.join(chr(i) for i in name if chr(i).isprintable()).strip()
+
+    def _load(self) -> dict:
+        # Must be called with the lock held
+        if self._images is not None:
+            return self._images
+
+        self._images = {}
+        if not self.directory:
+            return self._images
+        try:
+            with open(os.path.join(self.directory, INDEX_FILENAME), "r") as index_file:
+                index = json.load(index_file)
+        except (OSError, ValueError):
+            return self._images  # no cache yet, or unreadable: start empty
+
+        for slot, crc in index.items():
+            try:
+                with open(self._image_path(int(crc, 16)), "rb") as image_file:
+                    tone_data = image_file.read()
+            except (OSError, ValueError):
+                continue
+            if binascii.crc32(tone_data) == int(crc, 16):  # content-addressed: the name is the checksum
+                self._images[int(slot)] = tone_data
+        return self._images
+
+    def _save_image(self, tone_data: bytes):
+        if not self.directory:
+            return
+        path = self._image_path(binascii.crc32(tone_data))
+        if not os.path.exists(path):
+            os.makedirs(self.directory, exist_ok=True)
+            self._write_atomic(path, tone_data)
+
+    def _index_changed(self):
+        # Must be called with the lock held
+        self._is_index_changed = True
+        if self._batch_depth == 0:
+            self._save_index()
+
+    def _save_index(self):
+        # Must be called with the lock held
+        self._is_index_changed = False
+        if not self.directory:
+            return
+        index = {str(slot): f"{binascii.crc32(tone_data):08x}" for slot, tone_data in sorted(self._images.items())}
+        os.makedirs(self.directory, exist_ok=True)
+        self._write_atomic(os.path.join(self.directory, INDEX_FILENAME), json.dumps(index, indent=1).encode())
+
+        # Remove images that no slot refers to any more
+        referenced = {f"{crc}.bin" for crc in index.values()}
+        for file_name in os.listdir(self.directory):
+            if file_name.endswith(".bin") and file_name not in referenced:
+                os.remove(os.path.join(self.directory, file_name))
+
+    def _image_path(self, crc: int) -> str:
+        return os.path.join(self.directory, f"{crc:08x}.bin")
+
+    @staticmethod
+    def _write_atomic(path: str, data: bytes):
+        temp_path = path + ".tmp"
+        with open(temp_path, "wb") as file:
+            file.write(data)
+        os.replace(temp_path, path)  # a crash never leaves a truncated file behind
+
+
+class SlotWriteReport(NamedTuple):
+    written: list  # tone numbers uploaded
+    skipped: list  # tone numbers not uploaded: the slot already held the same bytes
+    verified: list  # written tone numbers read back with identical bytes
+    mismatched: list  # written tone numbers read back with different bytes
+
+    def __str__(self):
+        text = f"{len(self.written)} written, {len(self.skipped)} unchanged"
+        if self.verified or self.mismatched:
+            text += f", {len(self.verified)} verified, {len(self.mismatched)} mismatched"
+        return text
+
+
+def plan_slot_writes(layout: dict, images: dict) -> dict:
+    """
+    Minimal set of uploads that turns the current user memory into the desired layout.
+
+    Args:
+        layout: Target slot -> source slot whose current tone it should hold, or the tone data itself.
+            Slots which are not in the layout keep their tone.
+        images: Current contents of the slots (slot -> tone data). Must contain every source slot;
+            target slots without an image are always written.
+
+    Returns:
+        Dictionary target slot -> tone data, only for the slots whose bytes would change.
+    """
+    writes = {}
+    for target, source in layout.items():
+        if isinstance(source, int):
+            if source == target:
+                continue
+            tone_data = images[source]
+        else:
+            tone_data = bytes(source)
+
+        if images.get(target) != tone_data:
+            writes[target] = tone_data
+    return writes
+
+
+def required_slots(layout: dict) -> set:
+    """Source slots whose current contents are needed to plan the layout."""
+    return {source for target, source in layout.items() if isinstance(source, int) and source != target}
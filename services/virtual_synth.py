@@ -0,0 +1,351 @@
+"""
+In-process emulator of a Casio CT-X keyboard, used as a MIDI stand-in when no physical synthesizer is connected
+(benchmarks, regression tests of synchronization speed).
+
+Emulated protocols:
+    - memory 3 (current tone) single parameters: requests and changes, including the tone name,
+      DSP modules (85) and DSP parameters (87), and category 2 performance parameters;
+    - memory 1 (user area) tone names of the 100 user tones;
+    - bulk transfers of user tones: SBS / HBR / data packets with CRC / ACK / ESS / EBS,
+      as produced by TyrantMidiService.make_packet and expected by TyrantMidiService.handle_pkt.
+
+Latency, busy (0x0B) replies and packet loss are configurable.
+"""
+
+import binascii
+import heapq
+import itertools
+import random
+import struct
+import threading
+import time
+
+from constants.constants import EMPTY_TONE, INTERNAL_MEMORY_USER_TONE_COUNT, SHORT_PARAMS, VIRTUAL_SYNTH_PORT_NAME
+from constants.enums import SysexType, Size
+from models.tone import Tone
+from services.tyrant_midi_service import TyrantMidiService
+
+DEVICE_ID = b'\x44\x19\x01\x7F'
+
+COMMAND_REQUEST = 0x00
+COMMAND_SET = 0x01
+COMMAND_HBR = 0x04
+COMMAND_DATA = 0x05
+COMMAND_SBS = 0x08
+COMMAND_ACK = 0x0A
+COMMAND_BUSY = 0x0B
+COMMAND_ESS = 0x0D
+COMMAND_EBS = 0x0E
+
+SBS_DOWNLOAD = 2  # keyboard sends data to the computer
+SBS_UPLOAD = 3  # computer sends data to the keyboard
+
+MEMORY_1 = 1
+MEMORY_3 = 3
+TONE_NAME_OFFSET = 0x1A6  # in a user tone (HBR) image
+BULK_CHUNK_SIZE = 0x80
+
+# Parameters answered with a single value byte, as expected by MidiService
+_tone = Tone()
+VIRTUAL_SHORT_PARAMS = frozenset([234, 237] + [param.param_number
+                                               for param in _tone.main_parameter_list + _tone.advanced_parameter_list
+                                               if param.name in SHORT_PARAMS])
+
+
+class VirtualSynth:
+    """
+    Emulated CT-X keyboard. Messages sent by the computer are passed to "receive"; replies are delivered
+    after "latency" seconds to every connected output (see "open_ports" and "open_rtmidi_port").
+
+    Args:
+        latency: Seconds between a received message and its reply.
+        busy_probability: Chance that a bulk transfer packet is answered with a busy (0x0B) packet first;
+            the real reply follows after "busy_time" seconds.
+        loss_probability: Chance that a received message is lost (never answered).
+        not_ready_time: Seconds after ESS/EBS during which an SBS is ignored, like a keyboard that is still busy
+            storing the received data.
+        seed: Random seed, for repeatable busy replies and packet loss.
+    """
+
+    def __init__(self, latency: float = 0.0, busy_probability: float = 0.0, busy_time: float = 0.05,
+                 loss_probability: float = 0.0, not_ready_time: float = 0.0, seed=None):
+        self.latency = latency
+        self.busy_probability = busy_probability
+        self.busy_time = busy_time
+        self.loss_probability = loss_probability
+        self.not_ready_time = not_ready_time
+        self.random = random.Random(seed)
+
+        self.received_count = 0
+        self.sent_count = 0
+        self.lost_count = 0
+        self.busy_count = 0
+        self.ignored_sbs_count = 0
+
+        self.parameters = {}  # (category, memory, parameter_set, block0, parameter) -> raw value bytes
+        self.short_params = set(VIRTUAL_SHORT_PARAMS)
+        self.user_tones = [bytearray(EMPTY_TONE) for _ in range(INTERNAL_MEMORY_USER_TONE_COUNT)]
+        self.tone_name = b'Virtual CT-X'.ljust(Size.TONE_NAME, b' ')
+        for block0 in range(4):
+            self.parameters[(3, MEMORY_3, 0, block0, SysexType.DSP_MODULE.value)] = b'\x7F\x7F'  # no DSP module
+
+        # Bulk transfer state
+        self._bulk_direction = None
+        self._bulk_outgoing = []  # packets left to send (download)
+        self._bulk_incoming = bytearray()  # data received so far (upload)
+        self._bulk_ended_at = 0.0  # monotonic time of the latest ESS/EBS
+
+        self._outputs = []  # functions receiving reply messages
+        self._packets = TyrantMidiService()  # packet builder shared with the real bulk protocol
+        self._lock = threading.RLock()
+
+        self._condition = threading.Condition()
+        self._schedule = []  # heap of (due_time, sequence, message)
+        self._sequence = itertools.count()
+        self._last_due = 0.0
+        self._thread = threading.Thread(target=self._run, name="VirtualSynth", daemon=True)
+        self._thread.start()
+
+    def open_ports(self):
+        """Return a connected (VirtualMidiIn, VirtualMidiOut) pair with the rtmidi port interface."""
+        midi_in = VirtualMidiIn(self)
+        self._outputs.append(midi_in.deliver)
+        return midi_in, VirtualMidiOut(self)
+
+    def disconnect(self, output):
+        if output in self._outputs:
+            self._outputs.remove(output)
+
+    def open_rtmidi_port(self, name: str = VIRTUAL_SYNTH_PORT_NAME):
+        """
+        Expose the emulator as a virtual rtmidi port, so that another process can use it.
+        Virtual ports are not supported by the Windows MultiMedia API.
+        """
+        import rtmidi
+
+        midi_in = rtmidi.MidiIn()
+        midi_in.ignore_types(sysex=False, timing=True, active_sense=True)
+        midi_in.open_virtual_port(name)
+        midi_in.set_callback(lambda event, _: self.receive(event[0]))
+        midi_out = rtmidi.MidiOut()
+        midi_out.open_virtual_port(name)
+        self._outputs.append(lambda message: midi_out.send_message(list(message)))
+        return midi_in, midi_out
+
+    def get_user_tone_names(self) -> list:
+        return [self._user_tone_name(slot).decode("ascii", "replace").replace("\x00", " ").strip()
+                for slot in range(len(self.user_tones))]
+
+    def receive(self, message):
+        """Process a message sent by the computer."""
+        message = bytes(message)
+        with self._lock:
+            self.received_count += 1
+            if self.loss_probability and self.random.random() < self.loss_probability:
+                self.lost_count += 1
+                return
+            if len(message) < 7 or message[0] != 0xF0 or message[1:5] != DEVICE_ID or message[-1] != 0xF7:
+                return  # not a Casio SysEx message: notes, program changes etc. have no reply
+
+            command = message[5]
+            if command == COMMAND_REQUEST:
+                self._process_request(message)
+            elif command == COMMAND_SET:
+                self._process_set(message)
+            else:
+                self._process_bulk(command, message)
+
+    def _process_request(self, message: bytes):
+        if len(message) < 25:
+            return
+        key = self._parameter_key(message)
+        category, memory, parameter_set, _, parameter = key
+        size = message[22] + 128 * message[23] + 1
+        if parameter == SysexType.TONE_NAME.value:
+            value = self._user_tone_name(parameter_set) if memory == MEMORY_1 else self.tone_name
+        elif key in self.parameters:
+            value = self.parameters[key]
+        elif size > 1:
+            value = bytes(size)
+        else:
+            value = bytes(1 if parameter in self.short_params else 2)
+        reply = bytearray(message[:24])
+        reply[5] = COMMAND_SET
+        self._send(bytes(reply + value + b'\xF7'))
+
+    def _process_set(self, message: bytes):
+        if len(message) < 26:
+            return
+        key = self._parameter_key(message)
+        value = message[24:-1]
+        if key[4] == SysexType.TONE_NAME.value and key[1] == MEMORY_3:
+            self.tone_name = value[:Size.TONE_NAME].ljust(Size.TONE_NAME, b' ')
+        else:
+            self.parameters[key] = value
+
+    def _process_bulk(self, command: int, message: bytes):
+        if command == COMMAND_SBS:
+            if time.monotonic() < self._bulk_ended_at + self.not_ready_time:
+                self.ignored_sbs_count += 1
+                return  # no ACK: the sender times out
+            self._bulk_direction = message[6]
+            self._bulk_outgoing = []
+            self._bulk_incoming = bytearray()
+            self._reply_with_busy(self._make_packet(command=COMMAND_ACK))
+        elif command == COMMAND_HBR and self._bulk_direction == SBS_DOWNLOAD:
+            category, memory, parameter_set = self._bulk_header(message)
+            data = self.user_tones[parameter_set] if memory == MEMORY_1 else bytes(len(EMPTY_TONE))
+            self._bulk_outgoing = [
+                self._make_packet(command=COMMAND_DATA, category=category, memory=memory,
+                                  parameter_set=parameter_set, length=len(data[i:i + BULK_CHUNK_SIZE]),
+                                  data=bytes(data[i:i + BULK_CHUNK_SIZE]))
+                for i in range(0, len(data), BULK_CHUNK_SIZE)]
+            self._bulk_outgoing.append(self._make_packet(command=COMMAND_ESS, category=category, memory=memory,
+                                                         parameter_set=parameter_set))
+            self._reply_with_busy(self._bulk_outgoing.pop(0))
+        elif command == COMMAND_ACK and self._bulk_direction == SBS_DOWNLOAD:
+            if self._bulk_outgoing:
+                self._reply_with_busy(self._bulk_outgoing.pop(0))
+        elif command == COMMAND_DATA and self._bulk_direction == SBS_UPLOAD:
+            category, memory, parameter_set = self._bulk_header(message)
+            crc_received = struct.unpack('<I', TyrantMidiService.midi_7bit_to_8bit(message[-6:-1]))[0]
+            if binascii.crc32(message[1:-6]) != crc_received:
+                return  # no ACK: the sender times out
+            self._bulk_incoming += TyrantMidiService.midi_7bit_to_8bit(message[12:-6])
+            self._reply_with_busy(self._make_packet(command=COMMAND_ACK, category=category, memory=memory,
+                                                    parameter_set=parameter_set))
+        elif command == COMMAND_ESS and self._bulk_direction == SBS_UPLOAD:
+            category, memory, parameter_set = self._bulk_header(message)
+            if memory == MEMORY_1 and parameter_set < len(self.user_tones):
+                self.user_tones[parameter_set] = bytearray(self._bulk_incoming)
+            self._bulk_incoming = bytearray()  # several parameter sets may follow in the same session
+            self._bulk_ended_at = time.monotonic()
+        elif command == COMMAND_EBS:
+            self._bulk_direction = None
+            self._bulk_outgoing = []
+            self._bulk_ended_at = time.monotonic()
+
+    def _reply_with_busy(self, packet: bytes):
+        delay = 0.0
+        if self.busy_probability and self.random.random() < self.busy_probability:
+            self.busy_count += 1
+            self._send(self._make_packet(command=COMMAND_BUSY))
+            delay = self.busy_time
+        self._send(packet, delay=delay)
+
+    def _send(self, message: bytes, delay: float = 0.0):
+        with self._condition:
+            # Replies never overtake each other
+            due = max(time.monotonic() + self.latency + delay, self._last_due)
+            self._last_due = due
+            heapq.heappush(self._schedule, (due, next(self._sequence), message))
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._schedule or self._schedule[0][0] > time.monotonic():
+                    self._condition.wait(self._schedule[0][0] - time.monotonic() if self._schedule else None)
+                _, _, message = heapq.heappop(self._schedule)
+            self.sent_count += 1
+            for output in list(self._outputs):
+                output(message)
+
+    def _make_packet(self, **kwargs) -> bytes:
+        return self._packets.make_packet(**kwargs)
+
+    def _user_tone_name(self, slot: int) -> bytes:
+        if slot >= len(self.user_tones):
+            return bytes(Size.TONE_NAME)
+        return bytes(self.user_tones[slot][TONE_NAME_OFFSET:TONE_NAME_OFFSET + Size.TONE_NAME])
+
+    @staticmethod
+    def _parameter_key(message: bytes) -> tuple:
+        return (message[6], message[7], message[8] + 128 * message[9], message[16] + 128 * message[17],
+                message[18] + 128 * message[19])
+
+    @staticmethod
+    def _bulk_header(message: bytes) -> tuple:
+        return message[6], message[7], message[8] + 128 * message[9]
+
+
+class VirtualMidiOut:
+    """Output port connected to a VirtualSynth: implements the part of rtmidi.MidiOut used by MidiService."""
+
+    def __init__(self, synth: VirtualSynth):
+        self.synth = synth
+        self.is_open = False
+
+    def get_port_count(self) -> int:
+        return 1
+
+    def get_port_name(self, _) -> str:
+        return VIRTUAL_SYNTH_PORT_NAME
+
+    def get_ports(self) -> list:
+        return [VIRTUAL_SYNTH_PORT_NAME]
+
+    def open_port(self, port: int = 0):
+        self.is_open = True
+
+    def close_port(self):
+        self.is_open = False
+
+    def is_port_open(self) -> bool:
+        return self.is_open
+
+    def delete(self):
+        self.is_open = False
+
+    def send_message(self, message):
+        if self.is_open:
+            self.synth.receive(message)
+
+
+class VirtualMidiIn:
+    """Input port connected to a VirtualSynth: implements the part of rtmidi.MidiIn used by MidiService."""
+
+    def __init__(self, synth: VirtualSynth):
+        self.synth = synth
+        self.is_open = False
+        self.callback = None
+        self.data = None
+        self.start_time = time.monotonic()
+
+    def get_port_count(self) -> int:
+        return 1
+
+    def get_port_name(self, _) -> str:
+        return VIRTUAL_SYNTH_PORT_NAME
+
+    def get_ports(self) -> list:
+        return [VIRTUAL_SYNTH_PORT_NAME]
+
+    def ignore_types(self, sysex=True, timing=True, active_sense=True):
+        pass
+
+    def open_port(self, port: int = 0):
+        self.is_open = True
+
+    def close_port(self):
+        self.is_open = False
+
+    def is_port_open(self) -> bool:
+        return self.is_open
+
+    def delete(self):
+        self.is_open = False
+        self.callback = None
+        self.synth.disconnect(self.deliver)
+
+    def set_callback(self, callback, data=None):
+        self.callback = callback
+        self.data = data
+
+    def cancel_callback(self):
+        self.callback = None
+
+    def deliver(self, message: bytes):
+        callback = self.callback
+        if self.is_open and callback is not None:
+            callback((list(message), time.monotonic() - self.start_time), self.data)
@@ -0,0 +1,26 @@
+import os
+
+import pytest
+
+from constants import constants
+from constants.constants import VIRTUAL_SYNTH_PORT_NAME
+
+
+@pytest.fixture(scope="session")
+def engine(tmp_path_factory):
+    """
+    ToneEngine connected to the virtual CT-X emulator. MidiService is a singleton: one engine per test session.
+    """
+    pytest.importorskip("rtmidi")
+
+    # The engine reads "config.cfg" and keeps its user tone cache in the working directory
+    work_dir = tmp_path_factory.mktemp("tone_mutant")
+    cwd = os.getcwd()
+    os.chdir(work_dir)
+    with open(constants.CONFIG_FILENAME, "w") as cfg_file:
+        cfg_file.write(f"[Midi]\nInPort = {VIRTUAL_SYNTH_PORT_NAME}\nOutPort = {VIRTUAL_SYNTH_PORT_NAME}\n")
+
+    from services.tone_engine import ToneEngine
+    tone_engine = ToneEngine()
+    yield tone_engine
+    os.chdir(cwd)
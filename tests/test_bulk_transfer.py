@@ -0,0 +1,57 @@
+import pytest
+
+from constants.constants import BULK_SETTLE_TIME_MIN, EMPTY_TONE
+
+pytest.importorskip("rtmidi")
+
+from services.request_engine import ParameterRequestEngine  # noqa: E402
+from services.tyrant_midi_service import BulkSession, TyrantMidiService  # noqa: E402
+from services.user_tone_cache import UserToneCache  # noqa: E402
+
+
+def make_reply(parameter: int, value: bytes) -> bytes:
+    request = TyrantMidiService().make_packet(category=3, memory=3, parameter=parameter)
+    return b'\xf0' + request[1:5] + b'\x01' + request[6:24] + value + b'\xf7'
+
+
+@pytest.fixture
+def tyrant(engine):
+    synth = engine.midi_service.virtual_synth
+    tyrant = TyrantMidiService(engine.midi_service, UserToneCache("bulk_transfer_cache"))
+    tyrant.ack_timeout = 0.2
+    yield tyrant
+    synth.not_ready_time = 0.0
+
+
+def test_unanswered_sbs_is_retried_with_doubled_settle_time(engine, tyrant):
+    synth = engine.midi_service.virtual_synth
+    tyrant.settle_time = tyrant.settle_time_floor = BULK_SETTLE_TIME_MIN
+    synth.not_ready_time = 0.15  # longer than the settle time, shorter than the ACK timeout
+    ignored_before = synth.ignored_sbs_count
+
+    tyrant.bulk_upload(98, EMPTY_TONE, category=tyrant.TONE_CATEGORY)
+    tyrant.bulk_upload(99, EMPTY_TONE, category=tyrant.TONE_CATEGORY)  # first SBS within the not ready window
+
+    assert synth.ignored_sbs_count == ignored_before + 1
+    assert synth.user_tones[99] == EMPTY_TONE
+    assert tyrant.settle_time_floor == 2 * BULK_SETTLE_TIME_MIN  # the shortest settle time seen to work
+
+
+def test_sbs_fails_after_the_retries(engine, tyrant):
+    synth = engine.midi_service.virtual_synth
+    tyrant.bulk_upload(98, EMPTY_TONE, category=tyrant.TONE_CATEGORY)
+    synth.not_ready_time = 60.0  # the keyboard does not get ready after the EBS above
+
+    with pytest.raises(tyrant.SysexTimeoutError):
+        tyrant.bulk_upload(99, EMPTY_TONE, category=tyrant.TONE_CATEGORY)
+
+
+def test_read_session_only_consumes_replies_to_its_requests():
+    request_engine = ParameterRequestEngine(lambda packet: None, timeout=5)
+    session = BulkSession(object(), BulkSession.READ_PACKET_TYPES, request_engine)
+    future = request_engine.submit(ParameterRequestEngine.make_key(3, 3, 0, 0, 20), "request")
+
+    assert not session.process_message(make_reply(21, b'\x05'))  # left to the next handler
+    assert session.process_message(make_reply(20, b'\x07'))
+    assert future.result(timeout=1) == b'\x07'
+    assert not session.process_message(make_reply(20, b'\x07'))  # a duplicate reply is not consumed either
@@ -0,0 +1,48 @@
+"""
+DSP parameters must survive the way to the synth and back, in particular the delay time, which is split
+into two bytes of two decimal digits each.
+"""
+
+import copy
+
+from constants.constants import EMPTY_TONE
+from constants.enums import ParameterType
+from models.tone import Tone
+from services.tone_codec import decode_tone, encode_tone
+from utils.utils import encode_dsp_params, decode_dsp_params
+
+DELAY_MODULE_ID = 19
+
+
+def _delay_module():
+    dsp_module = copy.deepcopy(Tone.get_dsp_module_by_id(DELAY_MODULE_ID))
+    delay_time = next(parameter for parameter in dsp_module.dsp_parameter_list
+                      if parameter.type == ParameterType.SPECIAL_DELAY_KNOB)
+    return dsp_module, delay_time
+
+
+def test_delay_time_round_trip():
+    dsp_module, delay_time = _delay_module()
+    for value in range(delay_time.choices[0], delay_time.choices[1] + 1):
+        delay_time.value = value
+        decoded_module, decoded_delay_time = _delay_module()
+        decode_dsp_params(decoded_module, encode_dsp_params(dsp_module))
+        assert decoded_delay_time.value == value
+
+
+def test_delay_time_bytes():
+    dsp_module, delay_time = _delay_module()
+    delay_time.value = 1005
+    assert encode_dsp_params(dsp_module)[12:] == [10, 5]
+
+
+def test_delay_time_tone_image_round_trip():
+    tone = decode_tone(EMPTY_TONE)
+    dsp_module, delay_time = _delay_module()
+    delay_time.value = 1005
+    tone.dsp_module_1 = dsp_module
+
+    decoded_module = decode_tone(encode_tone(tone)).dsp_module_1
+    assert decoded_module.id == DELAY_MODULE_ID
+    assert [parameter.value for parameter in decoded_module.dsp_parameter_list] == \
+           [parameter.value for parameter in dsp_module.dsp_parameter_list]
@@ -0,0 +1,164 @@
+"""
+The 7-bit codec (utils.midi_codec) must produce exactly the output of the original per-byte algorithm
+of TyrantMidiService.midi_8bit_to_7bit / midi_7bit_to_8bit, copied below as the reference.
+"""
+
+import random
+import struct
+
+import pytest
+
+from constants.constants import EMPTY_TONE
+from utils import midi_codec
+
+TONE_LENGTH = 0x1C8
+
+
+def reference_8bit_to_7bit(b):
+    r = 0  # remainder
+    n = 0  # position of split
+    i = 0  # pointer to input
+    c = b''  # output
+
+    while i < len(b):
+        if n == 0 or n == 7:
+            n = 0
+            c += struct.pack('<B', 0x1 * (b[i] & 0x7f))
+            r = (b[i] & 0x80) // 0x80
+        elif n == 1:
+            c += struct.pack('<B', r + 0x2 * (b[i] & 0x3f))
+            r = (b[i] & 0xc0) // 0x40
+        elif n == 2:
+            c += struct.pack('<B', r + 0x4 * (b[i] & 0x1f))
+            r = (b[i] & 0xe0) // 0x20
+        elif n == 3:
+            c += struct.pack('<B', r + 0x8 * (b[i] & 0x0f))
+            r = (b[i] & 0xf0) // 0x10
+        elif n == 4:
+            c += struct.pack('<B', r + 0x10 * (b[i] & 0x07))
+            r = (b[i] & 0xf8) // 0x8
+        elif n == 5:
+            c += struct.pack('<B', r + 0x20 * (b[i] & 0x03))
+            r = (b[i] & 0xfc) // 0x4
+        elif n == 6:
+            c += struct.pack('<B', r + 0x40 * (b[i] & 0x01))
+            c += struct.pack('<B', (b[i] & 0xfe) // 0x2)
+            r = 0
+        n += 1
+        i += 1
+    if n < 7:
+        c += struct.pack('<B', r)
+    return c
+
+
+def reference_7bit_to_8bit(b):
+    r = 0  # remainder
+    n = 0  # position of split
+    i = 0  # pointer to input
+    c = b''  # output
+
+    while i < len(b):
+        x = b[i]
+
+        if x >= 128:
+            raise Exception("Not valid 7-bit data at position {0} : {1:02X}!".format(i, x))
+
+        if n == 0 or n == 8:
+            r = x
+            n = 0
+        elif n == 1:
+            c += struct.pack('<B', ((x & 0x01) << 7) + r)
+            r = x // 2
+        elif n == 2:
+            c += struct.pack('<B', ((x & 0x03) << 6) + r)
+            r = x // 4
+        elif n == 3:
+            c += struct.pack('<B', ((x & 0x07) << 5) + r)
+            r = x // 8
+        elif n == 4:
+            c += struct.pack('<B', ((x & 0x0f) << 4) + r)
+            r = x // 16
+        elif n == 5:
+            c += struct.pack('<B', ((x & 0x1f) << 3) + r)
+            r = x // 32
+        elif n == 6:
+            c += struct.pack('<B', ((x & 0x3f) << 2) + r)
+            r = x // 64
+        elif n == 7:
+            c += struct.pack('<B', ((x & 0x7f) << 1) + r)
+            r = 0
+        i += 1
+        n += 1
+    if r != 0:
+        raise Exception("Left over data! Probably an error")
+
+    return c
+
+
+def _samples():
+    rng = random.Random(0x1C8)
+    samples = []
+    for length in range(65):
+        samples.append(bytes(length))
+        samples.append(b'\xFF' * length)
+        samples.append(bytes(rng.randrange(256) for _ in range(length)))
+    samples.append(bytes(EMPTY_TONE))
+    samples.append(bytes(rng.randrange(256) for _ in range(TONE_LENGTH)))
+    samples.append(bytes(rng.randrange(256) for _ in range(TONE_LENGTH * 10)))  # above NUMPY_MIN_LENGTH
+    return samples
+
+
+SAMPLES = _samples()
+
+
+@pytest.mark.parametrize("encode", [midi_codec.encode_7bit, midi_codec.encode_7bit_python])
+def test_encode_matches_reference(encode):
+    for data in SAMPLES:
+        assert encode(data) == reference_8bit_to_7bit(data), len(data)
+
+
+@pytest.mark.parametrize("decode", [midi_codec.decode_7bit, midi_codec.decode_7bit_python])
+def test_decode_matches_reference(decode):
+    for data in SAMPLES:
+        encoded = reference_8bit_to_7bit(data)
+        assert decode(encoded) == reference_7bit_to_8bit(encoded) == data, len(data)
+
+
+def test_fixed_vectors():
+    assert midi_codec.encode_7bit(b'') == b'\x00'
+    assert midi_codec.encode_7bit(b'\xFF') == b'\x7F\x01'
+    assert midi_codec.encode_7bit(b'\x80' * 7) == bytes([0x00, 0x01, 0x02, 0x04, 0x08, 0x10, 0x20, 0x40])
+    assert midi_codec.decode_7bit(b'\x7F\x01') == b'\xFF'
+    assert midi_codec.decode_7bit(b'\x00') == b''
+
+
+def test_round_trip_accepts_memoryview():
+    data = bytes(range(256)) * 2
+    assert midi_codec.decode_7bit(memoryview(midi_codec.encode_7bit(memoryview(data)))) == data
+
+
+@pytest.mark.parametrize("decode", [midi_codec.decode_7bit, midi_codec.decode_7bit_python, reference_7bit_to_8bit])
+def test_decode_rejects_8bit_data(decode):
+    with pytest.raises(Exception, match="Not valid 7-bit data at position 3 : 80!"):
+        decode(b'\x00\x01\x02\x80\x00')
+
+
+@pytest.mark.parametrize("decode", [midi_codec.decode_7bit, midi_codec.decode_7bit_python, reference_7bit_to_8bit])
+def test_decode_rejects_left_over_data(decode):
+    with pytest.raises(Exception, match="Left over data"):
+        decode(b'\x7F\x03')  # the second byte holds a bit beyond the data byte
+    with pytest.raises(Exception, match="Left over data"):
+        decode(bytes(8) + b'\x01')
+
+
+def test_numpy_codec_matches_reference():
+    numpy = pytest.importorskip("numpy")
+    assert midi_codec.numpy is numpy
+    for data in SAMPLES:
+        encoded = reference_8bit_to_7bit(data)
+        assert midi_codec.encode_7bit_numpy(data) == encoded, len(data)
+        assert midi_codec.decode_7bit_numpy(encoded) == data, len(data)
+    with pytest.raises(Exception, match="Not valid 7-bit data"):
+        midi_codec.decode_7bit_numpy(bytes(16) + b'\x80')
+    with pytest.raises(Exception, match="Left over data"):
+        midi_codec.decode_7bit_numpy(bytes(16) + b'\x01')
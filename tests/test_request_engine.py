@@ -0,0 +1,56 @@
+import threading
+from concurrent.futures import Future
+
+import pytest
+
+from services.request_engine import ParameterRequestEngine
+
+KEY_1 = ParameterRequestEngine.make_key(3, 3, 0, 0, 1)
+KEY_2 = ParameterRequestEngine.make_key(3, 3, 0, 0, 2)
+
+
+def test_lost_reply_expires_without_waiting():
+    sent = []
+    engine = ParameterRequestEngine(sent.append, window_size=1, timeout=0.05)
+    lost = engine.submit(KEY_1, "request 1")
+    backlog = engine.submit(KEY_2, "request 2")  # held back by the window until the first request expires
+
+    with pytest.raises(ParameterRequestEngine.RequestTimeoutError):
+        lost.result(timeout=2)
+    assert engine.resolve(KEY_2, "reply 2")
+    assert backlog.result(timeout=2) == "reply 2"
+    assert sent == ["request 1", "request 2"]
+    assert engine.pending_count() == 0
+
+
+def test_write_error_after_reply_keeps_the_reply():
+    written = Future()
+    engine = ParameterRequestEngine(lambda message: written, timeout=5)
+    future = engine.submit(KEY_1, "request")
+    assert engine.resolve(KEY_1, "reply")
+
+    written.set_exception(IOError("port closed"))  # completed by the reply: not failed again
+    assert future.result(timeout=1) == "reply"
+
+
+def test_reply_and_write_error_race():
+    for _ in range(200):
+        written = Future()
+        engine = ParameterRequestEngine(lambda message: written, timeout=5)
+        future = engine.submit(KEY_1, "request")
+        errors = []
+
+        def fail_write():
+            try:
+                written.set_exception(IOError("port closed"))
+            except Exception as e:
+                errors.append(e)
+
+        thread = threading.Thread(target=fail_write)
+        thread.start()
+        engine.resolve(KEY_1, "reply")
+        thread.join()
+
+        assert not errors
+        assert future.done()
+        assert engine.pending_count() == 0
@@ -0,0 +1,63 @@
+import copy
+import random
+import string
+
+from constants import constants
+from constants.enums import ParameterType
+from models.tone import Tone
+from services.tone_codec import decode_tone, encode_tone, unwrap_tone_file, wrap_tone_file
+
+DSP_MODULES = [dsp_module for dsp_module in constants.ALL_DSP_MODULES if dsp_module.id is not None]
+
+
+def randomize(parameter, rng: random.Random):
+    if parameter.type == ParameterType.COMBO:
+        parameter.value = rng.randrange(len(parameter.choices))
+    elif parameter.type == ParameterType.SPECIAL_ATK_REL_KNOB:
+        parameter.value = rng.choice(constants.ATTACK_AND_RELEASE_TIME)[0]
+    else:
+        parameter.value = rng.randint(parameter.choices[0], parameter.choices[1])
+
+
+def random_tone(rng: random.Random) -> Tone:
+    tone = Tone()
+    tone.name = "".join(rng.choice(string.ascii_letters + string.digits) for _ in range(rng.randint(1, 8)))
+    for parameter in tone.main_parameter_list + tone.advanced_parameter_list:
+        randomize(parameter, rng)
+    for block0, (dsp_module_attr, _) in constants.BLOCK_MAPPING.items():
+        dsp_module = copy.deepcopy(rng.choice(DSP_MODULES + [None]))
+        if dsp_module is not None:
+            dsp_module.bypass.value = rng.randrange(2)
+            for parameter in dsp_module.dsp_parameter_list:
+                randomize(parameter, rng)
+        setattr(tone, dsp_module_attr, dsp_module)
+    return tone
+
+
+def dsp_module_values(dsp_module):
+    if dsp_module is None:
+        return None
+    return dsp_module.id, dsp_module.bypass.value, [parameter.value for parameter in dsp_module.dsp_parameter_list]
+
+
+def test_decode_inverts_encode_for_every_parameter():
+    rng = random.Random(22)
+    for _ in range(50):
+        tone = random_tone(rng)
+        decoded = decode_tone(encode_tone(tone))
+
+        assert decoded.name == tone.name
+        for parameter, decoded_parameter in zip(tone.main_parameter_list + tone.advanced_parameter_list,
+                                                decoded.main_parameter_list + decoded.advanced_parameter_list):
+            assert decoded_parameter.value == parameter.value, parameter.name
+        for dsp_module_attr, _ in constants.BLOCK_MAPPING.values():
+            assert dsp_module_values(getattr(decoded, dsp_module_attr)) == \
+                   dsp_module_values(getattr(tone, dsp_module_attr)), dsp_module_attr
+
+
+def test_encode_keeps_the_bytes_of_an_unchanged_tone():
+    rng = random.Random(23)
+    for _ in range(10):
+        tone_data = encode_tone(random_tone(rng))
+        assert encode_tone(decode_tone(tone_data), tone_data) == tone_data
+        assert unwrap_tone_file(wrap_tone_file(bytes(tone_data))) == tone_data
@@ -0,0 +1,72 @@
+import os
+
+import pytest
+
+from constants.constants import BACKUP_CHUNK_SIZE, EMPTY_TONE, INTERNAL_MEMORY_USER_TONE_COUNT, USER_TONE_CACHE_DIR
+from constants.enums import EngineEvent
+from services.tone_archive import RESTORE_PROGRESS_FILENAME, RestoreProgress
+from services.user_tone_cache import TONE_NAME_LENGTH, TONE_NAME_OFFSET
+
+
+def test_silent_name_scan_does_not_notify_the_tone_manager(engine):
+    names = {}
+    listener = names.__setitem__
+    engine.subscribe(EngineEvent.USER_TONE_NAME, listener)
+    try:
+        assert len(engine.request_user_memory_tone_names(notify=False)) == INTERNAL_MEMORY_USER_TONE_COUNT
+        assert names == {}
+
+        assert len(engine.request_user_memory_tone_names()) == INTERNAL_MEMORY_USER_TONE_COUNT
+        assert names == dict(enumerate(engine.midi_service.virtual_synth.get_user_tone_names()))
+    finally:
+        engine.unsubscribe(EngineEvent.USER_TONE_NAME, listener)
+
+
+def set_user_tone_names(synth, prefix: str):
+    for slot in range(INTERNAL_MEMORY_USER_TONE_COUNT):
+        tone_data = bytearray(EMPTY_TONE)
+        tone_data[TONE_NAME_OFFSET:TONE_NAME_OFFSET + TONE_NAME_LENGTH] = f"{prefix} {slot}".encode().ljust(TONE_NAME_LENGTH)
+        synth.user_tones[slot] = tone_data
+
+
+def test_interrupted_restore_resumes_after_reopening_the_ports(engine, tmp_path, monkeypatch):
+    synth = engine.midi_service.virtual_synth
+    archive_file = str(tmp_path / "backup.zip")
+    progress_file = os.path.join(USER_TONE_CACHE_DIR, RESTORE_PROGRESS_FILENAME)
+    set_user_tone_names(synth, "Backup")
+    engine.backup_user_tones(archive_file)
+    backup = [bytes(tone_data) for tone_data in synth.user_tones]
+    set_user_tone_names(synth, "Current")
+
+    # Interrupted after two chunks
+    save_tones_data = engine.save_tones_data
+    calls = []
+
+    def interrupt_third_chunk(tones_data, **kwargs):
+        calls.append(tones_data)
+        if len(calls) == 3:
+            raise OSError("MIDI port closed")
+        return save_tones_data(tones_data, **kwargs)
+
+    monkeypatch.setattr(engine, "save_tones_data", interrupt_third_chunk)
+    with pytest.raises(OSError):
+        engine.restore_user_tones(archive_file)
+    monkeypatch.undo()
+    assert os.path.exists(progress_file)
+
+    engine.reopen_midi_ports()  # a new port session: the in-memory validation is gone
+    synth.user_tones[0][TONE_NAME_OFFSET] = ord("X")  # changed on the keyboard in between
+
+    report = engine.restore_user_tones(archive_file)
+    assert sorted(report.skipped) == list(range(802, 801 + 2 * BACKUP_CHUNK_SIZE))
+    assert sorted(report.written) == [801] + list(range(801 + 2 * BACKUP_CHUNK_SIZE, 901))
+    assert [bytes(tone_data) for tone_data in synth.user_tones] == backup
+    assert not os.path.exists(progress_file)
+
+
+def test_restore_progress_of_another_archive_is_ignored(tmp_path):
+    progress = RestoreProgress(str(tmp_path), "00000001")
+    progress.add({801: EMPTY_TONE})
+    assert RestoreProgress(str(tmp_path), "00000001").is_written(801, EMPTY_TONE)
+    assert not RestoreProgress(str(tmp_path), "00000002").is_written(801, EMPTY_TONE)
+    assert not RestoreProgress(str(tmp_path), "00000001").is_written(801, bytes(len(EMPTY_TONE)))
@@ -0,0 +1,75 @@
+"""
+HBR_LAYOUT must build exactly the tone images of the original hand-written assembly in
+TyrantMidiService.read_current_tone. tests/data/hbr_reference.json holds the images that the original code
+built from the random tones of "random_values" (seed REFERENCE_SEED).
+"""
+
+import json
+import os
+import random
+import string
+
+from services.tone_layout import HBR_LAYOUT, encode_tone_name
+
+REFERENCE_FILE = os.path.join(os.path.dirname(__file__), "data", "hbr_reference.json")
+REFERENCE_SEED = 22
+DSP_PARAMETERS_LENGTH = 15  # as read by read_current_tone
+
+
+def random_values(rng: random.Random) -> dict:
+    """Random values of every parameter that read_current_tone reads, within the range of its field."""
+    values = {}
+    for field in HBR_LAYOUT.fields:
+        if field.parameter in (0, 84):  # tone name and DSP name: not read
+            continue
+        if field.fmt == "16s":
+            value = bytes(rng.randrange(128) for _ in range(DSP_PARAMETERS_LENGTH))
+        elif field.bits:
+            value = rng.randrange(1 << field.bits)
+        elif field.clamp:
+            value = rng.randrange(-1, 256)
+        else:
+            value = rng.randrange(1 << (8 * {"B": 1, "H": 2, "I": 4}[field.fmt]))
+        values[(field.parameter, field.block)] = value
+    return values
+
+
+def random_tone_name(rng: random.Random) -> str:
+    return "".join(rng.choice(string.ascii_letters + string.digits + " ") for _ in range(rng.randrange(17)))
+
+
+def random_tones(count: int, seed: int = REFERENCE_SEED):
+    """(tone name, values) pairs"""
+    rng = random.Random(seed)
+    return [(random_tone_name(rng), random_values(rng)) for _ in range(count)]
+
+
+def load_reference() -> list:
+    with open(REFERENCE_FILE, "r") as reference_file:
+        return [bytes.fromhex(image) for image in json.load(reference_file)["images"]]
+
+
+def test_layout_matches_the_original_assembly():
+    reference = load_reference()
+    for (tone_name, values), image in zip(random_tones(len(reference)), reference):
+        values = dict(values)
+        if tone_name:
+            values[(0, 0)] = encode_tone_name(tone_name)
+        assert HBR_LAYOUT.encode(values) == image
+
+
+def test_decode_inverts_encode():
+    for tone_name, values in random_tones(20, seed=REFERENCE_SEED + 1):
+        values[(0, 0)] = encode_tone_name(tone_name)
+        decoded = HBR_LAYOUT.decode(HBR_LAYOUT.encode(values))
+        for field in HBR_LAYOUT.fields:
+            key = (field.parameter, field.block)
+            if field.fixed is not None:
+                expected = field.fixed
+            elif field.clamp:
+                expected = max(0, min(255, values[key]))
+            elif field.fmt == "16s":
+                expected = bytes(values.get(key, field.default)).ljust(16, b'\x00')
+            else:
+                expected = values[key]
+            assert decoded[key] == expected, key
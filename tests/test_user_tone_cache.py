@@ -0,0 +1,62 @@
+import pytest
+
+from constants.constants import EMPTY_TONE
+from services.user_tone_cache import TONE_NAME_LENGTH, TONE_NAME_OFFSET, plan_slot_writes, required_slots
+
+
+def make_tone(name: str) -> bytes:
+    tone_data = bytearray(EMPTY_TONE)
+    tone_data[TONE_NAME_OFFSET:TONE_NAME_OFFSET + TONE_NAME_LENGTH] = name.encode("ascii").ljust(TONE_NAME_LENGTH)
+    return bytes(tone_data)
+
+
+IMAGES = {slot: make_tone(f"Tone {slot}") for slot in range(100)}
+
+
+def test_move_writes_only_the_target():
+    layout = {99: 0}  # 801 -> 900
+    assert required_slots(layout) == {0}
+    assert plan_slot_writes(layout, IMAGES) == {99: IMAGES[0]}
+
+
+def test_identical_images_are_skipped():
+    images = {**IMAGES, 99: IMAGES[0]}
+    assert plan_slot_writes({99: 0}, images) == {}
+    assert plan_slot_writes({5: 5}, images) == {}
+    assert plan_slot_writes({3: bytearray(IMAGES[3])}, images) == {}
+    assert required_slots({5: 5, 3: IMAGES[3]}) == set()
+
+
+def test_target_without_image_is_written():
+    images = {0: IMAGES[0]}
+    assert plan_slot_writes({99: 0}, images) == {99: IMAGES[0]}
+
+
+@pytest.mark.parametrize("layout", [
+    {0: 1, 1: 0},  # swap
+    {0: 1, 1: 2, 2: 0},  # cycle
+    {10: 20, 20: 30, 30: 40, 40: 10, 50: 50},  # longer cycle and an unchanged slot
+])
+def test_swaps_and_cycles_use_the_images_read_before_any_write(layout):
+    # Every source is read first: a write never feeds another write of the same plan
+    assert required_slots(layout) == {source for target, source in layout.items() if source != target}
+    images = {slot: IMAGES[slot] for slot in required_slots(layout)}
+    writes = plan_slot_writes(layout, images)
+    assert writes == {target: IMAGES[source] for target, source in layout.items() if source != target}
+
+
+def test_engine_reads_every_source_before_writing(engine, monkeypatch):
+    synth = engine.midi_service.virtual_synth
+    for slot in range(3):
+        synth.user_tones[slot] = bytearray(make_tone(f"Cycle {slot}"))
+    engine.tyrant_midi_service.user_tone_cache.reset_validation()  # the images above are unknown to the cache
+
+    commands = []
+    receive = synth.receive
+    monkeypatch.setattr(synth, "receive", lambda message: (commands.append(message[5]), receive(message)))
+    engine.reorder_user_tones({801: 802, 802: 803, 803: 801})
+
+    hbr, data = 0x04, 0x05
+    assert commands.count(hbr) == 3
+    assert max(i for i, command in enumerate(commands) if command == hbr) < commands.index(data)
+    assert [bytes(synth.user_tones[slot]) for slot in range(3)] == [make_tone(f"Cycle {slot}") for slot in (1, 2, 0)]
@@ -30,7 +30,8 @@ class DequeLog(QTextBrowser):
 
         self.update_log_signal.connect(self._update_log)
 
-    def log(self, message: str):
+    # Message is a string or an entry with a lazy __str__ (SysexLogEntry): it is formatted only when displayed
+    def log(self, message):
         self.log_queue.append(message)
         self.update_log_signal.emit()
 
@@ -38,7 +39,7 @@ class DequeLog(QTextBrowser):
         while True:
             message = self._get_message()
             if message is not None:
-                self.append(message)
+                self.append(str(message))
                 self._apply_log_limit()
             else:
                 break
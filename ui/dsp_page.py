@@ -113,14 +113,4 @@ class DspPage(QWidget):
                 return item
 
     def get_dsp_params_as_list(self) -> list:
-        output = [0] * 14
-        if self.dsp_module is not None:
-            for idx, parameter in enumerate(self.dsp_module.dsp_parameter_list):
-                if parameter.type == ParameterType.SPECIAL_DELAY_KNOB:
-                    # special case, only for the "delay" DSP module
-                    output[12] = int(str(parameter.value).zfill(4)[:2])  # first 2 digits
-                    output[13] = int(str(parameter.value).zfill(4)[2:])  # last 2 digits
-                else:
-                    output[idx] = utils.encode_value_by_type(parameter)
-
-        return output
+        return utils.encode_dsp_params(self.dsp_module)
@@ -11,6 +11,7 @@ from constants import constants
 from constants.constants import DEFAULT_SYNTH_MODEL, CTX_700_800
 from constants.enums import ParameterType
 from models.parameter import Parameter, MainParameter
+from ui.latency_view import LatencyView
 from utils.syntax_highlighters.sysex_highlighter import SysexHighlighter
 from utils.utils import resource_path
 
@@ -87,6 +88,7 @@ class GuiHelper:
         log_tab = QWidget(main_window)
         log_tab_layout = QVBoxLayout()
         log_tab_layout.addWidget(main_window.log_texbox)
+        log_tab_layout.addWidget(LatencyView(main_window, main_window.core.midi_service))
 
         if GuiHelper.is_expert_mode_enabled():
             GuiHelper.add_midi_msg_input(log_tab_layout, main_window)
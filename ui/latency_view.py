@@ -0,0 +1,36 @@
+from PySide2.QtCore import QTimer
+from PySide2.QtWidgets import QLabel
+
+from constants.constants import LATENCY_VIEW_INTERVAL
+
+
+class LatencyView(QLabel):
+    """Live summary of the MIDI round trip statistics, shown below the log."""
+
+    def __init__(self, parent, midi_service):
+        super().__init__(parent)
+        self.midi_service = midi_service
+        self.setObjectName("latency-view")
+        self.setWordWrap(True)
+        self.setToolTip("Round trip times of the latest requests, in milliseconds (50th / 90th percentile):\n"
+                        "backlog: waiting for a free slot in the request window\n"
+                        "queue: waiting in our own send queue\n"
+                        "link: USB-MIDI link and keyboard\n"
+                        "processing: decoding and handling of the reply")
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(LATENCY_VIEW_INTERVAL)
+        self.refresh()
+
+    def refresh(self):
+        snapshot = self.midi_service.latency_monitor.snapshot()
+        phases = "  ".join(f"{phase}: {snapshot[phase]['p50']:.1f} / {snapshot[phase]['p90']:.1f}"
+                           for phase in ("total", "backlog", "queue", "link", "processing"))
+        inbound = self.midi_service.inbound_queue.stats()
+        sysex = self.midi_service.sysex_parser.stats()
+        self.setText(f"RTT ms  {phases}\n"
+                     f"in flight: {self.midi_service.request_engine.pending_count()}  "
+                     f"completed: {snapshot['completed']}  timeouts: {snapshot['timeouts']}  "
+                     f"orphans: {snapshot['orphans']}  input dropped: {inbound['dropped']}  "
+                     f"SysEx truncated: {sysex['truncated']}  malformed: {sysex['malformed']}")
@@ -8,7 +8,7 @@ from PySide2.QtWidgets import QWidget, QLabel, QComboBox, QGridLayout, QHBoxLayo
 
 from constants import constants
 from constants.constants import DEFAULT_MIDI_IN_PORT, DEFAULT_MIDI_OUT_PORT, DEFAULT_SYNTH_MODEL, CTX_3000_5000, \
-    CTX_700_800, CTX_8000IN_9000IN
+    CTX_700_800, CTX_8000IN_9000IN, VIRTUAL_SYNTH_PORT_NAME
 from utils.utils import resource_path
 
 
@@ -29,6 +29,9 @@ class SettingsWindow(QWidget):
         self.synth_models = [CTX_3000_5000, CTX_8000IN_9000IN, CTX_700_800]
         self.input_ports = rtmidi.MidiIn().get_ports()
         self.output_ports = rtmidi.MidiOut().get_ports()
+        if self.is_expert_mode_enabled == "true":
+            self.input_ports.append(VIRTUAL_SYNTH_PORT_NAME)
+            self.output_ports.append(VIRTUAL_SYNTH_PORT_NAME)
         self.expert_mode_values = ["OFF", "ON"]
         self.expert_mode_mapping = {"OFF": "false", "ON": "true"}
         self.inverse_expert_mode_mapping = {v: k for k, v in self.expert_mode_mapping.items()}
@@ -116,8 +119,7 @@ class SettingsWindow(QWidget):
             self.cfg.write(cfg_file)
 
         try:
-            self.core.close_midi_ports()
-            self.core.open_midi_ports()
+            self.core.reopen_midi_ports()
         except Exception as e:
             self.core.show_error_msg(f"Unable to open MIDI port: {e}")
 
@@ -139,7 +141,7 @@ class SettingsWindow(QWidget):
         self.cfg.set(section, option, value)
 
     def _refresh_instrument_list(self):
-        self.core.tone.synthesizer_model = self.synthesizer_model_combo.currentText()
+        self.core.engine.set_synthesizer_model(self.synthesizer_model_combo.currentText())
         self.core.main_window.central_widget.populate_instrument_list()
 
     def _show_restart_required_message(self):
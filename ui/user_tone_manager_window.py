@@ -1,5 +1,4 @@
 import os
-import time
 
 from PySide2 import QtCore
 from PySide2.QtCore import Qt, QDir
@@ -27,7 +26,6 @@ class UserToneManagerWindow(QDialog):
         self.core = parent.core
         self.path = ""  # Replace with the actual directory path
         self.items = []
-        self.selectedItems = []
         self.loading_animation = LoadingAnimation(self)
 
         self.resize(960, 670)
@@ -52,11 +50,23 @@ class UserToneManagerWindow(QDialog):
         self.move_from_pc.setObjectName("manager-left-button")
         self.move_from_pc.clicked.connect(self.on_move_from_pc)
 
+        self.backup_button = QPushButton(" Backup")
+        self.backup_button.setIcon(QIcon(resource_path("resources/save.png")))
+        self.backup_button.setObjectName("manager-left-button")
+        self.backup_button.clicked.connect(self.on_backup_button)
+
+        self.restore_button = QPushButton(" Restore")
+        self.restore_button.setIcon(QIcon(resource_path("resources/open.png")))
+        self.restore_button.setObjectName("manager-left-button")
+        self.restore_button.clicked.connect(self.on_restore_button)
+
         left_button_layout = QVBoxLayout()
         left_invisible_title = QLabel("")
         left_button_layout.addWidget(left_invisible_title)
         left_button_layout.addWidget(self.change_folder_button)
         left_button_layout.addWidget(self.move_from_pc)
+        left_button_layout.addWidget(self.backup_button)
+        left_button_layout.addWidget(self.restore_button)
         left_button_layout.addStretch()
 
         file_table_layout = QVBoxLayout()
@@ -86,7 +96,7 @@ class UserToneManagerWindow(QDialog):
         self.refresh_button = QPushButton(" Refresh")
         self.refresh_button.setIcon(QIcon(resource_path("resources/refresh.png")))
         self.refresh_button.setObjectName("manager-button")
-        self.refresh_button.clicked.connect(self.load_memory_tone_names)
+        self.refresh_button.clicked.connect(self.on_refresh_button)
 
         self.upload_button = QPushButton(" Save Here")
         self.upload_button.setIcon(QIcon(resource_path("resources/piano_plus.png")))
@@ -156,11 +166,15 @@ class UserToneManagerWindow(QDialog):
         self.move_down_button.setEnabled(False)
         self.move_from_pc.setEnabled(False)
         self.move_to_pc.setEnabled(False)
+        self.backup_button.setEnabled(False)
+        self.restore_button.setEnabled(False)
         QApplication.processEvents()
 
     def enable_controls(self):
         self.table_widget.setEnabled(True)
         self.refresh_button.setEnabled(True)
+        self.backup_button.setEnabled(True)
+        self.restore_button.setEnabled(True)
 
         if self.table_widget.selectedItems():
             if len(self.table_widget.selectedItems()) == 1:
@@ -207,6 +221,10 @@ class UserToneManagerWindow(QDialog):
         worker.signals.error.connect(lambda error: self.core.show_error_msg(str(error[1])))
         worker.start()
 
+    def on_refresh_button(self):
+        self.core.tyrant_midi_service.user_tone_cache.reset_validation()  # revalidated by the name scan
+        self.load_memory_tone_names()
+
     def add_item(self, tone_number, tone_name):
         if tone_number < INTERNAL_MEMORY_USER_TONE_COUNT:
             self.items[tone_number] = tone_name
@@ -309,22 +327,11 @@ class UserToneManagerWindow(QDialog):
         self.loading_animation.stop()
 
     def move_row(self, original_row, new_row):
-        if original_row > new_row:
-            # Moving selected item up (affected items are moving down)
-            original_row_data = self.core.load_tone_data(original_row + USER_TONE_TABLE_ROW_OFFSET)
-            for i in range(original_row - 1, new_row - 1, -1):
-                row_data = self.core.load_tone_data(i + USER_TONE_TABLE_ROW_OFFSET)
-                self.core.save_tone_data(i + USER_TONE_TABLE_ROW_OFFSET + 1, row_data)
-            self.core.save_tone_data(new_row + USER_TONE_TABLE_ROW_OFFSET, original_row_data)
-        elif original_row < new_row:
-            # Moving selected item down (affected items are moving up)
-            original_row_data = self.core.load_tone_data(original_row + USER_TONE_TABLE_ROW_OFFSET)
-            for i in range(original_row + 1, new_row + 1):
-                row_data = self.core.load_tone_data(i + USER_TONE_TABLE_ROW_OFFSET)
-                self.core.save_tone_data(i + USER_TONE_TABLE_ROW_OFFSET - 1, row_data)
-            self.core.save_tone_data(new_row + USER_TONE_TABLE_ROW_OFFSET, original_row_data)
-
-        # self.loading_animation.stop()
+        # Desired layout: the moved tone at its new position, the rows in between shifted by one
+        tone_numbers = [row + USER_TONE_TABLE_ROW_OFFSET for row in range(INTERNAL_MEMORY_USER_TONE_COUNT)]
+        sources = list(tone_numbers)
+        sources.insert(new_row, sources.pop(original_row))
+        self.core.reorder_user_tones(dict(zip(tone_numbers, sources)))
 
     def upload_tone(self):
         if self.table_widget.selectedItems() and len(self.table_widget.selectedItems()) == 1:
@@ -357,21 +364,14 @@ class UserToneManagerWindow(QDialog):
 
     def delete_tone(self):
         if self.table_widget.selectedItems():
-            self.selectedItems = self.table_widget.selectedItems()
-            self.disable_controls()
-            self.delete_next_tone()
-
-    def delete_next_tone(self):
-        if self.selectedItems:
             self.loading_animation.start()
-            selected_item = self.selectedItems.pop()
-            tone_number = self.table_widget.row(selected_item) + USER_TONE_TABLE_ROW_OFFSET
-            tone_name = selected_item.text()
-            worker = Worker(self.core.delete_next_tone, tone_number, tone_name)
+            self.disable_controls()
+            tones = [(self.table_widget.row(item) + USER_TONE_TABLE_ROW_OFFSET, item.text())
+                     for item in self.table_widget.selectedItems()]
+            worker = Worker(self.core.delete_tones, tones)
             worker.signals.error.connect(lambda error: self.core.show_error_msg(str(error[1])))
+            worker.signals.finished.connect(self.core.after_all_selected_tones_deleted)
             worker.start()
-        else:
-            self.core.after_all_selected_tones_deleted()
 
     def populate_file_table(self):
         """Populates the file table with .ton files from the given directory."""
@@ -399,21 +399,16 @@ class UserToneManagerWindow(QDialog):
     def on_save_tone_file(self, rows_data):
         self.loading_animation.start()
 
+        files = []
         for row_data in rows_data:
             row_number, tone_name = row_data.split(":", 1)  # Split by the colon to separate row and text
             tone_number = int(row_number) + USER_TONE_TABLE_ROW_OFFSET
             file_name = tone_name + ".ton"
 
             if file_name:
-                try:
-                    full_path = os.path.join(self.path, file_name)
-                    self.core.tone_manager_save_ton_file(full_path, tone_number)
+                files.append((os.path.join(self.path, file_name), tone_number))
 
-                    if len(rows_data) > 1:
-                        time.sleep(1)  # TODO: Replace with a better solution
-
-                except Exception as e:
-                    self.core.show_error_msg(str(e))
+        self.core.tone_manager_save_ton_files(files)  # all tones are downloaded in one bulk session
 
     def select_folder(self):
         folder_path = QFileDialog.getExistingDirectory(self, "Select Folder")
@@ -431,6 +426,21 @@ class UserToneManagerWindow(QDialog):
 
         self.on_load_tone_file(file_name, row_number)
 
+    def on_backup_button(self):
+        file_name, _ = QFileDialog.getSaveFileName(self, "Backup User Tones", os.path.join(self.path, "user_tones.zip"),
+                                                   "Tone backup (*.zip)")
+        if file_name:
+            self.loading_animation.start()
+            self.disable_controls()
+            self.core.start_user_tones_backup_worker(file_name)
+
+    def on_restore_button(self):
+        file_name, _ = QFileDialog.getOpenFileName(self, "Restore User Tones", self.path, "Tone backup (*.zip)")
+        if file_name:
+            self.loading_animation.start()
+            self.disable_controls()
+            self.core.start_user_tones_restore_worker(file_name)
+
     def on_move_to_pc(self):
         selected_items = self.table_widget.selectedItems()
         if selected_items:
@@ -461,6 +471,8 @@ class UserToneManagerWindow(QDialog):
             self.table_widget,
             self.change_folder_button,
             self.move_from_pc,
+            self.backup_button,
+            self.restore_button,
             self.refresh_button,
             self.upload_button,
             self.rename_button,
@@ -474,7 +486,6 @@ class UserToneManagerWindow(QDialog):
 
         # Clear lists
         self.items.clear()
-        self.selectedItems.clear()
 
         # Call parent close event
         super().closeEvent(event)
@@ -0,0 +1,109 @@
+"""
+Codec of the Casio SysEx "7-bit format" used by bulk transfers.
+
+The 8-bit data is a little-endian bit stream cut into 7-bit MIDI bytes: every group of 7 data bytes becomes
+8 MIDI bytes, a shorter last group of n bytes becomes n + 1 MIDI bytes. Whole groups are converted at once
+through a single integer; NumPy (optional) converts all groups of longer data in one vectorized step.
+"""
+
+try:
+    import numpy
+except ImportError:  # optional dependency: the pure Python codec is used
+    numpy = None
+
+NUMPY_MIN_LENGTH = 512  # bytes; for shorter data the NumPy call overhead exceeds the gain
+
+_SHIFTS = range(0, 56, 7)
+
+
+def encode_7bit(data) -> bytes:
+    """8-bit data -> MIDI "7-bit format" (MSb of every byte is zero)."""
+    if numpy is not None and len(data) >= NUMPY_MIN_LENGTH:
+        return encode_7bit_numpy(data)
+    return encode_7bit_python(data)
+
+
+def decode_7bit(data) -> bytes:
+    """MIDI "7-bit format" -> 8-bit data. Raises an exception for invalid or left over data."""
+    if numpy is not None and len(data) >= NUMPY_MIN_LENGTH:
+        return decode_7bit_numpy(data)
+    return decode_7bit_python(data)
+
+
+def encode_7bit_python(data) -> bytes:
+    length = len(data)
+    out = bytearray((length * 8 + 6) // 7 or 1)  # empty data is encoded as a single zero byte
+    full_length = length - length % 7
+    from_bytes = int.from_bytes
+
+    o = 0
+    for i in range(0, full_length, 7):
+        v = from_bytes(data[i:i + 7], "little")
+        # Spread the 56 bits into 8 bytes of 7 bits each
+        out[o:o + 8] = ((v & 0x7F) | ((v << 1) & 0x7F00) | ((v << 2) & 0x7F0000) | ((v << 3) & 0x7F000000)
+                        | ((v << 4) & 0x7F00000000) | ((v << 5) & 0x7F0000000000)
+                        | ((v << 6) & 0x7F000000000000) | ((v << 7) & 0x7F00000000000000)).to_bytes(8, "little")
+        o += 8
+
+    if full_length < length:
+        v = from_bytes(data[full_length:], "little")
+        for shift in _SHIFTS[:len(out) - o]:
+            out[o] = (v >> shift) & 0x7F
+            o += 1
+    return bytes(out)
+
+
+def decode_7bit_python(data) -> bytes:
+    _check_7bit(data)
+    length = len(data)
+    out = bytearray(length - (length + 7) // 8)
+    full_length = length - length % 8
+    from_bytes = int.from_bytes
+
+    o = 0
+    for i in range(0, full_length, 8):
+        v = from_bytes(data[i:i + 8], "little")
+        # Join 8 bytes of 7 bits each into 56 bits
+        out[o:o + 7] = ((v & 0x7F) | ((v >> 1) & 0x3F80) | ((v >> 2) & 0x1FC000) | ((v >> 3) & 0xFE00000)
+                        | ((v >> 4) & 0x7F0000000) | ((v >> 5) & 0x3F800000000)
+                        | ((v >> 6) & 0x1FC0000000000) | ((v >> 7) & 0xFE000000000000)).to_bytes(7, "little")
+        o += 7
+
+    if full_length < length:
+        v = 0
+        for shift, x in zip(_SHIFTS, data[full_length:]):
+            v |= x << shift
+        count = length - full_length - 1  # the last group of n + 1 MIDI bytes holds n data bytes
+        if v >> (8 * count):
+            raise Exception("Left over data! Probably an error")
+        out[o:] = v.to_bytes(count, "little")
+    return bytes(out)
+
+
+def encode_7bit_numpy(data) -> bytes:
+    data = bytes(data)
+    full_length = len(data) - len(data) % 7
+    groups = numpy.zeros((full_length // 7, 8), dtype=numpy.uint8)
+    groups[:, :7] = numpy.frombuffer(data, dtype=numpy.uint8, count=full_length).reshape(-1, 7)
+    values = groups.view("<u8")  # one 56-bit value per group
+    shifts = numpy.arange(0, 56, 7, dtype=numpy.uint64)
+    out = ((values >> shifts) & numpy.uint64(0x7F)).astype(numpy.uint8)
+    tail = encode_7bit_python(data[full_length:]) if full_length < len(data) or not data else b''
+    return out.tobytes() + tail
+
+
+def decode_7bit_numpy(data) -> bytes:
+    data = bytes(data)
+    _check_7bit(data)
+    full_length = len(data) - len(data) % 8
+    groups = numpy.frombuffer(data, dtype=numpy.uint8, count=full_length).reshape(-1, 8).astype(numpy.uint64)
+    shifts = numpy.arange(0, 56, 7, dtype=numpy.uint64)
+    values = numpy.bitwise_or.reduce(groups << shifts, axis=1).astype("<u8")
+    out = values.view(numpy.uint8).reshape(-1, 8)[:, :7]
+    return out.tobytes() + decode_7bit_python(data[full_length:])
+
+
+def _check_7bit(data):
+    if data and max(data) >= 0x80:
+        i = next(i for i, x in enumerate(data) if x >= 0x80)
+        raise Exception("Not valid 7-bit data at position {0} : {1:02X}!".format(i, data[i]))
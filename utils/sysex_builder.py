@@ -0,0 +1,128 @@
+from constants.enums import SysexType, Size
+
+# Casio parameter message layout (byte offsets):
+#   F0 44 19 01 7F | command | category | memory | parameter set (2) | block 3..1 (6) | block 0 (2)
+#   | parameter (2) | index (2) | size (2) | value (0..n) | F7
+COMMAND_INDEX = 5
+CATEGORY_INDEX = 6
+MEMORY_INDEX = 7
+PARAM_SET_INDEX = 8
+BLOCK_0_INDEX = 16
+PARAMETER_INDEX = 18
+SIZE_INDEX = 22
+VALUE_INDEX = 24
+
+COMMAND_REQUEST = 0x00
+COMMAND_SET = 0x01
+
+HEADER = b'\xF0\x44\x19\x01\x7F'
+
+
+def _make_template(command: int, category: int, memory: int, parameter: int = 0, size: int = 0,
+                   value_size: int = 0) -> bytes:
+    msg = bytearray(VALUE_INDEX + value_size + 1)
+    msg[0:5] = HEADER
+    msg[COMMAND_INDEX] = command
+    msg[CATEGORY_INDEX] = category
+    msg[MEMORY_INDEX] = memory
+    _put_lsb_msb(msg, PARAMETER_INDEX, parameter)
+    _put_lsb_msb(msg, SIZE_INDEX, size)
+    msg[-1] = 0xF7
+    return bytes(msg)
+
+
+# Converts int to 2 bytes (7-bit LSB + 7-bit MSB) in place: default for all parameters
+def _put_lsb_msb(msg: bytearray, index: int, number: int):
+    msg[index] = number % 128
+    msg[index + 1] = number // 128
+
+
+# Converts int to 2 bytes (8-bit LSB + 8-bit MSB) in place: for attack/release time
+def _put_lsb_msb_8bit(msg: bytearray, index: int, number: int):
+    msg[index] = number % 256
+    msg[index + 1] = number // 256
+
+
+# Precompiled templates: only the variable fields are patched into a copy of them
+PARAMETER_REQUEST_TEMPLATE = _make_template(COMMAND_REQUEST, 3, 3)
+PARAMETER_SET_TEMPLATE = _make_template(COMMAND_SET, 3, 3, value_size=Size.MAIN_PARAMETER)
+PARAMETER_SET_SHORT_TEMPLATE = _make_template(COMMAND_SET, 3, 3, value_size=Size.MAIN_PARAMETER_SHORT)
+DSP_PARAMS_SET_TEMPLATE = _make_template(COMMAND_SET, 3, 3, SysexType.DSP_PARAMS.value, Size.DSP_PARAMS - 1,
+                                         Size.DSP_PARAMS)
+TONE_CHANGE_TEMPLATE = _make_template(COMMAND_SET, 2, 3, SysexType.TONE_NUMBER.value, value_size=2)
+
+
+def build_parameter_request(block0: int, parameter: int, category: int = 3, memory: int = 3,
+                            parameter_set: int = 0, size: int = 0) -> bytearray:
+    """Parameter request; "size" is the raw value of the size field."""
+    msg = bytearray(PARAMETER_REQUEST_TEMPLATE)
+    msg[CATEGORY_INDEX] = category
+    msg[MEMORY_INDEX] = memory
+    _put_lsb_msb(msg, PARAM_SET_INDEX, parameter_set)
+    _put_lsb_msb(msg, BLOCK_0_INDEX, block0)
+    _put_lsb_msb(msg, PARAMETER_INDEX, parameter)
+    _put_lsb_msb(msg, SIZE_INDEX, size)
+    return msg
+
+
+def build_parameter_set(block0: int, parameter: int, value: int, category: int = 3, memory: int = 3,
+                        parameter_set: int = 0, size: int = 0, is_8bit: bool = False) -> bytearray:
+    """Parameter change with a 2-byte value (7-bit LSB + MSB, or 8-bit for attack/release time)."""
+    msg = bytearray(PARAMETER_SET_TEMPLATE)
+    msg[CATEGORY_INDEX] = category
+    msg[MEMORY_INDEX] = memory
+    _put_lsb_msb(msg, PARAM_SET_INDEX, parameter_set)
+    _put_lsb_msb(msg, BLOCK_0_INDEX, block0)
+    _put_lsb_msb(msg, PARAMETER_INDEX, parameter)
+    _put_lsb_msb(msg, SIZE_INDEX, size)
+    if is_8bit:
+        _put_lsb_msb_8bit(msg, VALUE_INDEX, value)
+    else:
+        _put_lsb_msb(msg, VALUE_INDEX, value)
+    return msg
+
+
+def build_parameter_set_short(block0: int, parameter: int, value: int, category: int = 3, memory: int = 3,
+                              parameter_set: int = 0, size: int = 0) -> bytearray:
+    """Parameter change with a 1-byte value: special case for "SHORT_PARAMS" list parameters."""
+    msg = bytearray(PARAMETER_SET_SHORT_TEMPLATE)
+    msg[CATEGORY_INDEX] = category
+    msg[MEMORY_INDEX] = memory
+    _put_lsb_msb(msg, PARAM_SET_INDEX, parameter_set)
+    _put_lsb_msb(msg, BLOCK_0_INDEX, block0)
+    _put_lsb_msb(msg, PARAMETER_INDEX, parameter)
+    _put_lsb_msb(msg, SIZE_INDEX, size)
+    msg[VALUE_INDEX] = value
+    return msg
+
+
+def build_dsp_params_set(block0: int, params_list: list) -> bytearray:
+    """DSP parameters change: the array size is always 14 bytes."""
+    msg = bytearray(DSP_PARAMS_SET_TEMPLATE)
+    _put_lsb_msb(msg, BLOCK_0_INDEX, block0)
+    msg[VALUE_INDEX:VALUE_INDEX + Size.DSP_PARAMS] = bytes(params_list)
+    return msg
+
+
+def build_tone_change(block0: int, internal_number: int) -> bytearray:
+    """Tone change using performance parameter 228 ("tone number")."""
+    msg = bytearray(TONE_CHANGE_TEMPLATE)
+    _put_lsb_msb(msg, BLOCK_0_INDEX, block0)
+    _put_lsb_msb(msg, VALUE_INDEX, internal_number)
+    return msg
+
+
+class SysexLogEntry:
+    """
+    Log entry with a raw MIDI message. The hex text is produced lazily, only when the log displays the entry.
+    """
+    __slots__ = ("title", "message")
+
+    def __init__(self, title: str, message):
+        self.title = title
+        self.message = bytes(message)
+
+    def __str__(self):
+        msg_hex = self.message.hex(" ").upper()
+        line_break = "\n" if msg_hex.startswith("F0") else ""
+        return self.title + line_break + msg_hex
@@ -106,6 +106,29 @@ def decode_param_value(value: int, parameter: Parameter):
     return value
 
 
+# DSP module parameters -> synth values (the array size is always 14)
+def encode_dsp_params(dsp_module) -> list:
+    output = [0] * 14
+    if dsp_module is not None:
+        for idx, parameter in enumerate(dsp_module.dsp_parameter_list):
+            if parameter.type == ParameterType.SPECIAL_DELAY_KNOB:
+                # special case, only for the "delay" DSP module
+                output[12] = int(str(parameter.value).zfill(4)[:2])  # first 2 digits
+                output[13] = int(str(parameter.value).zfill(4)[2:])  # last 2 digits
+            else:
+                output[idx] = encode_value_by_type(parameter)
+    return output
+
+
+# Synth values -> DSP module parameters
+def decode_dsp_params(dsp_module, synth_dsp_params):
+    for idx, dsp_param in enumerate(dsp_module.dsp_parameter_list):
+        if dsp_param.type == ParameterType.SPECIAL_DELAY_KNOB:
+            dsp_param.value = synth_dsp_params[12] * 100 + synth_dsp_params[13]  # see encode_dsp_params
+        else:
+            dsp_param.value = decode_param_value(synth_dsp_params[idx], dsp_param)
+
+
 # Get the absolute path to a resource
 def resource_path(relative_path):
     if hasattr(sys.modules[__name__], '__compiled__'):